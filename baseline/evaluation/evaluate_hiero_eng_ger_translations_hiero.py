@@ -1,28 +1,10 @@
-import os
-import warnings
+import sys
 from pathlib import Path
 
-import evaluate
-import nltk
-import pandas as pd
-from comet import download_model, load_from_checkpoint
-
-# === Silence unnecessary warnings
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
-warnings.filterwarnings("ignore")
-
-# === Setup METEOR
-nltk.download("punkt")
-nltk.download("wordnet")
-
-# === Load evaluation metrics
-print("✅ Loading METEOR and BERTScore...")
-meteor_metric = evaluate.load("meteor")
-bertscore_metric = evaluate.load("bertscore")
-
-print("✅ Loading COMET...")
-model_path = download_model("Unbabel/wmt22-comet-da")
-comet_model = load_from_checkpoint(model_path)
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.evaluation import EvaluationEngine
+from coptic_nmt.metrics import PROFILES
 
 # === Directories
 BASE_DIR = Path("../generated translations")
@@ -41,53 +23,11 @@ generated_columns = [
 
 # === Reference columns
 ref_names = ["reference_translation"]
-
-# === Combined evaluation
-def evaluate_all_metrics(label, csv_path):
-    print(f"\n📥 Evaluation for: {label}")
-    df = pd.read_csv(csv_path)
-
-    for gen_col in generated_columns:
-        if gen_col not in df.columns:
-            print(f"⚠️ Missing generated column: {gen_col}, skipping.")
-            continue
-
-        print(f"\n🔎 Evaluating column: {gen_col}")
-        candidates = df[gen_col].fillna("").tolist()
-
-        for ref in ref_names:
-            col_name = ref
-            if col_name not in df.columns:
-                print(f"⚠️ Missing reference column: {col_name}, skipping.")
-                continue
-
-            references = df[col_name].fillna("").tolist()
-            print(f"🔍 {len(references)} pairs with reference '{ref}'...")
-
-            # METEOR
-            meteor_result = meteor_metric.compute(predictions=candidates, references=references)
-            df[f"meteor_{ref}"] = [meteor_result["meteor"]] * len(df)
-
-            # BERTScore
-            bertscore_result = bertscore_metric.compute(predictions=candidates, references=references, lang="fr")
-            df[f"bertscore_{ref}"] = bertscore_result["f1"]
-
-            # COMET
-            comet_data = [{"src": s, "mt": c, "ref": r} for s, c, r in zip(references, candidates, references)]
-            comet_scores = comet_model.predict(comet_data, batch_size=8, num_workers=1, gpus=0)
-            df[f"comet_{ref}"] = comet_scores["scores"]
-
-            # Summary
-            avg_bertscore = sum(bertscore_result["f1"]) / len(bertscore_result["f1"])
-            avg_comet = sum(comet_scores["scores"]) / len(comet_scores["scores"])
-            print(f"📊 {ref} — METEOR: {meteor_result['meteor']:.4f} | "
-                  f"BERTScore F1: {avg_bertscore:.4f} | COMET: {avg_comet:.4f}")
-
-    # === Save results
-    output_csv = OUTPUT_DIR / (csv_path.stem + "_other_scores.csv")
-    df.to_csv(output_csv, index=False)
-    print(f"✅ Enriched file saved: {output_csv}")
-
-# === Run evaluation
-for label, path in input_files.items():
-    evaluate_all_metrics(label, path)
+references = {ref: ref for ref in ref_names}
+
+# === Lexical (BLEU, chrF++, TER) and neural metrics loaded once, every file / column / reference
+# scored in shared batched passes; corpus-level BLEU / chrF++ / TER go to corpus_scores_other_scores.csv
+# Guarded: the METEOR worker processes import this script again under the spawn start method
+if __name__ == "__main__":
+    engine = EvaluationEngine(PROFILES["fast"] + PROFILES["default"])
+    engine.evaluate_files(input_files, generated_columns, references, OUTPUT_DIR, suffix="_other_scores", column_template="{metric}_{reference}")
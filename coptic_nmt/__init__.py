@@ -0,0 +1 @@
+# Shared helpers for the Coptic–French fine-tuning and evaluation scripts.
@@ -0,0 +1,44 @@
+# === Attention and feed-forward projections of Marian / opus-mt models
+MARIAN_LORA_TARGET_MODULES = "q_proj,k_proj,v_proj,out_proj,fc1,fc2"
+
+
+def add_adapter_arguments(parser):
+    parser.add_argument("--adapter", choices=["lora"], default=None,
+                        help="Train only low-rank adapters on the frozen base model")
+    parser.add_argument("--lora_rank", type=int, default=16, help="Rank of the LoRA matrices")
+    parser.add_argument("--lora_alpha", type=int, default=32, help="LoRA scaling factor")
+    parser.add_argument("--lora_dropout", type=float, default=0.05, help="Dropout on the LoRA input")
+    parser.add_argument("--lora_target_modules", default=MARIAN_LORA_TARGET_MODULES,
+                        help="Comma-separated module names receiving adapters")
+    parser.add_argument("--lora_learning_rate", type=float, default=5e-4, help="Learning rate in adapter mode")
+
+
+# === peft is imported inside the functions: plain fine-tunes import this module without it
+def wrap_with_lora(model, args):
+    from peft import LoraConfig, TaskType, get_peft_model
+
+    config = LoraConfig(
+        task_type=TaskType.SEQ_2_SEQ_LM,
+        r=args.lora_rank,
+        lora_alpha=args.lora_alpha,
+        lora_dropout=args.lora_dropout,
+        target_modules=args.lora_target_modules.split(","),
+    )
+    # Needed for activation checkpointing on a frozen base (cpu device profile)
+    model.enable_input_require_grads()
+    model = get_peft_model(model, config)
+    trainable, total = model.get_nb_trainable_parameters()
+    print(f"🧩 LoRA adapters: {trainable:,} trainable parameters out of {total:,} ({trainable / total:.2%})")
+    return model
+
+
+# === One base model in memory, adapters hot-swapped with set_adapter(name)
+def load_base_with_adapters(base_model, adapter_paths):
+    from peft import PeftModel
+
+    names = list(adapter_paths)
+    model = PeftModel.from_pretrained(base_model, adapter_paths[names[0]], adapter_name=names[0])
+    for name in names[1:]:
+        model.load_adapter(adapter_paths[name], adapter_name=name)
+    model.eval()
+    return model
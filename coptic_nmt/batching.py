@@ -0,0 +1,181 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+
+# === Lengths used for batching: (source tokens, target tokens) per example
+def example_lengths(dataset):
+    if getattr(dataset, "lengths", None) is not None:  # NoisyCopticDataset
+        return dataset.lengths
+    if hasattr(dataset, "examples"):  # MultiReferenceDataset
+        return [(len(ex["input_ids"]), max(len(ref) for ref in ex["references"])) for ex in dataset.examples]
+    return [(len(src), len(tgt)) for src, tgt in zip(dataset["input_ids"], dataset["labels"])]
+
+
+# === Length-grouped batches capped by a padded-token budget
+# Examples are shuffled once with `seed`, cut into pools of `pool_size`, sorted by length
+# inside each pool and packed greedily while batch_size * longest_sequence <= max_tokens.
+# The batch composition is fixed (so len() is stable for the Trainer schedule), only the
+# batch order is reshuffled at every epoch: the order depends on (seed, epoch) only, and the
+# epoch is set from the Trainer state (BatchSamplerEpochCallback), so a resumed run continues
+# with the order of its epoch. With several ranks, each rank takes every num_replicas-th batch
+# of the shuffled order.
+class TokenBudgetBatchSampler:
+    def __init__(self, lengths, max_tokens, shuffle=True, seed=42, pool_size=4096, max_batch_size=None,
+                 num_replicas=1, rank=0):
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+        self.batches = self.build_batches(lengths, max_tokens, seed, pool_size, max_batch_size)
+
+    @staticmethod
+    def build_batches(lengths, max_tokens, seed, pool_size, max_batch_size):
+        sizes = [max(src, tgt) for src, tgt in lengths]
+        indices = list(range(len(sizes)))
+        random.Random(seed).shuffle(indices)
+
+        batches = []
+        for start in range(0, len(indices), pool_size):
+            pool = sorted(indices[start:start + pool_size], key=lambda i: sizes[i])
+            batch, longest = [], 0
+            for idx in pool:
+                new_longest = max(longest, sizes[idx])
+                too_many_tokens = batch and new_longest * (len(batch) + 1) > max_tokens
+                too_many_rows = max_batch_size is not None and len(batch) >= max_batch_size
+                if too_many_tokens or too_many_rows:
+                    batches.append(batch)
+                    batch, new_longest = [], sizes[idx]
+                batch.append(idx)
+                longest = new_longest
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def set_epoch(self, epoch):
+        self.epoch = int(epoch)
+
+    def __iter__(self):
+        order = list(range(len(self.batches)))
+        if self.shuffle:
+            random.Random(self.seed + self.epoch).shuffle(order)
+        # Drop the tail so every rank yields the same number of batches
+        usable = len(order) - len(order) % self.num_replicas
+        for position in range(self.rank, usable, self.num_replicas):
+            yield self.batches[order[position]]
+
+    def __len__(self):
+        return len(self.batches) // self.num_replicas
+
+
+# === Padding statistics of a list of batches
+def padding_stats(lengths, batches):
+    real_tokens = 0
+    padded_tokens = 0
+    for batch in batches:
+        src = [lengths[i][0] for i in batch]
+        tgt = [lengths[i][1] for i in batch]
+        real_tokens += sum(src) + sum(tgt)
+        padded_tokens += len(batch) * (max(src) + max(tgt))
+    return {
+        "batches": len(batches),
+        "real_tokens": real_tokens,
+        "padded_tokens": padded_tokens,
+        "padding_ratio": 1 - real_tokens / padded_tokens if padded_tokens else 0.0,
+    }
+
+
+def fixed_size_batches(num_examples, batch_size, seed=42):
+    indices = list(range(num_examples))
+    random.Random(seed).shuffle(indices)
+    return [indices[i:i + batch_size] for i in range(0, num_examples, batch_size)]
+
+
+# === Measured training throughput (real tokens / s) over `batches`
+# The first `warmup` batches are run but not timed (allocator, thread pools, lazy initialisations).
+def measure_tokens_per_second(model, dataset, collator, batches, lengths, warmup=3, learning_rate=5e-5):
+    import torch
+
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate)
+    model.train()
+    real_tokens = sum(lengths[i][0] + lengths[i][1] for batch in batches[warmup:] for i in batch)
+
+    start = None
+    for step, batch in enumerate(batches):
+        if step == warmup:
+            start = time.perf_counter()
+        features = [{k: dataset[i][k] for k in ("input_ids", "attention_mask", "labels")} for i in batch]
+        inputs = collator(features)
+        loss = model(**inputs).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+    elapsed = time.perf_counter() - start
+    return real_tokens / elapsed
+
+
+if __name__ == "__main__":
+    import os
+
+    import pandas as pd
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, DataCollatorForSeq2Seq
+
+    from coptic_nmt.data_cache import load_tokenized_dataset
+
+    parser = argparse.ArgumentParser(description="Padding ratio and tokens/sec: fixed-size vs token-budget batches.")
+    parser.add_argument("--data_path", required=True, help="Path to the training CSV file")
+    parser.add_argument("--model_path", required=True, help="Tokenizer (and model, for --benchmark_steps) path")
+    parser.add_argument("--input_prefix", default="", help='Input prefix (e.g. ">>fra<< ")')
+    parser.add_argument("--batch_size", type=int, default=32, help="Fixed batch size of the baseline")
+    parser.add_argument("--max_tokens", type=int, default=2048, help="Token budget per batch")
+    parser.add_argument("--benchmark_steps", type=int, default=0,
+                        help="Also time this many training steps per strategy (loads the model)")
+    parser.add_argument("--cache_dir", default="tokenized_cache", help="Folder of the tokenized dataset cache")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data_path)
+    df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    train_dataset = load_tokenized_dataset(df, tokenizer, cache_dir=args.cache_dir,
+                                           input_prefix=args.input_prefix)["train"]
+    lengths = example_lengths(train_dataset)
+
+    strategies = {
+        f"fixed batch size {args.batch_size}": fixed_size_batches(len(lengths), args.batch_size),
+        f"token budget {args.max_tokens}": TokenBudgetBatchSampler(lengths, args.max_tokens).batches,
+    }
+    print(f"\n📊 Padding on {len(lengths)} training examples:")
+    for name, batches in strategies.items():
+        stats = padding_stats(lengths, batches)
+        mean_rows = np.mean([len(b) for b in batches])
+        print(f"   → {name}: {stats['batches']} batches ({mean_rows:.1f} rows on average), "
+              f"padding ratio {stats['padding_ratio']:.1%}")
+
+    if args.benchmark_steps:
+        os.environ["TOKENIZERS_PARALLELISM"] = "false"
+        collator = DataCollatorForSeq2Seq(tokenizer)
+        # Both strategies train on the same random examples: those of `benchmark_steps` fixed-size
+        # batches, regrouped by the token-budget sampler in its shuffled epoch order. The same
+        # untimed warm-up batches are run first for each strategy.
+        warmup = 3
+        fixed = fixed_size_batches(len(lengths), args.batch_size)
+        warmup_batches, timed = fixed[:warmup], fixed[warmup:warmup + args.benchmark_steps]
+        subset = [i for batch in timed for i in batch]
+        sampler = TokenBudgetBatchSampler([lengths[i] for i in subset], args.max_tokens)
+        timed_strategies = {
+            f"fixed batch size {args.batch_size}": timed,
+            f"token budget {args.max_tokens}": [[subset[j] for j in batch] for batch in sampler],
+        }
+        print(f"\n⏱️ Throughput on the same {len(subset)} training examples ({warmup} warm-up steps):")
+        for name, batches in timed_strategies.items():
+            model = AutoModelForSeq2SeqLM.from_pretrained(args.model_path)
+            tokens_per_second = measure_tokens_per_second(model, train_dataset, collator, warmup_batches + batches,
+                                                          lengths, warmup=warmup)
+            print(f"   → {name}: {len(batches)} steps, {tokens_per_second:.0f} real tokens/s")
+
+# === Example run (opus)
+# python3 -m coptic_nmt.batching --data_path train_clean_data.csv --model_path <opus model> --input_prefix ">>fra<< " --max_tokens 2048 --benchmark_steps 50
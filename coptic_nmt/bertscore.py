@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+
+def sentence_key(sentence):
+    return hashlib.sha1(sentence.encode("utf-8")).hexdigest()
+
+
+# === On-disk token embeddings of one BERTScore model, memory-mapped
+# Each flush() writes the pending sentences to a new chunk: vectors-NNNNN.npy holds their normalized
+# token embeddings one after the other, weights-NNNNN.npy their matching weights (0 for [CLS] / [SEP])
+# and index-NNNNN.json the (offset, length) of each sentence. Earlier chunks are never rewritten, so
+# flushing after every evaluation chunk costs only the new rows. The index file is written last: a
+# chunk without one (interrupted flush) is ignored and overwritten.
+class EmbeddingStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pending = {}
+        self.index, self.chunks = {}, []
+        for index_path in sorted(self.directory.glob("index-*.json")):
+            chunk = index_path.stem.split("-")[1]
+            self.chunks.append((np.load(self.directory / f"vectors-{chunk}.npy", mmap_mode="r"),
+                                np.load(self.directory / f"weights-{chunk}.npy", mmap_mode="r")))
+            for key, (offset, length) in json.loads(index_path.read_text(encoding="utf-8")).items():
+                self.index[key] = (len(self.chunks) - 1, offset, length)
+
+    def __contains__(self, sentence):
+        key = sentence_key(sentence)
+        return key in self.index or key in self.pending
+
+    def __len__(self):
+        return len(self.index) + len(self.pending)
+
+    def get(self, sentence):
+        key = sentence_key(sentence)
+        if key in self.pending:
+            return self.pending[key]
+        chunk, offset, length = self.index[key]
+        vectors, weights = self.chunks[chunk]
+        return vectors[offset:offset + length], weights[offset:offset + length]
+
+    def add(self, sentence, vectors, weights):
+        self.pending[sentence_key(sentence)] = (vectors, weights)
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk = f"{len(self.chunks):05d}"
+        rows = sum(len(weights) for _, weights in self.pending.values())
+        dim = next(iter(self.pending.values()))[0].shape[1]
+        vectors_path, weights_path = self.directory / f"vectors-{chunk}.npy", self.directory / f"weights-{chunk}.npy"
+        vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(rows, dim))
+        weights = np.lib.format.open_memmap(weights_path, mode="w+", dtype=np.float32, shape=(rows,))
+        chunk_index, offset = {}, 0
+        for key, (sentence_vectors, sentence_weights) in self.pending.items():
+            vectors[offset:offset + len(sentence_weights)] = sentence_vectors
+            weights[offset:offset + len(sentence_weights)] = sentence_weights
+            chunk_index[key] = (offset, len(sentence_weights))
+            offset += len(sentence_weights)
+        vectors.flush()
+        weights.flush()
+        del vectors, weights
+        tmp_index = self.directory / f"index-{chunk}.tmp"
+        tmp_index.write_text(json.dumps(chunk_index), encoding="utf-8")
+        os.replace(tmp_index, self.directory / f"index-{chunk}.json")
+        self.chunks.append((np.load(vectors_path, mmap_mode="r"), np.load(weights_path, mmap_mode="r")))
+        for key, (offset, length) in chunk_index.items():
+            self.index[key] = (len(self.chunks) - 1, offset, length)
+        self.pending = {}
+
+
+# === BERTScore from embeddings computed once per unique sentence
+# bert_score embeds both sides of every pair on each compute() call, so the same references (and
+# candidates) were re-embedded for each generated column x reference. Here each unique sentence is
+# embedded once (length-sorted batches, same model / layer / tokenizer as bert_score), kept in memory
+# or in an EmbeddingStore (cache_dir), and any candidate / reference pairing is scored from the stored
+# tensors with bert_score's greedy matching (no idf, no baseline rescaling: the evaluate defaults).
+class BertScoreEmbeddings:
+    def __init__(self, lang="fr", model_type=None, num_layers=None, batch_size=64, device=None, cache_dir=None):
+        self.lang = lang
+        self.model_type = model_type
+        self.num_layers = num_layers
+        self.batch_size = batch_size
+        self.device = device
+        self.cache_dir = cache_dir
+        self.model = self.tokenizer = self.store = None
+        self.stats = {"embedded": 0, "reused": 0}
+
+    def resolve(self):
+        from bert_score.utils import lang2model, model2layers
+
+        self.model_type = self.model_type or lang2model[self.lang.lower()]
+        self.num_layers = self.num_layers or model2layers[self.model_type]
+        return self.model_type, self.num_layers
+
+    def load(self):
+        import torch
+        from bert_score.utils import get_model, get_tokenizer
+
+        self.resolve()
+        self.device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = get_tokenizer(self.model_type, use_fast=False)
+        self.model = get_model(self.model_type, self.num_layers).to(self.device)
+        # In memory only, or memory-mapped files per model / layer under cache_dir
+        directory = f"{self.model_type.replace('/', '--')}-L{self.num_layers}"
+        self.store = EmbeddingStore(Path(self.cache_dir) / directory) if self.cache_dir else MemoryStore()
+
+    def embed(self, sentences):
+        import torch
+        from bert_score.utils import get_bert_embedding, sent_encode
+
+        unique = list(dict.fromkeys(sentences))
+        new = [s for s in unique if s not in self.store]
+        self.stats["reused"] += len(unique) - len(new)
+        self.stats["embedded"] += len(new)
+        if not new:
+            return
+
+        # bert_score without idf: weight 1 for every token except [CLS] / [SEP]
+        idf_dict = defaultdict(lambda: 1.0)
+        idf_dict[self.tokenizer.sep_token_id] = 0
+        idf_dict[self.tokenizer.cls_token_id] = 0
+        # Longest first, as bert_score does, so each batch is padded to similar lengths
+        new.sort(key=lambda s: len(sent_encode(self.tokenizer, s)), reverse=True)
+        for start in range(0, len(new), self.batch_size):
+            batch = new[start:start + self.batch_size]
+            embeddings, masks, weights = get_bert_embedding(batch, self.model, self.tokenizer, idf_dict,
+                                                             device=self.device)
+            embeddings = embeddings / torch.norm(embeddings, dim=-1).unsqueeze(-1)
+            for sentence, embedding, mask, weight in zip(batch, embeddings, masks, weights):
+                length = int(mask.sum())
+                self.store.add(sentence, embedding[:length].float().cpu().numpy(),
+                               weight[:length].float().cpu().numpy())
+        self.store.flush()
+
+    # === Greedy cosine matching of (candidate, reference) pairs, batched on padded tensors
+    # Mirrors bert_score.utils.greedy_cos_idf: P / R are weighted means of the best match of each token,
+    # sentences reduced to [CLS] [SEP] score 0 and a NaN F1 becomes 0.
+    def pair_scores(self, candidates, references, batch_size=256):
+        import torch
+
+        self.embed(list(candidates) + list(references))
+        P, R, F = (np.zeros(len(candidates), dtype=np.float32) for _ in range(3))
+        # Pairs of similar lengths share a batch, less padding in the bmm
+        order = sorted(range(len(candidates)),
+                       key=lambda i: (len(self.store.get(candidates[i])[1]), len(self.store.get(references[i])[1])))
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            hyp, hyp_mask, hyp_weight = self._padded([candidates[i] for i in rows])
+            ref, ref_mask, ref_weight = self._padded([references[i] for i in rows])
+            with torch.no_grad():
+                sim = torch.bmm(hyp, ref.transpose(1, 2)) * torch.bmm(hyp_mask.unsqueeze(2), ref_mask.unsqueeze(1))
+                precision = (sim.max(dim=2)[0] * hyp_weight / hyp_weight.sum(dim=1, keepdim=True)).sum(dim=1)
+                recall = (sim.max(dim=1)[0] * ref_weight / ref_weight.sum(dim=1, keepdim=True)).sum(dim=1)
+                empty = hyp_mask.sum(dim=1).eq(2) | ref_mask.sum(dim=1).eq(2)
+                precision = precision.masked_fill(empty, 0.0)
+                recall = recall.masked_fill(empty, 0.0)
+                f1 = 2 * precision * recall / (precision + recall)
+                f1 = f1.masked_fill(torch.isnan(f1), 0.0)
+            P[rows], R[rows], F[rows] = precision.cpu().numpy(), recall.cpu().numpy(), f1.cpu().numpy()
+        return P, R, F
+
+    def _padded(self, sentences):
+        import torch
+
+        stored = [self.store.get(s) for s in sentences]
+        max_len = max(len(weights) for _, weights in stored)
+        dim = stored[0][0].shape[1]
+        vectors = np.zeros((len(stored), max_len, dim), dtype=np.float32)
+        weights = np.zeros((len(stored), max_len), dtype=np.float32)
+        mask = np.zeros((len(stored), max_len), dtype=np.float32)
+        for i, (sentence_vectors, sentence_weights) in enumerate(stored):
+            vectors[i, :len(sentence_weights)] = sentence_vectors
+            weights[i, :len(sentence_weights)] = sentence_weights
+            mask[i, :len(sentence_weights)] = 1.0
+        return (torch.from_numpy(vectors).to(self.device), torch.from_numpy(mask).to(self.device),
+                torch.from_numpy(weights).to(self.device))
+
+
+# === Same interface as EmbeddingStore, without files
+class MemoryStore(dict):
+    def get(self, sentence):
+        return self[sentence]
+
+    def add(self, sentence, vectors, weights):
+        self[sentence] = (vectors, weights)
+
+    def flush(self):
+        pass
+
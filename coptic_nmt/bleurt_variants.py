@@ -0,0 +1,101 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from coptic_nmt.metrics import BLEURT_VARIANTS, BleurtMetric
+from coptic_nmt.score_cache import DEFAULT_CACHE_PATH, ScoreCache
+
+
+# === Full vs distilled BLEURT on our data
+# The same sample of (candidate, reference) pairs is scored with BLEURT-20 and a distilled variant.
+# Segment-level correlations say how far the distilled scores can stand in for the full ones;
+# the system-level Kendall tau (mean score of each generated column) says whether the two rank our
+# models the same way, which is what matters when iterating. Throughput is measured on the pairs
+# actually scored (pairs found in the score cache are not timed).
+def compare_variants(tasks, checkpoint, variant, batch_size=64, cache=None):
+    scores, rows = {}, []
+    for name in ["full", variant]:
+        metric = BleurtMetric(batch_size, checkpoint, name)
+        metric.cache = cache
+        metric.load()
+        start = time.perf_counter()
+        scores[name] = np.concatenate([np.asarray(s, dtype=float) for s in metric.score_tasks(tasks)])
+        stats = metric.dedup_stats
+        rows.append({
+            "variant": name,
+            "checkpoint": metric.checkpoint,
+            "pairs": stats["pairs"],
+            "scored_pairs": stats["scored_pairs"],
+            "seconds": time.perf_counter() - start,
+            "pairs_per_second": stats["scored_pairs"] / stats["seconds"] if stats["scored_pairs"] else float("nan"),
+        })
+
+    full, distilled = pd.Series(scores["full"]), pd.Series(scores[variant])
+    systems = pd.DataFrame({
+        "system": [f"{task['label']}:{task['column']}" for task in tasks for _ in task["candidates"]],
+        "full": full, "distilled": distilled,
+    }).groupby("system").mean()
+    correlations = {
+        "pearson": full.corr(distilled),
+        "spearman": full.rank().corr(distilled.rank()),
+        "system_kendall": kendall_tau(systems["full"].to_numpy(), systems["distilled"].to_numpy()),
+        "mean_absolute_difference": (full - distilled).abs().mean(),
+    }
+    return rows, correlations, systems
+
+
+# === Kendall tau-b over all pairs of systems (a handful of columns, no scipy needed)
+def kendall_tau(x, y):
+    i, j = np.triu_indices(len(x), k=1)
+    sx, sy = np.sign(x[i] - x[j]), np.sign(y[i] - y[j])
+    denominator = np.sqrt((sx ** 2).sum() * (sy ** 2).sum())
+    return float((sx * sy).sum() / denominator) if denominator else float("nan")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Correlation and speed of a distilled BLEURT-20 against the full one.")
+    parser.add_argument("files", nargs="+", help="CSV files of generated translations")
+    parser.add_argument("--columns", nargs="+", default=None,
+                        help="Generated translation columns (default: every generated_translation* column)")
+    parser.add_argument("--references", nargs="+", default=["french_crampon", "french_segond", "french_darby"],
+                        help="Reference columns")
+    parser.add_argument("--bleurt_checkpoint", default="BLEURT-20", help="BLEURT-20 checkpoint directory")
+    parser.add_argument("--variant", choices=sorted(set(BLEURT_VARIANTS) - {"full"}), default="d6",
+                        help="Distilled checkpoint compared with BLEURT-20")
+    parser.add_argument("--sample", type=int, default=500, help="Rows sampled per file (0: all rows)")
+    parser.add_argument("--batch_size", type=int, default=64, help="Batch size of BLEURT")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the row sample")
+    parser.add_argument("--cache_path", default=str(DEFAULT_CACHE_PATH), help="Persistent per-pair score cache")
+    parser.add_argument("--no_cache", action="store_true", help="Score (and time) every pair")
+    parser.add_argument("--output", default="bleurt_variant_report.csv", help="CSV report")
+    args = parser.parse_args()
+
+    tasks = []
+    for path in args.files:
+        df = pd.read_csv(path)
+        if args.sample and len(df) > args.sample:
+            df = df.sample(n=args.sample, random_state=args.seed)
+        columns = args.columns or [c for c in df.columns if c.startswith("generated_translation")]
+        for column in columns:
+            for reference in args.references:
+                tasks.append({"label": Path(path).stem, "column": column, "reference": reference,
+                              "candidates": df[column].fillna("").astype(str).tolist(),
+                              "references": df[reference].fillna("").astype(str).tolist()})
+
+    cache = None if args.no_cache else ScoreCache(args.cache_path)
+    rows, correlations, systems = compare_variants(tasks, args.bleurt_checkpoint, args.variant, args.batch_size, cache)
+    report = pd.DataFrame(rows)
+    for name, value in correlations.items():
+        report[name] = value
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"\n📈 {args.variant} vs full — Pearson {correlations['pearson']:.3f} | Spearman {correlations['spearman']:.3f}"
+          f" | system ranking Kendall {correlations['system_kendall']:.3f}")
+    print(systems.sort_values("full", ascending=False).round(4).to_string())
+    report.to_csv(args.output, index=False)
+    print(f"💾 File saved: {Path(args.output).resolve()}")
+
+# === Example: BLEURT-20-D6 against BLEURT-20 on 500 verses of each experiment 4 file
+# python3 -m coptic_nmt.bleurt_variants "experiment 4/generated translations/"*_all_models_generated_translations.csv --bleurt_checkpoint BLEURT-20 --variant d6 --no_cache
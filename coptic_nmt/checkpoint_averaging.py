@@ -0,0 +1,133 @@
+import argparse
+import re
+import shutil
+from pathlib import Path
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import save_file
+
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+
+def list_checkpoints(finetune_dir):
+    checkpoints = [p for p in Path(finetune_dir).glob("checkpoint-*") if re.fullmatch(r"checkpoint-\d+", p.name)]
+    return sorted(checkpoints, key=lambda p: int(p.name.split("-")[1]))
+
+
+# === Lazy tensor access: safetensors handles, or memory-mapped torch files
+class LazyWeights:
+    def __init__(self, checkpoint_dir):
+        safetensors_path = Path(checkpoint_dir) / "model.safetensors"
+        if safetensors_path.exists():
+            self.handle = safe_open(str(safetensors_path), framework="pt")
+            self.names = list(self.handle.keys())
+            self.get = self.handle.get_tensor
+        else:
+            state = torch.load(Path(checkpoint_dir) / "pytorch_model.bin", map_location="cpu", mmap=True,
+                               weights_only=True)
+            self.names = list(state)
+            self.get = state.__getitem__
+
+
+# === Streaming average: one tensor of each checkpoint is materialized at a time
+def average_checkpoints(checkpoint_dirs, output_dir):
+    weights = [LazyWeights(c) for c in checkpoint_dirs]
+    averaged = {}
+    for name in weights[0].names:
+        first = weights[0].get(name)
+        # A copy: .float() of a float32 tensor is the tensor itself (memory-mapped for pytorch_model.bin)
+        total = first.to(torch.float32, copy=True)
+        for w in weights[1:]:
+            total += w.get(name).float()
+        averaged[name] = (total / len(weights)).to(first.dtype).contiguous()
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    save_file(averaged, str(output_dir / "model.safetensors"), metadata={"format": "pt"})
+    copy_model_files(checkpoint_dirs[-1], output_dir)
+    return output_dir
+
+
+# === Config, generation config and tokenizer files (everything but weights and trainer state)
+def copy_model_files(source_dir, output_dir):
+    skipped = set(WEIGHT_FILES) | {"optimizer.pt", "scheduler.pt", "rng_state.pth", "trainer_state.json",
+                                   "training_args.bin"}
+    for path in Path(source_dir).iterdir():
+        if path.is_file() and path.name not in skipped:
+            shutil.copy2(path, Path(output_dir) / path.name)
+
+
+def score_checkpoint(model_dir, sources, references, input_prefix, batch_size):
+    import sacrebleu
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    from coptic_nmt.generation import translate
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_dir)
+    translations = translate(model, tokenizer, sources, input_prefix, batch_size=batch_size)
+    return sacrebleu.corpus_chrf(translations, references).score, model, tokenizer
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Average the last checkpoints of a fine-tune and keep the best model.")
+    parser.add_argument("--finetune_dir", required=True, help="Trainer output directory (with checkpoint-* folders)")
+    parser.add_argument("--output_dir", required=True, help="Where the selected model is written (safetensors)")
+    parser.add_argument("--last_n", type=int, default=3, help="Number of last checkpoints to average")
+    parser.add_argument("--heldout_dataset", default=None,
+                        help="Cached split of the fine-tune (tokenized_cache/<key>), its test split is decoded")
+    parser.add_argument("--eval_csv", default=None,
+                        help="Alternative held-out CSV (coptic_text_romanized + reference columns)")
+    parser.add_argument("--references", nargs="+", default=["french_crampon", "french_segond", "french_darby"],
+                        help="Reference columns of --eval_csv (multi-reference chrF)")
+    parser.add_argument("--n_samples", type=int, default=300, help="Held-out verses decoded per candidate")
+    parser.add_argument("--input_prefix", default=">>fra<< ", help="Input prefix of the model")
+    parser.add_argument("--batch_size", type=int, default=32, help="Decoding batch size")
+    args = parser.parse_args()
+
+    checkpoints = list_checkpoints(args.finetune_dir)[-args.last_n:]
+    if not checkpoints:
+        raise ValueError(f"No checkpoint-* folder found in {args.finetune_dir}")
+    print(f"📂 Checkpoints: {', '.join(c.name for c in checkpoints)}")
+
+    if args.heldout_dataset:
+        from datasets import load_from_disk
+
+        df = load_from_disk(args.heldout_dataset)["test"].to_pandas()
+        args.references = ["french_translation"]
+    elif args.eval_csv:
+        df = pd.read_csv(args.eval_csv)
+    else:
+        parser.error("--heldout_dataset or --eval_csv is required.")
+    df = df.sample(n=min(args.n_samples, len(df)), random_state=42) if args.n_samples else df
+    sources = df["coptic_text_romanized"].fillna("").tolist()
+    references = [df[col].fillna("").tolist() for col in args.references]
+
+    candidates = {c.name: c for c in checkpoints}
+    if len(checkpoints) > 1:
+        averaged_dir = Path(args.finetune_dir) / f"averaged-last-{len(checkpoints)}"
+        print(f"🧮 Averaging {len(checkpoints)} checkpoints → {averaged_dir}")
+        candidates[averaged_dir.name] = average_checkpoints(checkpoints, averaged_dir)
+
+    scores = {}
+    best = None
+    for name, model_dir in candidates.items():
+        chrf, model, tokenizer = score_checkpoint(model_dir, sources, references, args.input_prefix, args.batch_size)
+        scores[name] = chrf
+        print(f"🎯 {name}: chrF {chrf:.2f}")
+        if best is None or chrf > scores[best[0]]:
+            best = (name, model, tokenizer)
+
+    name, model, tokenizer = best
+    output_dir = Path(args.output_dir)
+    model.save_pretrained(output_dir, safe_serialization=True)
+    tokenizer.save_pretrained(output_dir)
+    pd.DataFrame({"candidate": list(scores), "chrf": list(scores.values())}).to_csv(
+        output_dir / "checkpoint_selection.csv", index=False)
+    print(f"🏆 Best: {name} (chrF {scores[name]:.2f}) — saved to {output_dir}")
+
+# === Example: select among the last 3 epochs of the experiment 4 clean model
+# python3 -m coptic_nmt.checkpoint_averaging --finetune_dir "experiment 4/finetune/opus-finetuned-coptic-fr-clean-data" --output_dir models/opus-finetuned-coptic-fr-clean-data --heldout_dataset "experiment 4/finetune/tokenized_cache/<key>"
@@ -0,0 +1,73 @@
+import json
+import os
+
+import pandas as pd
+import sacrebleu
+
+from coptic_nmt.generation import translate
+
+
+def add_continue_training_arguments(parser):
+    parser.add_argument("--init_checkpoint", type=str, default=None,
+                        help="Continue from this fine-tuned model instead of the base model")
+    parser.add_argument("--new_data_path", type=str, default=None,
+                        help="CSV of the newly added verses (e.g. a book from extract_coptic_corpus.py --only_single_book)")
+    parser.add_argument("--replay_ratio", type=float, default=1.0,
+                        help="Old training verses replayed per new verse (sampled from --data_path)")
+    parser.add_argument("--full_retrain_epochs", type=int, default=15,
+                        help="Epochs of a from-scratch retrain on old + new data, the compute reference")
+    parser.add_argument("--regression_eval_csv", type=str, default=None,
+                        help="Evaluation CSV scored before and after continued training (per book chrF)")
+    parser.add_argument("--regression_references", nargs="+", default=["french_crampon", "french_segond", "french_darby"],
+                        help="Reference columns of --regression_eval_csv")
+    parser.add_argument("--regression_samples", type=int, default=None,
+                        help="Verses of --regression_eval_csv to decode (all by default)")
+
+
+# === New verses + a sampled replay buffer of the old training data
+# Old rows whose verse_id reappears in the new data are left out of the buffer,
+# so a revised verse is only learned in its new form.
+def replay_mixture(new_df, old_df, replay_ratio=1.0, seed=42):
+    if "verse_id" in new_df.columns and "verse_id" in old_df.columns:
+        old_df = old_df[~old_df["verse_id"].isin(set(new_df["verse_id"]))]
+    n_replay = min(len(old_df), int(round(replay_ratio * len(new_df))))
+    replay = old_df.sample(n=n_replay, random_state=seed)
+    mixture = pd.concat([new_df, replay], ignore_index=True).sample(frac=1, random_state=seed)
+    print(f"🔁 Continued training mixture: {len(new_df)} new verses + {n_replay} replayed "
+          f"(out of {len(old_df)} old verses)")
+    return mixture.reset_index(drop=True)
+
+
+# === chrF per evaluation book (book = verse_id without its "chapter.verse" part) and overall
+def book_chrf(model, tokenizer, eval_df, references, input_prefix="", batch_size=32):
+    translations = translate(model, tokenizer, eval_df["coptic_text_romanized"].fillna("").tolist(), input_prefix,
+                             batch_size=batch_size)
+    scored = eval_df.assign(translation=translations, book=eval_df["verse_id"].str.rsplit(" ", n=1).str[0])
+    scores = {}
+    for book, rows in [("all", scored)] + list(scored.groupby("book")):
+        refs = [rows[col].fillna("").tolist() for col in references]
+        scores[book] = sacrebleu.corpus_chrf(rows["translation"].tolist(), refs).score
+    return scores
+
+
+# === Before/after chrF on the existing evaluation books + compute against a full retrain
+def write_continual_report(output_dir, before, after, trained_examples, full_retrain_examples, train_seconds):
+    report = {
+        "trained_examples": trained_examples,
+        "full_retrain_examples": full_retrain_examples,
+        "compute_saved": 1 - trained_examples / full_retrain_examples,
+        "train_seconds": train_seconds,
+        "chrf_before": before,
+        "chrf_after": after,
+        "chrf_delta": {book: after[book] - before[book] for book in before},
+    }
+    with open(os.path.join(output_dir, "continual_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n💰 Continued training: {trained_examples:,} examples seen vs {full_retrain_examples:,} for a full "
+          f"retrain ({report['compute_saved']:.1%} saved, {train_seconds / 60:.1f} min)")
+    for book, delta in report["chrf_delta"].items():
+        flag = "⚠️" if delta < -0.5 else "✅"
+        print(f"{flag} {book}: chrF {before[book]:.2f} → {after[book]:.2f} ({delta:+.2f})")
+    return report
+
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+from datasets import Dataset, load_from_disk
+from datasets.fingerprint import Hasher
+
+CACHE_FORMAT_VERSION = 1
+
+
+# === Preprocessing shared by every finetune script
+def make_preprocess_function(tokenizer, input_prefix="", max_length=128,
+                             source_column="coptic_text_romanized", target_column="french_translation"):
+    def preprocess_function(examples):
+        inputs = [input_prefix + text for text in examples[source_column]]
+        targets = examples[target_column]
+
+        model_inputs = tokenizer(inputs, max_length=max_length, truncation=True)
+        labels = tokenizer(text_target=targets, max_length=max_length, truncation=True)
+
+        model_inputs["labels"] = labels["input_ids"]
+        return model_inputs
+
+    return preprocess_function
+
+
+# === Cache key components
+def dataframe_hash(df):
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def tokenizer_fingerprint(tokenizer):
+    # Hashes the whole tokenizer state (vocabulary, special tokens, tgt_lang, ...)
+    return Hasher.hash(tokenizer)
+
+
+def cache_key(df, tokenizer, input_prefix, max_length, test_size, seed):
+    key = {
+        "format": CACHE_FORMAT_VERSION,
+        "data": dataframe_hash(df),
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "input_prefix": input_prefix,
+        "max_length": max_length,
+        "test_size": test_size,
+        "seed": seed,
+    }
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return digest, key
+
+
+# === Seeded split + tokenization, persisted as Arrow and reused across runs
+def load_tokenized_dataset(df, tokenizer, cache_dir="tokenized_cache", input_prefix="", max_length=128,
+                           test_size=0.1, seed=42):
+    digest, key = cache_key(df, tokenizer, input_prefix, max_length, test_size, seed)
+    cache_path = Path(cache_dir) / digest
+
+    if (cache_path / "dataset_dict.json").exists():
+        print(f"⚡ Tokenized dataset loaded from cache: {cache_path}")
+        return load_from_disk(str(cache_path))
+
+    print(f"🧮 No cached dataset for this configuration, tokenizing (cache key {digest})...")
+    dataset = Dataset.from_pandas(df, preserve_index=False).train_test_split(test_size=test_size, seed=seed)
+    tokenized_datasets = dataset.map(make_preprocess_function(tokenizer, input_prefix, max_length), batched=True)
+
+    # Write to a temporary folder first so an interrupted run never leaves a partial cache entry
+    tmp_path = cache_path.with_name(f"{digest}.tmp-{os.getpid()}")
+    tokenized_datasets.save_to_disk(str(tmp_path))
+    with open(tmp_path / "cache_key.json", "w", encoding="utf-8") as f:
+        json.dump(key, f, indent=2)
+    try:
+        os.replace(tmp_path, cache_path)
+        print(f"💾 Tokenized dataset cached in: {cache_path}")
+    except OSError:
+        # A concurrent run (e.g. another DDP rank) saved the same entry first: a folder cannot replace it
+        if not (cache_path / "dataset_dict.json").exists():
+            raise
+        shutil.rmtree(tmp_path)
+        print(f"⚡ Tokenized dataset cached meanwhile by another run: {cache_path}")
+
+    # Reload from disk so the returned dataset is memory-mapped, as on a cache hit
+    return load_from_disk(str(cache_path))
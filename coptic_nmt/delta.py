@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import torch
+from safetensors.torch import load_file, save_file
+
+DELTA_FILE = "delta.safetensors"
+MANIFEST_FILE = "delta_manifest.json"
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+
+# === Delta encoding of one tensor
+# int8: symmetric per-row quantization of (variant - base), one fp32 scale per row.
+# sparse: only the `density` fraction of largest |variant - base| entries, values kept in fp16.
+def encode_delta(name, base, variant, mode, density):
+    delta = variant.float() - base.float()
+    if not torch.any(delta):
+        return {}
+
+    if mode == "int8":
+        rows = delta.reshape(delta.shape[0], -1) if delta.dim() > 1 else delta.reshape(1, -1)
+        scale = rows.abs().amax(dim=1, keepdim=True).clamp(min=1e-12) / 127
+        quantized = torch.round(rows / scale).to(torch.int8)
+        return {f"{name}.q": quantized.contiguous(), f"{name}.scale": scale.contiguous()}
+
+    flat = delta.flatten()
+    k = max(1, int(flat.numel() * density))
+    indices = torch.topk(flat.abs(), k, sorted=False).indices
+    return {f"{name}.idx": indices.to(torch.int32).contiguous(), f"{name}.val": flat[indices].half().contiguous()}
+
+
+def decode_delta(name, base, tensors, mode):
+    if mode == "int8":
+        if f"{name}.q" not in tensors:
+            return None
+        rows = tensors[f"{name}.q"].float() * tensors[f"{name}.scale"]
+        return rows.reshape(base.shape)
+    if f"{name}.idx" not in tensors:
+        return None
+    delta = torch.zeros(base.numel(), dtype=torch.float32)
+    delta[tensors[f"{name}.idx"].long()] = tensors[f"{name}.val"].float()
+    return delta.reshape(base.shape)
+
+
+# === Compression of a fine-tuned sibling against the shared base
+def compress_variant(base_state, variant_dir, output_dir, mode="int8", density=0.1):
+    from transformers import AutoModelForSeq2SeqLM
+
+    variant_state = AutoModelForSeq2SeqLM.from_pretrained(variant_dir).state_dict()
+
+    tensors = {}
+    unchanged = 0
+    seen = set()
+    for name, variant_tensor in variant_state.items():
+        # Tied weights (shared embeddings / lm_head) are stored once
+        key = variant_tensor.data_ptr()
+        if key in seen:
+            continue
+        seen.add(key)
+        encoded = encode_delta(name, base_state[name], variant_tensor, mode, density)
+        if not encoded:
+            unchanged += 1
+        tensors.update(encoded)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    save_file(tensors, str(output_dir / DELTA_FILE))
+
+    # Config, tokenizer and generation files are small: copied as they are
+    for path in Path(variant_dir).iterdir():
+        if path.is_file() and path.name not in WEIGHT_FILES and not path.name.endswith(".bin"):
+            shutil.copy2(path, output_dir / path.name)
+
+    with open(output_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({"variant": str(variant_dir), "mode": mode, "density": density,
+                   "unchanged_tensors": unchanged}, f, indent=2)
+    return output_dir
+
+
+# === Reconstruction into an already loaded model
+# base_state must be a private copy of the base weights (see snapshot_state); the model
+# parameters are overwritten in place, so switching variants never reloads the base.
+def snapshot_state(model):
+    return {name: tensor.detach().clone() for name, tensor in model.state_dict().items()}
+
+
+def apply_delta(model, base_state, delta_dir):
+    with open(Path(delta_dir) / MANIFEST_FILE, encoding="utf-8") as f:
+        mode = json.load(f)["mode"]
+    tensors = load_file(str(Path(delta_dir) / DELTA_FILE))
+
+    seen = set()
+    with torch.no_grad():
+        for name, tensor in model.state_dict().items():
+            # Tied weights: only the first alias carries the delta (same order as in compress_variant)
+            if tensor.data_ptr() in seen:
+                continue
+            seen.add(tensor.data_ptr())
+            delta = decode_delta(name, base_state[name], tensors, mode)
+            if delta is None:
+                tensor.copy_(base_state[name])
+            else:
+                tensor.copy_((base_state[name].float() + delta).to(tensor.dtype))
+    return model
+
+
+def weights_size(directory):
+    return sum(os.path.getsize(Path(directory) / name) for name in WEIGHT_FILES + (DELTA_FILE,)
+               if (Path(directory) / name).exists())
+
+
+# === Report: storage, load time and output parity on the evaluation data
+def verify_variant(base_model, base_state, variant_dir, delta_dir, texts, input_prefix=">>fra<< ", batch_size=16):
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    from coptic_nmt.generation import translate
+
+    start = time.perf_counter()
+    full_model = AutoModelForSeq2SeqLM.from_pretrained(variant_dir)
+    full_load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    apply_delta(base_model, base_state, delta_dir)
+    delta_load_seconds = time.perf_counter() - start
+
+    max_weight_error = max(
+        (full - rebuilt).abs().max().item()
+        for full, rebuilt in zip(full_model.state_dict().values(), base_model.state_dict().values())
+    )
+
+    tokenizer = AutoTokenizer.from_pretrained(variant_dir)
+    full_translations = translate(full_model, tokenizer, texts, input_prefix, batch_size=batch_size)
+    delta_translations = translate(base_model, tokenizer, texts, input_prefix, batch_size=batch_size)
+    identical = sum(a == b for a, b in zip(full_translations, delta_translations))
+
+    return {
+        "variant": str(variant_dir),
+        "full_size_mb": weights_size(variant_dir) / 1e6,
+        "delta_size_mb": weights_size(delta_dir) / 1e6,
+        "full_load_seconds": full_load_seconds,
+        "delta_load_seconds": delta_load_seconds,
+        "max_weight_error": max_weight_error,
+        "identical_outputs": identical / len(texts),
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from transformers import AutoModelForSeq2SeqLM
+
+    parser = argparse.ArgumentParser(description="Store fine-tuned siblings as compressed deltas of their base.")
+    parser.add_argument("--base", required=True, help="Base checkpoint shared by all variants")
+    parser.add_argument("--variants", nargs="+", required=True, help="Fine-tuned checkpoints to compress")
+    parser.add_argument("--output_dir", default="models/deltas", help="One delta folder per variant is written here")
+    parser.add_argument("--mode", choices=["int8", "sparse"], default="int8", help="Delta encoding")
+    parser.add_argument("--density", type=float, default=0.1, help="Kept fraction of entries in sparse mode")
+    parser.add_argument("--eval_csv", default="evaluation data/evaluation_data.csv",
+                        help="Evaluation file used for the output parity check")
+    parser.add_argument("--n_samples", type=int, default=200, help="Verses translated for the parity check (0: skip)")
+    parser.add_argument("--input_prefix", default=">>fra<< ", help="Input prefix of the model")
+    args = parser.parse_args()
+
+    base_model = AutoModelForSeq2SeqLM.from_pretrained(args.base)
+    base_state = snapshot_state(base_model)
+    texts = []
+    if args.n_samples:
+        texts = pd.read_csv(args.eval_csv)["coptic_text_romanized"].fillna("").tolist()[:args.n_samples]
+
+    reports = []
+    for variant_dir in args.variants:
+        delta_dir = Path(args.output_dir) / Path(variant_dir).name
+        print(f"\n🗜️ Compressing {variant_dir} → {delta_dir} ({args.mode})")
+        compress_variant(base_state, variant_dir, delta_dir, mode=args.mode, density=args.density)
+        if texts:
+            report = verify_variant(base_model, base_state, variant_dir, delta_dir, texts, args.input_prefix)
+            reports.append(report)
+            print(f"📦 {report['full_size_mb']:.0f} MB → {report['delta_size_mb']:.0f} MB | "
+                  f"load {report['full_load_seconds']:.2f}s → {report['delta_load_seconds']:.2f}s | "
+                  f"max weight error {report['max_weight_error']:.2e} | "
+                  f"identical outputs {report['identical_outputs']:.1%}")
+
+    if reports:
+        report_path = Path(args.output_dir) / "delta_report.csv"
+        pd.DataFrame(reports).to_csv(report_path, index=False)
+        full_total = sum(r["full_size_mb"] for r in reports)
+        delta_total = sum(r["delta_size_mb"] for r in reports) + weights_size(args.base) / 1e6
+        print(f"\n💾 Storage: {full_total:.0f} MB of full checkpoints vs {delta_total:.0f} MB "
+              f"(base + deltas) — report saved to {report_path}")
+
+# === Example: experiment 3 and 4 opus siblings
+# python3 -m coptic_nmt.delta --base models/opus-mt-tc-bible-big-mul-mul --variants models/opus-finetuned-coptic-fr-clean-data models/opus-finetuned-coptic-fr-noisy-10-data
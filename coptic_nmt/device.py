@@ -0,0 +1,128 @@
+import argparse
+import os
+import time
+
+import torch
+
+# === Models above this size get activation checkpointing in the CPU profile (opus big, t5-base)
+BIG_MODEL_PARAMETERS = 200_000_000
+
+
+def add_device_arguments(parser):
+    parser.add_argument("--device_profile", "--device-profile", choices=["default", "cpu"], default="default",
+                        help="cpu: bf16 autocast when supported, torch.compile, thread settings and "
+                             "activation checkpointing for big models")
+    parser.add_argument("--num_threads", type=int, default=None,
+                        help="Intra-op threads for the cpu profile (default: all cores)")
+    parser.add_argument("--num_interop_threads", type=int, default=1,
+                        help="Inter-op threads for the cpu profile")
+
+
+# === Native bf16 matmuls (AVX512-BF16 / AMX); elsewhere bf16 autocast is emulated and slower than fp32
+def cpu_supports_bf16():
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+# === Must run before the model is loaded (inter-op threads cannot change once used)
+def configure_cpu_threads(args):
+    if args.device_profile != "cpu":
+        return
+    num_threads = args.num_threads or os.cpu_count()
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(args.num_interop_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    print(f"🧵 CPU threads: {num_threads} intra-op, {args.num_interop_threads} inter-op")
+
+
+# === TrainingArguments overrides for the selected profile
+# fp16: the mixed-precision setting of the script, only honoured on GPU.
+def device_training_arguments(args, model, fp16=False):
+    if args.device_profile != "cpu":
+        return {"fp16": fp16 and torch.cuda.is_available()}
+
+    bf16 = cpu_supports_bf16()
+    big_model = model.num_parameters() > BIG_MODEL_PARAMETERS
+    print(f"🖥️ CPU profile: bf16 autocast {'on' if bf16 else 'off (no native bf16 support)'}, torch.compile on, "
+          f"activation checkpointing {'on' if big_model else 'off'}")
+    return {
+        "use_cpu": True,
+        "fp16": False,
+        "bf16": bf16,
+        "torch_compile": True,
+        "gradient_checkpointing": big_model,
+        "dataloader_pin_memory": False,
+    }
+
+
+# === Measured training throughput of the default and cpu settings
+def benchmark_training_step(model, batches, bf16=False, steps=20, warmup=3):
+    optimizer = torch.optim.AdamW(model.parameters(), lr=5e-5)
+    model.train()
+    real_tokens = 0
+    start = None
+    for step, inputs in enumerate(batches[:warmup + steps]):
+        if step == warmup:
+            start = time.perf_counter()
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=bf16):
+            loss = model(**inputs).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        if step >= warmup:
+            real_tokens += int(inputs["attention_mask"].sum()) + int((inputs["labels"] != -100).sum())
+    return real_tokens / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, DataCollatorForSeq2Seq
+
+    from coptic_nmt.data_cache import load_tokenized_dataset
+
+    parser = argparse.ArgumentParser(description="Tokens/sec of the default settings vs the cpu device profile.")
+    parser.add_argument("--data_path", required=True, help="Path to the training CSV file")
+    parser.add_argument("--model_path", required=True, help="Model to benchmark")
+    parser.add_argument("--input_prefix", default="", help='Input prefix (e.g. ">>fra<< ")')
+    parser.add_argument("--batch_size", type=int, default=32, help="Training batch size")
+    parser.add_argument("--steps", type=int, default=20, help="Timed training steps per setting")
+    parser.add_argument("--cache_dir", default="tokenized_cache", help="Folder of the tokenized dataset cache")
+    add_device_arguments(parser)
+    args = parser.parse_args()
+    args.device_profile = "cpu"
+    configure_cpu_threads(args)
+
+    df = pd.read_csv(args.data_path)
+    df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    train_dataset = load_tokenized_dataset(df, tokenizer, cache_dir=args.cache_dir,
+                                           input_prefix=args.input_prefix)["train"]
+    train_dataset = train_dataset.select_columns(["input_ids", "attention_mask", "labels"])
+    collator = DataCollatorForSeq2Seq(tokenizer)
+    needed = (args.steps + 3) * args.batch_size
+    batches = [collator([train_dataset[j] for j in range(i, min(i + args.batch_size, len(train_dataset)))])
+               for i in range(0, min(needed, len(train_dataset)), args.batch_size)]
+
+    results = {}
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model_path)
+    results["default (fp32, eager)"] = benchmark_training_step(model, batches, steps=args.steps)
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model_path)
+    overrides = device_training_arguments(args, model)
+    if overrides["gradient_checkpointing"]:
+        model.gradient_checkpointing_enable()
+    model = torch.compile(model)
+    results["cpu profile"] = benchmark_training_step(model, batches, bf16=overrides["bf16"], steps=args.steps)
+
+    print(f"\n⏱️ Training throughput over {args.steps} steps of {args.batch_size} examples:")
+    for name, tokens_per_second in results.items():
+        print(f"   → {name}: {tokens_per_second:.0f} tokens/s")
+    baseline = results["default (fp32, eager)"]
+    print(f"🚀 Speed-up of the cpu profile: {results['cpu profile'] / baseline:.2f}x")
+
+# === Example run (opus)
+# python3 -m coptic_nmt.device --data_path train_clean_data.csv --model_path <opus model> --input_prefix ">>fra<< "
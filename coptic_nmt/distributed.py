@@ -0,0 +1,133 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# === Environment set by torch.distributed.run for every training process
+WORLD_SIZE = int(os.environ.get("WORLD_SIZE", 1))
+LOCAL_WORLD_SIZE = int(os.environ.get("LOCAL_WORLD_SIZE", 1))
+RANK = int(os.environ.get("RANK", 0))
+
+
+def add_distributed_arguments(parser):
+    parser.add_argument("--effective_batch_size", type=int, default=None,
+                        help="Examples per optimizer step across all processes; gradient accumulation is derived "
+                             "from it so the effective batch does not change with the number of processes")
+
+
+# === Before configure_cpu_threads: per-process threads and gradient accumulation of a DDP run
+# The effective batch must be a multiple of processes x batch size: rounding the accumulation steps
+# would silently train with another effective batch (and another learning-rate regime).
+def configure_distributed(args, parser=None):
+    if WORLD_SIZE > 1 and args.device_profile == "cpu" and args.num_threads is None:
+        # Processes of a node share its cores instead of each starting os.cpu_count() threads
+        args.num_threads = max(1, os.cpu_count() // LOCAL_WORLD_SIZE)
+    if args.effective_batch_size:
+        per_step = args.batch_size * WORLD_SIZE
+        if args.effective_batch_size % per_step:
+            message = (f"--effective_batch_size {args.effective_batch_size} is not a multiple of {WORLD_SIZE} "
+                       f"process(es) x --batch_size {args.batch_size} = {per_step}.")
+            if parser is None:
+                raise ValueError(message)
+            parser.error(message)
+        args.gradient_accumulation_steps = args.effective_batch_size // per_step
+        if RANK == 0:
+            print(f"🧮 Effective batch {args.effective_batch_size}: {WORLD_SIZE} process(es) x {args.batch_size} "
+                  f"x {args.gradient_accumulation_steps} accumulation steps")
+
+
+# === TrainingArguments overrides when launched with several processes (CPU nodes: gloo backend)
+def distributed_training_arguments(args):
+    if WORLD_SIZE == 1:
+        return {}
+    import torch
+
+    backend = "nccl" if torch.cuda.is_available() and args.device_profile != "cpu" else "gloo"
+    if RANK == 0:
+        print(f"🌐 DistributedDataParallel: {WORLD_SIZE} processes, {backend} backend")
+    return {"ddp_backend": backend, "ddp_find_unused_parameters": False}
+
+
+# === Launcher: torch.distributed.run with the finetune script, one call per node
+def launch(command, nproc_per_node, nnodes=1, node_rank=0, master_addr="127.0.0.1", master_port=29500):
+    env = dict(os.environ)
+    # torch.distributed.run would default to 1 thread per process
+    env["OMP_NUM_THREADS"] = env["MKL_NUM_THREADS"] = str(max(1, os.cpu_count() // nproc_per_node))
+    launcher = [
+        sys.executable, "-m", "torch.distributed.run",
+        f"--nnodes={nnodes}", f"--nproc_per_node={nproc_per_node}", f"--node_rank={node_rank}",
+        f"--master_addr={master_addr}", f"--master_port={master_port}",
+    ]
+    return subprocess.call(launcher + command, env=env)
+
+
+# === Throughput of a run from its telemetry files (all ranks), warm-up steps excluded
+def run_throughput(run_dir, warmup_steps=5):
+    files = sorted(glob.glob(os.path.join(run_dir, "telemetry_rank*.jsonl"))) or \
+        [os.path.join(run_dir, "telemetry.jsonl")]
+    tokens, wall = 0, 0.0
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()][warmup_steps:]
+        tokens += sum(r["src_tokens"] + r["tgt_tokens"] for r in records)
+        # Ranks step in lockstep, the slowest one sets the pace
+        wall = max(wall, sum(r["wall_time"] for r in records))
+    return len(files), tokens / wall if wall else 0.0
+
+
+# === Scaling efficiency = throughput(N) / (N / N_base * throughput(N_base))
+def scaling_report(run_dirs, warmup_steps=5):
+    runs = sorted((run_throughput(d, warmup_steps) + (d,) for d in run_dirs), key=lambda r: r[0])
+    base_processes, base_throughput, _ = runs[0]
+    rows = []
+    for processes, throughput, run_dir in runs:
+        speedup = throughput / base_throughput if base_throughput else float("nan")
+        rows.append({
+            "run": run_dir,
+            "processes": processes,
+            "tokens_per_sec": throughput,
+            "speedup": speedup,
+            "scaling_efficiency": speedup / (processes / base_processes),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU DistributedDataParallel launcher and scaling report.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    launch_parser = subparsers.add_parser("launch", help="Run a finetune script on this node with torch.distributed.run")
+    launch_parser.add_argument("--nproc_per_node", type=int, default=2, help="Training processes on this node")
+    launch_parser.add_argument("--nnodes", type=int, default=1, help="Number of nodes")
+    launch_parser.add_argument("--node_rank", type=int, default=0, help="Rank of this node")
+    launch_parser.add_argument("--master_addr", default="127.0.0.1", help="Address of the node with rank 0")
+    launch_parser.add_argument("--master_port", type=int, default=29500, help="Rendezvous port on the master node")
+    launch_parser.add_argument("command", nargs=argparse.REMAINDER, help="Finetune script and its arguments")
+
+    report_parser = subparsers.add_parser("report", help="Scaling efficiency of runs with different process counts")
+    report_parser.add_argument("run_dirs", nargs="+", help="Output directories of the runs (with telemetry files)")
+    report_parser.add_argument("--warmup_steps", type=int, default=5, help="First steps of each rank left out")
+    report_parser.add_argument("--output", default="scaling_report.csv", help="CSV report")
+    args = parser.parse_args()
+
+    if args.mode == "launch":
+        command = args.command[1:] if args.command[:1] == ["--"] else args.command
+        sys.exit(launch(command, args.nproc_per_node, args.nnodes, args.node_rank, args.master_addr,
+                        args.master_port))
+
+    import pandas as pd
+
+    report = pd.DataFrame(scaling_report(args.run_dirs, args.warmup_steps))
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    report.to_csv(args.output, index=False)
+    print(f"💾 File saved: {Path(args.output).resolve()}")
+
+# === Example: 2 local processes (same effective batch as the single-process run), then the report
+# python3 -m coptic_nmt.distributed launch --nproc_per_node 2 -- "experiment 4/finetune/finetune_opus_coptic_fr.py" --data_path train_clean_data.csv --output_dir runs/ddp2 --device_profile cpu --batch_size 16 --effective_batch_size 32
+# python3 -m coptic_nmt.distributed report runs/ddp1 runs/ddp2 runs/ddp4
+
+# === Example: 2 nodes x 4 processes (run on each node with its --node_rank)
+# python3 -m coptic_nmt.distributed launch --nnodes 2 --node_rank 0 --nproc_per_node 4 --master_addr node01 -- "experiment 4/finetune/finetune_opus_coptic_fr.py" --data_path train_clean_data.csv --output_dir runs/ddp8 --device_profile cpu --effective_batch_size 32
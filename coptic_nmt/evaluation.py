@@ -0,0 +1,241 @@
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from coptic_nmt.metrics import BLEURT_VARIANTS, PROFILES, load_metrics
+from coptic_nmt.results_store import DEFAULT_RESULTS_PATH, ResultsStore, model_name
+from coptic_nmt.score_cache import DEFAULT_CACHE_PATH, ScoreCache
+
+
+# === Evaluation engine shared by the evaluate_* scripts
+# Metrics are loaded once (lazily, only the requested ones); all files, generated columns and
+# references of a run are gathered into tasks and each metric scores them in one batched pass,
+# over unique pairs only (clean/noisy files and models often produce the same output for a verse).
+# Output columns follow the scripts' naming: "{metric}_{reference}_{column}" by default.
+# Per-pair scores are kept in a persistent ScoreCache (cache_path=None disables it), so a rerun
+# with a new model column only scores the new pairs.
+# multi_reference=True adds a "multi" reference column per metric: the best score of each row over
+# the references, the lowest for TER (for BERTScore, bert_score's multi-reference F1).
+# Every sentence score is also written to the long-format ResultsStore (results_path=None disables it)
+# as (experiment, dataset = file label, model, reference, metric, verse_id, score); the experiment
+# defaults to the folder two levels above output_dir ("experiment 4/evaluation/evaluation scores").
+# evaluate_files closes the metrics when scoring ends (METEOR worker processes); after calling
+# score_frames directly, call close().
+class EvaluationEngine:
+    def __init__(self, metric_names, metric_options=None, cache_path=DEFAULT_CACHE_PATH, cache_max_entries=5_000_000,
+                 multi_reference=False, results_path=DEFAULT_RESULTS_PATH, experiment=None):
+        self.cache = ScoreCache(cache_path, cache_max_entries) if cache_path else None
+        self.results_store = ResultsStore(results_path) if results_path else None
+        self.experiment = experiment
+        self.multi_reference = multi_reference
+        self.metrics = load_metrics(metric_names, metric_options, self.cache)
+        self.report = []
+        self.corpus_report = []
+        self.results = []
+
+    def build_tasks(self, frames, generated_columns, references, source_column=None):
+        tasks = []
+        for label, df in frames.items():
+            for gen_col in generated_columns:
+                if gen_col not in df.columns:
+                    print(f"⚠️ [{label}] Missing generated column: {gen_col}, skipping.")
+                    continue
+                candidates = df[gen_col].fillna("").astype(str).tolist()
+                for ref_name, ref_col in references.items():
+                    if ref_col not in df.columns:
+                        print(f"⚠️ [{label}] Missing reference column: {ref_col}, skipping.")
+                        continue
+                    ref_texts = df[ref_col].fillna("").astype(str).tolist()
+                    # The original scripts give COMET the reference as source; a source column can be set instead
+                    sources = df[source_column].fillna("").astype(str).tolist() if source_column else ref_texts
+                    tasks.append({"label": label, "column": gen_col, "reference": ref_name,
+                                  "candidates": candidates, "references": ref_texts, "sources": sources})
+        return tasks
+
+    def score_frames(self, frames, generated_columns, references, column_template="{metric}_{reference}_{column}",
+                     source_column=None):
+        tasks = self.build_tasks(frames, generated_columns, references, source_column)
+        n_pairs = sum(len(task["candidates"]) for task in tasks)
+        print(f"🧮 {len(tasks)} (file, column, reference) tasks, {n_pairs:,} pairs per metric")
+
+        for name, metric in self.metrics.items():
+            print(f"\n✅ Loading {name}...")
+            metric.load()
+            start = time.perf_counter()
+            results = metric.score_tasks(tasks)
+            elapsed = time.perf_counter() - start
+            print(f"⏱️ {name}: {n_pairs:,} pairs in {elapsed:.1f}s")
+            stats = metric.dedup_stats
+            if stats:
+                self.report.append({"metric": name, **stats})
+                print(f"🧬 {name}: {stats['unique_pairs']:,} unique pairs out of {stats['pairs']:,} "
+                      f"({1 - stats['unique_pairs'] / max(stats['pairs'], 1):.1%} duplicates), "
+                      f"{stats['cache_hits']:,} from the score cache, {stats['scored_pairs']:,} scored "
+                      f"(~{stats['seconds_saved']:.1f}s saved)")
+
+            self.record_scores(frames, tasks, name, metric, results, metric.corpus_scores, column_template)
+        return frames
+
+    # Score columns, means, corpus report rows, results store rows and "multi" columns of one metric
+    def record_scores(self, frames, tasks, name, metric, results, corpus_scores=None,
+                      column_template="{metric}_{reference}_{column}"):
+        # Metrics with a corpus-level formula (BLEU, chrF++, TER) report it next to the sentence mean
+        corpus_scores = corpus_scores or [None] * len(tasks)
+        pick = max if metric.higher_is_better else min
+        best = {}
+        for task, scores, corpus in zip(tasks, results, corpus_scores):
+            column = column_template.format(metric=name, reference=task["reference"], column=task["column"])
+            frames[task["label"]][column] = scores
+            mean = sum(scores) / len(scores)
+            print(f"📊 [{task['label']}] {task['column']} vs {task['reference']} — {name}: {mean:.4f}"
+                  + (f" (corpus {corpus:.2f})" if corpus is not None else ""))
+            self.corpus_report.append({"file": task["label"], "column": task["column"],
+                                       "reference": task["reference"], "metric": name, "sentence_mean": mean,
+                                       "corpus_score": corpus if corpus is not None else mean})
+            self.results.append((task["label"], task["column"], task["reference"], name, scores))
+            key = (task["label"], task["column"])
+            best[key] = [pick(pair) for pair in zip(best[key], scores)] if key in best else scores
+
+        if self.multi_reference:
+            for (label, gen_col), scores in best.items():
+                column = column_template.format(metric=name, reference="multi", column=gen_col)
+                frames[label][column] = scores
+                self.results.append((label, gen_col, "multi", name, scores))
+                print(f"📊 [{label}] {gen_col} vs best reference — {name}: {sum(scores) / len(scores):.4f}")
+
+    def close(self):
+        for metric in self.metrics.values():
+            metric.close()
+
+    def evaluate_files(self, input_files, generated_columns, references, output_dir, suffix="_other_scores",
+                       column_template="{metric}_{reference}_{column}", source_column=None):
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        input_files = {label: Path(path) for label, path in input_files.items()}
+        frames = {label: pd.read_csv(path) for label, path in input_files.items()}
+        print(f"📥 {len(frames)} file(s): {', '.join(frames)}")
+
+        try:
+            self.score_frames(frames, generated_columns, references, column_template, source_column)
+        finally:
+            self.close()
+
+        outputs = {}
+        for label, df in frames.items():
+            output_csv = output_dir / (input_files[label].stem + suffix + ".csv")
+            df.to_csv(output_csv, index=False)
+            outputs[label] = output_csv
+            print(f"💾 File saved: {output_csv}")
+
+        self.write_reports(frames, output_dir, suffix)
+        return outputs
+
+    # Results store, score cache statistics and the corpus / scoring report CSVs of the recorded scores
+    def write_reports(self, frames, output_dir, suffix="_other_scores"):
+        output_dir = Path(output_dir)
+        if self.results_store is not None:
+            experiment = self.experiment or output_dir.resolve().parent.parent.name
+            written = 0
+            for label, column, reference, metric, scores in self.results:
+                df = frames[label]
+                verse_ids = df["verse_id"] if "verse_id" in df.columns else df.index
+                written += self.results_store.write(experiment, label, model_name(column), reference, metric,
+                                                    verse_ids, scores)
+            print(f"🗄️ {written:,} scores of {experiment} written to {self.results_store.path}")
+
+        if self.cache is not None:
+            print(f"📦 Score cache {self.cache.path}: {self.cache.size():,} entries | hits {self.cache.stats['hits']:,}"
+                  f" | misses {self.cache.stats['misses']:,} | evicted {self.cache.stats['evicted']:,}")
+
+        # === One row per (file, column, reference, metric): mean of the sentence scores and corpus score
+        if self.corpus_report:
+            corpus_csv = output_dir / f"corpus_scores{suffix}.csv"
+            pd.DataFrame(self.corpus_report).to_csv(corpus_csv, index=False)
+            print(f"💾 File saved: {corpus_csv}")
+
+        # === Deduplication and cache use per metric (pairs, unique pairs, cache hits, scoring time, time saved)
+        if self.report:
+            report_csv = output_dir / f"scoring_report{suffix}.csv"
+            pd.DataFrame(self.report).to_csv(report_csv, index=False)
+            print(f"💾 File saved: {report_csv}")
+
+
+# === "french_crampon" → {"crampon": "french_crampon"} (the short name goes in the score column)
+def reference_names(columns, strip_prefix="french_"):
+    return {(col[len(strip_prefix):] if strip_prefix and col.startswith(strip_prefix) else col): col
+            for col in columns}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score generated translation files with the selected metrics.")
+    parser.add_argument("files", nargs="+", help="CSV files of generated translations")
+    parser.add_argument("--columns", nargs="+", default=None,
+                        help="Generated translation columns (default: every generated_translation* column)")
+    parser.add_argument("--references", nargs="+", default=["french_crampon", "french_segond", "french_darby"],
+                        help="Reference columns")
+    parser.add_argument("--keep_reference_prefix", action="store_true",
+                        help="Name score columns with the full reference column (meteor_french_segond_...)")
+    parser.add_argument("--metrics", nargs="+", default=None, help="Metrics to compute (overrides --profile)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default", help="Named set of metrics")
+    parser.add_argument("--source_column", default=None,
+                        help="COMET source column (default: the reference, as in the original scripts)")
+    parser.add_argument("--meteor_workers", type=int, default=None,
+                        help="Processes of sentence-level METEOR (default: all cores)")
+    parser.add_argument("--bertscore_lang", default="fr", help="Language of the BERTScore model")
+    parser.add_argument("--bertscore_embedding_cache", default=None,
+                        help="Folder of memory-mapped BERTScore embeddings reused across runs (default: in memory)")
+    parser.add_argument("--multi_reference", action="store_true",
+                        help="Also write the best score over the references (\"multi\" reference columns)")
+    parser.add_argument("--bleurt_checkpoint", default="BLEURT-20", help="BLEURT checkpoint directory")
+    parser.add_argument("--bleurt_variant", choices=sorted(BLEURT_VARIANTS), default="full",
+                        help="Distilled BLEURT-20 checkpoint, looked up next to --bleurt_checkpoint")
+    parser.add_argument("--bleurt_batch_size", type=int, default=64, help="Batch size of BLEURT")
+    parser.add_argument("--no_length_batching", action="store_true",
+                        help="Pad every BLEURT batch to the checkpoint length (original BleurtScorer)")
+    parser.add_argument("--batch_size", type=int, default=32, help="Batch size of BERTScore")
+    parser.add_argument("--comet_batch_size", type=int, default=8, help="Batch size of COMET")
+    parser.add_argument("--cache_path", default=str(DEFAULT_CACHE_PATH), help="Persistent per-pair score cache")
+    parser.add_argument("--no_cache", action="store_true", help="Score every pair without the persistent cache")
+    parser.add_argument("--cache_max_entries", type=int, default=5_000_000,
+                        help="Least recently used scores are evicted above this size")
+    parser.add_argument("--results_path", default=str(DEFAULT_RESULTS_PATH), help="Long-format results store")
+    parser.add_argument("--no_results_store", action="store_true", help="Only write the scored CSVs")
+    parser.add_argument("--experiment", default=None,
+                        help="Experiment name in the results store (default: folder two levels above --output_dir)")
+    parser.add_argument("--output_dir", default="evaluation scores", help="Folder of the scored CSVs")
+    parser.add_argument("--suffix", default="_other_scores", help="Suffix of the scored CSV names")
+    args = parser.parse_args()
+
+    files = {Path(f).stem: f for f in args.files}
+    columns = args.columns or sorted({c for f in args.files for c in pd.read_csv(f, nrows=0).columns
+                                      if c.startswith("generated_translation")})
+    options = {
+        "meteor": {"workers": args.meteor_workers},
+        "bertscore": {"batch_size": args.batch_size, "lang": args.bertscore_lang,
+                      "embedding_cache": args.bertscore_embedding_cache},
+        "comet": {"batch_size": args.comet_batch_size},
+        "bleurt": {"checkpoint": args.bleurt_checkpoint, "variant": args.bleurt_variant,
+                   "batch_size": args.bleurt_batch_size, "length_batching": not args.no_length_batching},
+    }
+    engine = EvaluationEngine(args.metrics or PROFILES[args.profile], options,
+                              cache_path=None if args.no_cache else args.cache_path,
+                              cache_max_entries=args.cache_max_entries, multi_reference=args.multi_reference,
+                              results_path=None if args.no_results_store else args.results_path,
+                              experiment=args.experiment)
+    references = reference_names(args.references, strip_prefix=None if args.keep_reference_prefix else "french_")
+    engine.evaluate_files(files, columns, references, args.output_dir, suffix=args.suffix,
+                          source_column=args.source_column)
+
+# === Example: every experiment 4 file and model column with METEOR, BERTScore and COMET
+# python3 -m coptic_nmt.evaluation "experiment 4/generated translations/"*_all_models_generated_translations.csv --output_dir "experiment 4/evaluation/evaluation scores"
+
+# === Example: BLEU, chrF++ and TER only (seconds on CPU)
+# python3 -m coptic_nmt.evaluation "experiment 4/generated translations/"*_all_models_generated_translations.csv --profile fast --suffix _lexical --output_dir "experiment 4/evaluation/evaluation scores"
+
+# === Example: BERTScore only, embeddings kept on disk, with the best-reference columns
+# python3 -m coptic_nmt.evaluation "experiment 4/generated translations/"*_all_models_generated_translations.csv --metrics bertscore --bertscore_embedding_cache score_cache/bertscore --multi_reference --suffix _bertscore --output_dir "experiment 4/evaluation/evaluation scores"
+
+# === Example: BLEURT only, same files
+# python3 -m coptic_nmt.evaluation "experiment 4/generated translations/"*_all_models_generated_translations.csv --profile bleurt --suffix _bleurt --output_dir "experiment 4/evaluation/evaluation scores"
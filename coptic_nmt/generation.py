@@ -0,0 +1,24 @@
+import torch
+
+
+# === Batched translation, length-sorted to limit padding (output order = input order)
+def translate(model, tokenizer, texts, input_prefix="", batch_size=32, max_length=128, num_beams=1,
+              **generate_kwargs):
+    was_training = model.training
+    model.eval()
+    device = next(model.parameters()).device
+
+    order = sorted(range(len(texts)), key=lambda i: len(str(texts[i])))
+    translations = [None] * len(texts)
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start:start + batch_size]
+            inputs = tokenizer([input_prefix + str(texts[i]) for i in batch_ids], return_tensors="pt",
+                               padding=True, truncation=True, max_length=max_length).to(device)
+            outputs = model.generate(**inputs, max_length=max_length, num_beams=num_beams, **generate_kwargs)
+            for i, text in zip(batch_ids, tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                translations[i] = text
+
+    if was_training:
+        model.train()
+    return translations
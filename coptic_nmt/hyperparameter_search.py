@@ -0,0 +1,165 @@
+import argparse
+import json
+import math
+import random
+import shlex
+import sys
+import time
+from pathlib import Path
+
+from coptic_nmt.sweep import REPO_ROOT, build_slots, launch, load_config, pin_to_slot
+
+
+# === Trial sampling: lists are sampled uniformly, {low, high, log} ranges continuously
+def sample_trials(space, n_trials, seed):
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(n_trials):
+        params = {}
+        for name, spec in sorted(space.items()):
+            if isinstance(spec, list):
+                params[name] = rng.choice(spec)
+            elif spec.get("log"):
+                params[name] = float(f"{math.exp(rng.uniform(math.log(spec['low']), math.log(spec['high']))):.3g}")
+            else:
+                params[name] = float(f"{rng.uniform(spec['low'], spec['high']):.3g}")
+        trials.append(params)
+    return trials
+
+
+# === Epoch budgets of the rungs: min_epochs * eta^k, the last rung trains to max_epochs
+def rung_budgets(min_epochs, max_epochs, eta):
+    budgets = []
+    budget = min_epochs
+    while budget < max_epochs:
+        budgets.append(budget)
+        budget *= eta
+    return budgets + [max_epochs]
+
+
+# === Score of a trial: best chrF of the in-loop quality check (quality_history.jsonl)
+def trial_score(output_dir):
+    path = Path(output_dir) / "quality_history.jsonl"
+    if not path.exists():
+        return None, 0
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+    if not records:
+        return None, 0
+    return max(r["chrf"] for r in records), max(r["epoch"] for r in records)
+
+
+def trial_command(search, params, output_dir, num_epochs, python):
+    command = [
+        python, str(REPO_ROOT / search["script"]),
+        "--data_path", search["data_path"],
+        "--output_dir", str(output_dir),
+        "--num_epochs", str(num_epochs),
+        "--num_threads", str(search["cores_per_run"]),
+        "--early_stopping_patience", str(search.get("patience", 3)),
+        "--quality_eval_size", str(search.get("quality_eval_size", 200)),
+    ]
+    for name, value in params.items():
+        command += [f"--{name}", str(value)]
+    return command + [str(a) for a in search.get("extra_args", [])]
+
+
+# === One rung: every active trial trains (resuming from its checkpoints) up to the rung budget.
+# Returns the seconds and the return code of each trial.
+def run_rung(search, trials, active, budget, output_root, slots, poll_seconds):
+    python = search.get("python", sys.executable)
+    queue = list(active)
+    running = {}
+    seconds = {}
+    returncodes = {}
+    while queue or running:
+        for position, slot in enumerate(slots):
+            if position in running or not queue:
+                continue
+            trial_id = queue.pop(0)
+            output_dir = output_root / f"trial-{trial_id:03d}"
+            output_dir.mkdir(parents=True, exist_ok=True)
+            command = pin_to_slot(trial_command(search, trials[trial_id], output_dir, budget, python), slot,
+                                  search["cores_per_run"])
+            process, log_file = launch(command, search["cores_per_run"], output_dir / "run.log")
+            running[position] = (trial_id, process, time.time(), log_file)
+
+        for position, (trial_id, process, start, log_file) in list(running.items()):
+            if process.poll() is None:
+                continue
+            log_file.close()
+            del running[position]
+            seconds[trial_id] = time.time() - start
+            returncodes[trial_id] = process.returncode
+            if process.returncode != 0:
+                print(f"❌ trial {trial_id} failed (see run.log), it will not be promoted")
+        if running:
+            time.sleep(poll_seconds)
+    return seconds, returncodes
+
+
+def successive_halving(search, output_root, poll_seconds=10):
+    output_root = Path(output_root).resolve()
+    output_root.mkdir(parents=True, exist_ok=True)
+    trials = sample_trials(search["space"], search["n_trials"], search.get("seed", 42))
+    budgets = rung_budgets(search["min_epochs"], search["max_epochs"], search["eta"])
+    slots = build_slots({"sweep": search})
+    print(f"🔬 {len(trials)} trials, rungs at {budgets} epochs, eta={search['eta']}, {len(slots)} parallel slots")
+
+    rows = []
+    active = list(range(len(trials)))
+    total_seconds = 0.0
+    for rung, budget in enumerate(budgets):
+        print(f"\n🪜 Rung {rung}: {len(active)} trials up to {budget} epochs")
+        seconds, returncodes = run_rung(search, trials, active, budget, output_root, slots, poll_seconds)
+        total_seconds += sum(seconds.values())
+
+        scores = {}
+        for trial_id in active:
+            chrf, epochs = trial_score(output_root / f"trial-{trial_id:03d}")
+            # A crashed trial keeps the partial history of its last epochs but is never ranked
+            failed = returncodes.get(trial_id) != 0
+            rows.append({"rung": rung, "budget": budget, "trial": trial_id, **trials[trial_id], "chrf": chrf,
+                         "epochs_trained": epochs, "seconds": seconds.get(trial_id),
+                         "status": "failed" if failed else "ok"})
+            if chrf is not None and not failed:
+                scores[trial_id] = chrf
+                print(f"   trial {trial_id:03d} {trials[trial_id]} → chrF {chrf:.2f} ({epochs:.0f} epochs)")
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if rung < len(budgets) - 1:
+            active = ranked[:max(1, len(ranked) // search["eta"])]
+        else:
+            active = ranked[:1]
+    return trials, rows, active[0] if active else None, total_seconds
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter search over a finetune script.")
+    parser.add_argument("config", help="Search configuration (.toml, .yaml or .yml) with [search] and [search.space]")
+    parser.add_argument("--poll_seconds", type=int, default=10, help="Polling interval of running trials")
+    args = parser.parse_args()
+
+    search_config = load_config(args.config)["search"]
+    output_root = Path(search_config["output_root"])
+    trials, rows, best, total_seconds = successive_halving(search_config, output_root, args.poll_seconds)
+
+    results = pd.DataFrame(rows)
+    results.to_csv(output_root / "search_results.csv", index=False)
+
+    # === Compute spent vs the equivalent full grid (every trial trained for max_epochs)
+    last_rows = results.groupby("trial")["epochs_trained"].max()
+    epochs_spent = last_rows.sum()
+    grid_epochs = len(trials) * search_config["max_epochs"]
+    seconds_per_epoch = total_seconds / epochs_spent if epochs_spent else float("nan")
+    print(f"\n💰 Compute: {epochs_spent:.0f} trial-epochs ({total_seconds / 3600:.1f} h) vs {grid_epochs} for the "
+          f"full grid (~{grid_epochs * seconds_per_epoch / 3600:.1f} h) — {epochs_spent / grid_epochs:.1%} of the grid")
+    if best is not None:
+        best_chrf = results[results["trial"] == best]["chrf"].max()
+        print(f"🏆 Best trial {best:03d}: {trials[best]} (chrF {best_chrf:.2f}) → "
+              f"{shlex.quote(str(output_root / f'trial-{best:03d}'))}")
+    print(f"💾 File saved: {output_root / 'search_results.csv'}")
+
+# === Example run (from the repository root)
+# python3 -m coptic_nmt.hyperparameter_search sweeps/search_opus_lr_batch.toml
@@ -0,0 +1,131 @@
+from functools import lru_cache
+
+import numpy as np
+from sacrebleu.metrics.helpers import extract_all_char_ngrams, extract_all_word_ngrams, extract_word_ngrams
+from sacrebleu.metrics.lib_ter import translation_edit_rate
+from sacrebleu.tokenizers.tokenizer_13a import Tokenizer13a
+from sacrebleu.tokenizers.tokenizer_ter import TercomTokenizer
+
+# === sacreBLEU defaults: BLEU 13a / exp smoothing, chrF++ (6 char + 2 word orders, beta 2), TER case-insensitive
+BLEU_ORDER = 4
+CHAR_ORDER, WORD_ORDER, BETA = 6, 2, 2
+_PUNCTS = set('!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~')
+_bleu_tokenizer = Tokenizer13a()
+_ter_tokenizer = TercomTokenizer(normalized=False, no_punct=False, asian_support=False, case_sensitive=False)
+
+
+# === Lexical metrics from sufficient statistics
+# Each (candidate, reference) pair is reduced to a row of counts (n-gram matches / totals, lengths,
+# edits); sentence scores are computed from the rows and corpus scores from their sums, with the
+# formulas vectorized over all rows. N-grams / tokens of a sentence are extracted once (cached), so
+# a reference is processed once for every generated column and a candidate once for every reference.
+# Same preprocessing and formulas as sacrebleu's BLEU, CHRF(word_order=2) and TER.
+
+@lru_cache(maxsize=500_000)
+def _bleu_features(sentence):
+    return extract_all_word_ngrams(_bleu_tokenizer(sentence.rstrip()), 1, BLEU_ORDER)
+
+
+@lru_cache(maxsize=500_000)
+def _chrf_features(sentence):
+    counters = extract_all_char_ngrams(sentence, CHAR_ORDER, False)
+    words = []
+    for w in sentence.split():
+        if len(w) == 1:
+            words.append(w)
+        elif w[-1] in _PUNCTS:
+            words += [w[:-1], w[-1]]
+        elif w[0] in _PUNCTS:
+            words += [w[0], w[1:]]
+        else:
+            words.append(w)
+    return counters + [extract_word_ngrams(words, n) for n in range(1, WORD_ORDER + 1)]
+
+
+@lru_cache(maxsize=500_000)
+def _ter_words(sentence):
+    return tuple(_ter_tokenizer(sentence.rstrip()).split())
+
+
+# === [hyp_len, ref_len, correct_1..4, total_1..4] per pair
+def bleu_statistics(candidates, references):
+    stats = np.zeros((len(candidates), 2 + 2 * BLEU_ORDER))
+    for i, (candidate, reference) in enumerate(zip(candidates, references)):
+        hyp_ngrams, hyp_len = _bleu_features(candidate)
+        ref_ngrams, ref_len = _bleu_features(reference)
+        stats[i, 0], stats[i, 1] = hyp_len, ref_len
+        for ngram, count in hyp_ngrams.items():
+            n = len(ngram) - 1
+            stats[i, 2 + BLEU_ORDER + n] += count
+            if ngram in ref_ngrams:
+                stats[i, 2 + n] += min(count, ref_ngrams[ngram])
+    return stats
+
+
+# sentence_bleu uses the effective order (orders without any hypothesis n-gram are dropped), corpus_bleu does not
+def bleu_scores(stats, effective_order=False):
+    stats = np.atleast_2d(stats)
+    sys_len, ref_len = stats[:, 0], stats[:, 1]
+    correct, total = stats[:, 2:2 + BLEU_ORDER], stats[:, 2 + BLEU_ORDER:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bp = np.where(sys_len < ref_len, np.where(sys_len > 0, np.exp(1 - ref_len / sys_len), 0.0), 1.0)
+        # Orders up to the first one without hypothesis n-grams
+        active = np.cumprod(total > 0, axis=1).astype(bool)
+        # exp smoothing: the k-th order without matches gets 1 / (2^k * total)
+        smooth = 2.0 ** np.cumsum(active & (correct == 0), axis=1)
+        precisions = np.where(correct > 0, 100.0 * correct / total, 100.0 / (smooth * total))
+        precisions = np.where(active, precisions, 0.0)
+        logs = np.where(precisions > 0, np.log(np.where(precisions > 0, precisions, 1.0)), -9999999999.0)
+    if effective_order:
+        order = np.where(active[:, 0], active.sum(axis=1), BLEU_ORDER)
+    else:
+        order = np.full(len(stats), BLEU_ORDER)
+    kept = np.arange(BLEU_ORDER)[None, :] < order[:, None]
+    scores = bp * np.exp((logs * kept).sum(axis=1) / order)
+    return np.where(correct.sum(axis=1) > 0, scores, 0.0)
+
+
+# === [hyp, ref, match] for each of the 6 character and 2 word n-gram orders per pair
+def chrf_statistics(candidates, references):
+    order = CHAR_ORDER + WORD_ORDER
+    stats = np.zeros((len(candidates), 3 * order))
+    for i, (candidate, reference) in enumerate(zip(candidates, references)):
+        for n, (hyp_ngrams, ref_ngrams) in enumerate(zip(_chrf_features(candidate), _chrf_features(reference))):
+            matches = sum(min(count, ref_ngrams[ngram]) for ngram, count in hyp_ngrams.items() if ngram in ref_ngrams)
+            stats[i, 3 * n:3 * n + 3] = (sum(hyp_ngrams.values()) if ref_ngrams else 0,
+                                         sum(ref_ngrams.values()), matches)
+    return stats
+
+
+def chrf_scores(stats):
+    stats = np.atleast_2d(stats)
+    stats = stats.reshape(len(stats), -1, 3)
+    n_hyp, n_ref, n_match = stats[..., 0], stats[..., 1], stats[..., 2]
+    factor = BETA ** 2
+    # Averages over the orders where both sides have n-grams
+    effective = (n_hyp > 0) & (n_ref > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(effective, n_match / np.where(n_hyp > 0, n_hyp, 1), 0.0).sum(axis=1)
+        recall = np.where(effective, n_match / np.where(n_ref > 0, n_ref, 1), 0.0).sum(axis=1)
+        count = effective.sum(axis=1)
+        precision = np.where(count > 0, precision / np.maximum(count, 1), 0.0)
+        recall = np.where(count > 0, recall / np.maximum(count, 1), 0.0)
+        scores = (1 + factor) * precision * recall / (factor * precision + recall)
+    return np.where(precision + recall > 0, 100 * scores, 0.0)
+
+
+# === [edits, ref_len] per pair (shift-aware edit distance of sacrebleu, tercom-tokenized words)
+def ter_statistics(candidates, references):
+    stats = np.zeros((len(candidates), 2))
+    for i, (candidate, reference) in enumerate(zip(candidates, references)):
+        stats[i] = translation_edit_rate(list(_ter_words(candidate)), list(_ter_words(reference)))
+    return stats
+
+
+def ter_scores(stats):
+    stats = np.atleast_2d(stats)
+    edits, ref_len = stats[:, 0], stats[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(ref_len > 0, edits / np.where(ref_len > 0, ref_len, 1), np.where(edits > 0, 1.0, 0.0))
+    return 100 * rate
+
@@ -0,0 +1,321 @@
+import os
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from coptic_nmt.bertscore import BertScoreEmbeddings
+from coptic_nmt.score_cache import pair_key
+
+
+# === Metrics of the evaluation engine
+# Each metric imports and loads its model only in load(), so unused metrics cost nothing.
+# score_tasks receives every (file, generated column, reference) task of a run and, by default,
+# scores all their pairs in one batched call, then splits the scores back per task.
+# Identical (candidate, reference) pairs — (candidate, source, reference) for metrics using the
+# source — are scored once and scattered back to every row; with a ScoreCache, pairs scored by an
+# earlier run are read back instead. dedup_stats records the saving.
+# higher_is_better is False for error rates (TER): the best of several scores is then the lowest.
+class Metric:
+    name = None
+    uses_source = False
+    higher_is_better = True
+
+    def __init__(self, batch_size=32):
+        self.batch_size = batch_size
+        self.loaded = False
+        self.dedup_stats = None
+        self.corpus_scores = None
+        self.cache = None
+
+    # Metric name + model / checkpoint: scores are only reused for the same id (None: not cached)
+    @property
+    def cache_id(self):
+        return None
+
+    def load(self):
+        if not self.loaded:
+            self._load()
+            self.loaded = True
+
+    def _load(self):
+        pass
+
+    # Releases what load() started (worker processes); load() starts it again if needed
+    def close(self):
+        self.loaded = False
+
+    def score(self, candidates, references, sources=None):
+        raise NotImplementedError
+
+    def pair_keys(self, tasks):
+        for task in tasks:
+            sources = task["sources"] if self.uses_source else [None] * len(task["candidates"])
+            yield from zip(task["candidates"], task["references"], sources)
+
+    def score_tasks(self, tasks):
+        unique = {}
+        positions = [unique.setdefault(key, len(unique)) for key in self.pair_keys(tasks)]
+        unique_pairs = list(unique)
+        unique_scores = [None] * len(unique_pairs)
+
+        # Pairs already in the persistent cache
+        cached = {}
+        if self.cache is not None and self.cache_id is not None:
+            keys = [pair_key(*pair) for pair in unique_pairs]
+            cached = self.cache.lookup(self.cache_id, keys)
+            for i, key in enumerate(keys):
+                unique_scores[i] = cached.get(key)
+        missing = [i for i, score in enumerate(unique_scores) if score is None]
+
+        start = time.perf_counter()
+        if missing:
+            candidates, references, sources = (list(column) for column in zip(*(unique_pairs[i] for i in missing)))
+            for i, score in zip(missing, self.score(candidates, references, sources)):
+                unique_scores[i] = score
+            if self.cache is not None and self.cache_id is not None:
+                self.cache.store(self.cache_id, [keys[i] for i in missing], [unique_scores[i] for i in missing])
+        seconds = time.perf_counter() - start
+        self.dedup_stats = {
+            "pairs": len(positions),
+            "unique_pairs": len(unique_pairs),
+            "cache_hits": len(cached),
+            "scored_pairs": len(missing),
+            "seconds": seconds,
+            # Time the duplicates and cached pairs would have cost at the measured per-pair rate
+            "seconds_saved": seconds / len(missing) * (len(positions) - len(missing)) if missing else 0.0,
+        }
+
+        scores = [unique_scores[i] for i in positions]
+        results, start = [], 0
+        for task in tasks:
+            results.append(list(scores[start:start + len(task["candidates"])]))
+            start += len(task["candidates"])
+        return results
+
+
+# === Sentence BLEU / chrF++ / TER with corpus scores of the same pass (coptic_nmt.lexical)
+# Pairs are reduced to sufficient statistics once (no persistent cache: recomputing is cheaper
+# than the lookup); sentence scores come from the rows and corpus_scores, one per task, from the
+# statistics summed over the task's rows, as sacrebleu's corpus_* functions do.
+# statistics / sentence_scores / corpus_score name coptic_nmt.lexical functions, resolved in load()
+# like the models of the other metrics, so sacrebleu is only imported when a lexical metric runs.
+class LexicalMetric(Metric):
+    statistics = None
+    sentence_scores = None
+    corpus_score = None
+    sentence_options = {}
+
+    def _load(self):
+        from coptic_nmt import lexical
+
+        self.lexical = lexical
+
+    def score_tasks(self, tasks):
+        self.load()
+        start = time.perf_counter()
+        unique = {}
+        positions = np.array([unique.setdefault(key, len(unique)) for key in self.pair_keys(tasks)], dtype=int)
+        candidates, references = [pair[0] for pair in unique], [pair[1] for pair in unique]
+        stats = getattr(self.lexical, self.statistics)(candidates, references)
+        sentence = getattr(self.lexical, self.sentence_scores)(stats, **self.sentence_options)
+        corpus_score = getattr(self.lexical, self.corpus_score)
+
+        results, self.corpus_scores, offset = [], [], 0
+        for task in tasks:
+            rows = positions[offset:offset + len(task["candidates"])]
+            offset += len(task["candidates"])
+            results.append(sentence[rows].tolist())
+            self.corpus_scores.append(float(corpus_score(stats[rows].sum(axis=0))[0]))
+        self.dedup_stats = {
+            "pairs": len(positions),
+            "unique_pairs": len(unique),
+            "cache_hits": 0,
+            "scored_pairs": len(unique),
+            "seconds": time.perf_counter() - start,
+            "seconds_saved": 0.0,
+        }
+        return results
+
+
+class BleuMetric(LexicalMetric):
+    name = "bleu"
+    statistics = "bleu_statistics"
+    sentence_scores = corpus_score = "bleu_scores"
+    # sentence_bleu drops the n-gram orders the sentence is too short for
+    sentence_options = {"effective_order": True}
+
+
+class ChrfMetric(LexicalMetric):
+    name = "chrf"
+    statistics = "chrf_statistics"
+    sentence_scores = corpus_score = "chrf_scores"
+
+
+class TerMetric(LexicalMetric):
+    name = "ter"
+    higher_is_better = False
+    statistics = "ter_statistics"
+    sentence_scores = corpus_score = "ter_scores"
+
+
+# === Sentence-level METEOR over a process pool
+# Same computation as evaluate's meteor (NLTK single_meteor_score on word_tokenize'd text, alpha=0.9,
+# beta=3, gamma=0.5), one score per pair: evaluate's corpus METEOR is the mean of these sentence
+# scores, i.e. the per-task mean printed by the engine. WordNet is loaded once in each worker.
+class MeteorMetric(Metric):
+    name = "meteor"
+
+    def __init__(self, batch_size=32, workers=None):
+        super().__init__(batch_size)
+        self.workers = workers or os.cpu_count()
+
+    def _load(self):
+        from multiprocessing import Pool
+
+        import nltk
+
+        nltk.download("punkt")
+        nltk.download("wordnet")
+        # The workers live as long as the metric, so repeated score() calls (pipeline chunks) reuse them
+        self.pool = Pool(self.workers, initializer=_load_wordnet)
+
+    def close(self):
+        if self.loaded:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        super().close()
+
+    @property
+    def cache_id(self):
+        return "meteor:nltk-a0.9-b3-g0.5"
+
+    def score(self, candidates, references, sources=None):
+        pairs = list(zip(candidates, references))
+        chunksize = max(1, len(pairs) // (self.workers * 4))
+        return self.pool.map(_sentence_meteor, pairs, chunksize=chunksize)
+
+
+def _load_wordnet():
+    from nltk.corpus import wordnet
+
+    wordnet.ensure_loaded()
+
+
+def _sentence_meteor(pair):
+    from nltk import word_tokenize
+    from nltk.translate.meteor_score import single_meteor_score
+
+    candidate, reference = pair
+    return single_meteor_score(word_tokenize(reference), word_tokenize(candidate), alpha=0.9, beta=3, gamma=0.5)
+
+
+# === BERTScore F1 from per-sentence embeddings (coptic_nmt.bertscore)
+# Every unique candidate and reference of the run is embedded once; with embedding_cache, the
+# embeddings are memory-mapped on disk and reused by later runs.
+class BertScoreMetric(Metric):
+    name = "bertscore"
+
+    def __init__(self, batch_size=32, lang="fr", model_type=None, num_layers=None, embedding_cache=None):
+        super().__init__(batch_size)
+        self.lang = lang
+        # Default model of the language: cache id known without resolving the model
+        self.default_model = model_type is None and num_layers is None
+        self.embeddings = BertScoreEmbeddings(lang, model_type, num_layers, batch_size=batch_size,
+                                              cache_dir=embedding_cache)
+
+    def _load(self):
+        self.embeddings.load()
+
+    # v2: scores of BertScoreEmbeddings, kept apart from those of the earlier evaluate implementation
+    @property
+    def cache_id(self):
+        if self.default_model:
+            return f"bertscore-f1:v2:{self.lang}"
+        model_type, num_layers = self.embeddings.resolve()
+        return f"bertscore-f1:v2:{model_type}:L{num_layers}"
+
+    def score(self, candidates, references, sources=None):
+        _, _, f1 = self.embeddings.pair_scores(candidates, references)
+        stats = self.embeddings.stats
+        print(f"🧠 bertscore: {stats['embedded']:,} sentences embedded, {stats['reused']:,} reused")
+        return f1.tolist()
+
+
+class CometMetric(Metric):
+    name = "comet"
+    uses_source = True
+
+    def __init__(self, batch_size=8, model_name="Unbabel/wmt22-comet-da"):
+        super().__init__(batch_size)
+        self.model_name = model_name
+
+    def _load(self):
+        from comet import download_model, load_from_checkpoint
+
+        self.model = load_from_checkpoint(download_model(self.model_name))
+
+    @property
+    def cache_id(self):
+        return f"comet:{self.model_name}"
+
+    def score(self, candidates, references, sources=None):
+        data = [{"src": s, "mt": c, "ref": r} for s, c, r in zip(sources, candidates, references)]
+        return self.model.predict(data, batch_size=self.batch_size, num_workers=1, gpus=0)["scores"]
+
+
+# === BLEURT-20 and its distilled versions, downloaded next to each other
+BLEURT_VARIANTS = {"full": "BLEURT-20", "d12": "BLEURT-20-D12", "d6": "BLEURT-20-D6", "d3": "BLEURT-20-D3"}
+
+
+# === BLEURT, all pairs of a run in one call
+# length_batching uses BLEURT's LengthBatchingBleurtScorer: pairs are sorted by token length and each
+# batch is only padded to its longest pair instead of the 512 tokens of the checkpoint, so larger
+# batches pay off. variant picks a distilled checkpoint in the folder of the BLEURT-20 one.
+class BleurtMetric(Metric):
+    name = "bleurt"
+
+    def __init__(self, batch_size=64, checkpoint="../../BLEURT-20", variant="full", length_batching=True):
+        super().__init__(batch_size)
+        self.checkpoint = checkpoint if variant == "full" else str(Path(checkpoint).parent / BLEURT_VARIANTS[variant])
+        self.length_batching = length_batching
+
+    def _load(self):
+        from bleurt import score
+
+        scorer = score.LengthBatchingBleurtScorer if self.length_batching else score.BleurtScorer
+        self.scorer = scorer(self.checkpoint)
+
+    @property
+    def cache_id(self):
+        return f"bleurt:{Path(self.checkpoint).resolve().name}"
+
+    def score(self, candidates, references, sources=None):
+        return self.scorer.score(references=references, candidates=candidates, batch_size=self.batch_size)
+
+
+METRICS = {metric.name: metric for metric in [BleuMetric, ChrfMetric, TerMetric, MeteorMetric, BertScoreMetric,
+                                              CometMetric, BleurtMetric]}
+
+# === Named metric sets (--profile of python3 -m coptic_nmt.evaluation)
+PROFILES = {
+    "fast": ["bleu", "chrf", "ter"],
+    "default": ["meteor", "bertscore", "comet"],
+    "bleurt": ["bleurt"],
+    "all": ["bleu", "chrf", "ter", "meteor", "bertscore", "comet", "bleurt"],
+}
+
+
+def load_metrics(names, options=None, cache=None):
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    warnings.filterwarnings("ignore")
+    options = options or {}
+    unknown = [name for name in names if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metric(s): {', '.join(unknown)} (available: {', '.join(METRICS)})")
+    metrics = {name: METRICS[name](**options.get(name, {})) for name in names}
+    for metric in metrics.values():
+        metric.cache = cache
+    return metrics
@@ -0,0 +1,132 @@
+import argparse
+import json
+import time
+from collections import OrderedDict
+
+import torch
+from transformers import TrainerCallback
+
+
+# === Grouping of the row-per-pair dataset into one example per source verse
+# Rows are grouped by verse_id *and* tokenized source, so a clean and a noisy copy
+# of the same verse (train_all_data.csv) stay separate encoder inputs.
+class MultiReferenceDataset(torch.utils.data.Dataset):
+    def __init__(self, tokenized_dataset, group_column="verse_id"):
+        groups = OrderedDict()
+        for row in tokenized_dataset:
+            key = (row[group_column], tuple(row["input_ids"]))
+            if key not in groups:
+                groups[key] = {
+                    "input_ids": row["input_ids"],
+                    "attention_mask": row["attention_mask"],
+                    "references": [],
+                }
+            groups[key]["references"].append(row["labels"])
+        self.examples = list(groups.values())
+        self.num_pairs = len(tokenized_dataset)
+
+    def __len__(self):
+        return len(self.examples)
+
+    def __getitem__(self, idx):
+        return self.examples[idx]
+
+    @property
+    def references_per_source(self):
+        return self.num_pairs / max(len(self.examples), 1)
+
+
+# === Collator: pads each source once and every reference of the batch
+# `reference_index[j]` is the row of the source that reference j belongs to.
+# Plain row-per-pair features (eval split) are accepted as single-reference groups.
+class MultiReferenceCollator:
+    def __init__(self, tokenizer, label_pad_token_id=-100):
+        self.tokenizer = tokenizer
+        self.label_pad_token_id = label_pad_token_id
+
+    def __call__(self, features):
+        sources = [{"input_ids": f["input_ids"], "attention_mask": f["attention_mask"]} for f in features]
+        batch = self.tokenizer.pad(sources, padding=True, return_tensors="pt")
+
+        references = []
+        reference_index = []
+        for i, feature in enumerate(features):
+            feature_references = feature["references"] if "references" in feature else [feature["labels"]]
+            references.extend(feature_references)
+            reference_index.extend([i] * len(feature_references))
+
+        max_length = max(len(ref) for ref in references)
+        labels = torch.full((len(references), max_length), self.label_pad_token_id, dtype=torch.long)
+        for j, ref in enumerate(references):
+            labels[j, :len(ref)] = torch.tensor(ref, dtype=torch.long)
+
+        batch["labels"] = labels
+        batch["reference_index"] = torch.tensor(reference_index, dtype=torch.long)
+        return batch
+
+
+# === Shared-encoder loss: one encoder pass per source, one decoder pass per reference
+def multi_reference_loss(model, encoder, inputs, return_outputs=False):
+    reference_index = inputs["reference_index"]
+    encoder_outputs = encoder(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"])
+    hidden_states = encoder_outputs.last_hidden_state.index_select(0, reference_index)
+    attention_mask = inputs["attention_mask"].index_select(0, reference_index)
+
+    outputs = model(encoder_outputs=(hidden_states,), attention_mask=attention_mask, labels=inputs["labels"])
+    return (outputs.loss, outputs) if return_outputs else outputs.loss
+
+
+# === Epoch wall time, to compare against the row-per-pair baseline
+class EpochTimeCallback(TrainerCallback):
+    def __init__(self, output_path, mode, num_pairs, num_encoder_inputs):
+        self.output_path = output_path
+        self.mode = mode
+        self.num_pairs = num_pairs
+        self.num_encoder_inputs = num_encoder_inputs
+        self.epoch_start = None
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        if not state.is_world_process_zero or self.epoch_start is None:
+            return
+        seconds = time.perf_counter() - self.epoch_start
+        record = {
+            "mode": self.mode,
+            "epoch": round(state.epoch),
+            "seconds": seconds,
+            "pairs": self.num_pairs,
+            "encoder_inputs": self.num_encoder_inputs,
+        }
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"⏱️ Epoch {record['epoch']} ({self.mode}): {seconds:.1f}s "
+              f"for {self.num_pairs} pairs / {self.num_encoder_inputs} encoder inputs")
+
+
+def report_epoch_time_saving(paths):
+    epoch_times = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                epoch_times.setdefault(record["mode"], []).append(record["seconds"])
+
+    if "row_per_pair" not in epoch_times or "multi_reference" not in epoch_times:
+        raise ValueError("Both a row_per_pair and a multi_reference run are needed for the comparison.")
+
+    baseline = sum(epoch_times["row_per_pair"]) / len(epoch_times["row_per_pair"])
+    multi_ref = sum(epoch_times["multi_reference"]) / len(epoch_times["multi_reference"])
+    print(f"📊 Mean epoch time — row per pair: {baseline:.1f}s | multi-reference: {multi_ref:.1f}s")
+    print(f"🚀 Epoch-time saving: {(1 - multi_ref / baseline) * 100:.1f}% ({baseline / multi_ref:.2f}x)")
+    return baseline, multi_ref
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare epoch times of row-per-pair and multi-reference runs.")
+    parser.add_argument("epoch_times", nargs="+", help="epoch_times.jsonl files written by the finetune runs")
+    report_epoch_time_saving(parser.parse_args().epoch_times)
+
+# === Example: compare a baseline run with a --multi_reference run
+# python3 -m coptic_nmt.multi_reference opus-baseline/epoch_times.jsonl opus-multi-ref/epoch_times.jsonl
@@ -0,0 +1,56 @@
+import random
+
+# ===== Confusion dictionary for Coptic text =====
+# confusion_map = {
+#     'ⲁ': ['ⲟ', 'ⲉ'], 'ⲟ': ['ⲁ', 'ⲉ'], 'ⲉ': ['ⲁ', 'ⲟ'],
+#     'ⲓ': ['ⲏ', 'ⲩ'], 'ⲏ': ['ⲓ', 'ⲉ'], 'ⲩ': ['ⲓ', 'ⲛ'],
+#     'ⲥ': ['ⲓ', 'ⲏ'], 'ϣ': ['ϥ', 'ϫ'], 'ϥ': ['ϣ', 'ϫ'],
+#     'ϫ': ['ϣ', 'ϥ'], 'ϯ': ['ⲧ', 'ⲑ'], 'ⲧ': ['ϯ', 'ⲑ'],
+#     'ⲑ': ['ⲧ', 'ϯ'], 'ⲛ': ['ⲩ'], 'ⲙ': ['ⲛ'], 'ⲣ': ['ⲩ', 'ⲙ']
+# }
+
+# ===== Confusion dictionary for romanized Coptic text =====
+confusion_map = {
+    'a': ['o', 'e'], 'o': ['a', 'e'], 'e': ['a', 'o'],
+    'i': ['l', 'j'], 'l': ['i', '1'], 'c': ['e'],
+    'u': ['v'], 'v': ['u'], 'n': ['m'], 'm': ['n'],
+    'r': ['n', 's'], 's': ['r'], 't': ['f'], 'f': ['t']
+}
+
+# ===== Default noise probabilities (same as experiment 4/data/add_noise_data.py) =====
+SUBSTITUTION_PROB = 0.1  # confusion probability
+DELETION_PROB = 0.02     # deletion probability
+SWAP_PROB = 0.02         # swap probability
+
+
+def add_substitution_noise(text, noise_level=SUBSTITUTION_PROB, rng=random):
+    new_text = ""
+    for char in str(text):
+        if char in confusion_map and rng.random() < noise_level:
+            new_text += rng.choice(confusion_map[char])
+        else:
+            new_text += char
+    return new_text
+
+
+def add_typo_noise(text, deletion_prob=DELETION_PROB, swap_prob=SWAP_PROB, rng=random):
+    chars = list(text)
+    i = 0
+    while i < len(chars):
+        if rng.random() < deletion_prob:
+            chars[i] = '[]'  # Represents a deletion
+            i += 1
+            continue
+        if i < len(chars) - 1 and rng.random() < swap_prob:
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+            i += 2
+        else:
+            i += 1
+    return ''.join(chars)
+
+
+def add_all_noise_to_coptic_text(text, substitution_prob=SUBSTITUTION_PROB,
+                                 deletion_prob=DELETION_PROB, swap_prob=SWAP_PROB, rng=random):
+    text = add_substitution_noise(text, substitution_prob, rng=rng)
+    text = add_typo_noise(text, deletion_prob, swap_prob, rng=rng)
+    return text
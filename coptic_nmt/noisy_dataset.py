@@ -0,0 +1,62 @@
+import random
+
+import torch
+from transformers import TrainerCallback
+
+from coptic_nmt.noise import DELETION_PROB, SUBSTITUTION_PROB, SWAP_PROB, add_all_noise_to_coptic_text
+
+
+# ===== On-the-fly noisy training dataset =====
+# Each verse is noised (with probability `noise_rate`) and tokenized when it is fetched,
+# so every epoch sees fresh noise and no noisy copy of the corpus is written to disk.
+# The random stream depends only on (seed, epoch, index): runs are reproducible.
+class NoisyCopticDataset(torch.utils.data.Dataset):
+    def __init__(self, sources, targets, tokenizer, noise_rate, input_prefix="", max_length=128,
+                 substitution_prob=SUBSTITUTION_PROB, deletion_prob=DELETION_PROB,
+                 swap_prob=SWAP_PROB, seed=42, lengths=None):
+        if len(sources) != len(targets):
+            raise ValueError("sources and targets must have the same length.")
+        self.sources = list(sources)
+        self.targets = list(targets)
+        self.tokenizer = tokenizer
+        self.noise_rate = noise_rate
+        self.input_prefix = input_prefix
+        self.max_length = max_length
+        self.substitution_prob = substitution_prob
+        self.deletion_prob = deletion_prob
+        self.swap_prob = swap_prob
+        self.seed = seed
+        self.lengths = lengths
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = int(epoch)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def noisy_source(self, idx):
+        rng = random.Random(f"{self.seed}-{self.epoch}-{idx}")
+        text = str(self.sources[idx])
+        if rng.random() < self.noise_rate:
+            text = add_all_noise_to_coptic_text(text, self.substitution_prob,
+                                                self.deletion_prob, self.swap_prob, rng=rng)
+        return text
+
+    def __getitem__(self, idx):
+        model_inputs = self.tokenizer(self.input_prefix + self.noisy_source(idx),
+                                      max_length=self.max_length, truncation=True)
+        labels = self.tokenizer(text_target=self.targets[idx], max_length=self.max_length, truncation=True)
+        model_inputs["labels"] = labels["input_ids"]
+        return dict(model_inputs)
+
+
+# ===== Callback advancing the noise epoch =====
+# Assumes the default single-process data loading (dataloader_num_workers=0), so the
+# dataset seen by the DataLoader is the same object as the one updated here.
+class NoiseEpochCallback(TrainerCallback):
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.dataset.set_epoch(int(state.epoch))
@@ -0,0 +1,205 @@
+import argparse
+import queue
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from coptic_nmt.evaluation import EvaluationEngine, reference_names
+from coptic_nmt.metrics import PROFILES, LexicalMetric
+from coptic_nmt.score_cache import DEFAULT_CACHE_PATH
+
+_DONE = object()
+
+
+# === Generation → evaluation pipeline
+# A generator thread translates each input file in chunks with each model (loaded once) and puts the
+# finished chunks on a bounded queue; the main thread scores every chunk with the engine's metrics as
+# soon as it arrives, so the metric models work while the next chunk is decoded instead of waiting for
+# a whole CSV. queue_size bounds the chunks waiting to be scored (the generator blocks when scoring
+# falls behind). BLEU / chrF++ / TER need the statistics of a whole file for their corpus score and cost
+# little: they are scored per file once the queue has drained, when the "multi" reference columns
+# (engine multi_reference) and the results store rows are also recorded. The outputs are the files of
+# the two steps: <stem>_all_models_generated_translations.csv in generation_dir, then <that stem><suffix>.csv,
+# corpus_scores<suffix>.csv and scoring_report<suffix>.csv in output_dir, with the columns of
+# EvaluationEngine.evaluate_files (the scoring report only has the per-file pass of BLEU / chrF++ / TER).
+class GenerationEvaluationPipeline:
+    def __init__(self, engine, model_paths, source_column="coptic_text_romanized", input_prefix=">>fra<< ",
+                 chunk_size=256, queue_size=4, batch_size=32, max_length=128, generate_kwargs=None):
+        self.engine = engine
+        self.model_paths = model_paths
+        self.source_column = source_column
+        self.input_prefix = input_prefix
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.generate_kwargs = generate_kwargs or {}
+        self.timings = {"generation": 0.0, "scoring": 0.0, "waiting_for_generation": 0.0}
+
+    def _generate(self, sources):
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        from coptic_nmt.generation import translate
+
+        try:
+            for model_key, model_path in self.model_paths.items():
+                tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_path, local_files_only=True)
+                print(f"🚀 Generating with {model_key}")
+                for label, texts in sources.items():
+                    for start in range(0, len(texts), self.chunk_size):
+                        begin = time.perf_counter()
+                        translations = translate(model, tokenizer, texts[start:start + self.chunk_size],
+                                                 self.input_prefix, self.batch_size, self.max_length,
+                                                 **self.generate_kwargs)
+                        self.timings["generation"] += time.perf_counter() - begin
+                        self.queue.put((label, f"generated_translation_{model_key}", start, translations))
+                del model
+        except BaseException as error:
+            self.queue.put(error)
+        self.queue.put(_DONE)
+
+    def _score_chunk(self, frames, label, column, start, translations, references, column_template,
+                     source_column):
+        df = frames[label]
+        rows = df.index[start:start + len(translations)]
+        df.loc[rows, column] = translations
+        tasks = self.engine.build_tasks({label: df.loc[rows]}, [column], references, source_column)
+        for name, metric in self.engine.metrics.items():
+            if isinstance(metric, LexicalMetric):
+                continue
+            for task, scores in zip(tasks, metric.score_tasks(tasks)):
+                df.loc[rows, column_template.format(metric=name, reference=task["reference"], column=column)] = scores
+
+    # Whole files: BLEU / chrF++ / TER with their corpus scores, the chunk scores of the other metrics
+    def _score_files(self, frames, generated_columns, references, column_template, source_column):
+        tasks = self.engine.build_tasks(frames, generated_columns, references, source_column)
+        for name, metric in self.engine.metrics.items():
+            if isinstance(metric, LexicalMetric):
+                results = metric.score_tasks(tasks)
+                self.engine.report.append({"metric": name, **metric.dedup_stats})
+            else:
+                results = [frames[task["label"]][column_template.format(
+                    metric=name, reference=task["reference"], column=task["column"])].tolist() for task in tasks]
+            self.engine.record_scores(frames, tasks, name, metric, results, metric.corpus_scores, column_template)
+
+    def run(self, input_files, references, generation_dir, output_dir, suffix="_other_scores",
+            column_template="{metric}_{reference}_{column}", source_column=None):
+        generation_dir, output_dir = Path(generation_dir), Path(output_dir)
+        generation_dir.mkdir(parents=True, exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        frames = {label: pd.read_csv(path) for label, path in input_files.items()}
+        input_columns = {label: list(df.columns) for label, df in frames.items()}
+        sources = {label: df[self.source_column].astype(str).tolist() for label, df in frames.items()}
+        n_chunks = sum(-(-len(texts) // self.chunk_size) for texts in sources.values()) * len(self.model_paths)
+        print(f"📥 {len(frames)} file(s) x {len(self.model_paths)} model(s): {n_chunks} chunks of {self.chunk_size}")
+
+        # Metric models (and the METEOR worker processes) are ready before decoding starts
+        for name, metric in self.engine.metrics.items():
+            print(f"✅ Loading {name}...")
+            metric.load()
+
+        generated_columns = [f"generated_translation_{model_key}" for model_key in self.model_paths]
+        start = time.perf_counter()
+        generator = threading.Thread(target=self._generate, args=(sources,), daemon=True)
+        generator.start()
+        done = 0
+        try:
+            while True:
+                wait = time.perf_counter()
+                item = self.queue.get()
+                self.timings["waiting_for_generation"] += time.perf_counter() - wait
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                begin = time.perf_counter()
+                self._score_chunk(frames, *item, references, column_template, source_column)
+                self.timings["scoring"] += time.perf_counter() - begin
+                done += 1
+                print(f"📊 [{item[0]}] {item[1]} rows {item[2]}-{item[2] + len(item[3]) - 1} scored "
+                      f"({done}/{n_chunks})")
+            begin = time.perf_counter()
+            self._score_files(frames, generated_columns, references, column_template, source_column)
+            self.timings["scoring"] += time.perf_counter() - begin
+        finally:
+            self.engine.close()
+        generator.join()
+        wall = time.perf_counter() - start
+
+        outputs = {}
+        for label, df in frames.items():
+            generated_csv = generation_dir / f"{Path(input_files[label]).stem}_all_models_generated_translations.csv"
+            df[input_columns[label] + generated_columns].to_csv(generated_csv, index=False)
+            scored_csv = output_dir / f"{generated_csv.stem}{suffix}.csv"
+            score_columns = [c for c in df.columns if c not in input_columns[label] + generated_columns]
+            df[input_columns[label] + generated_columns + score_columns].to_csv(scored_csv, index=False)
+            outputs[label] = (generated_csv, scored_csv)
+            print(f"💾 Files saved: {generated_csv} | {scored_csv}")
+
+        self.engine.write_reports(frames, output_dir, suffix)
+
+        # Sequential cost = generation + scoring; the pipeline takes about max of the two
+        sequential = self.timings["generation"] + self.timings["scoring"]
+        print(f"⏱️ {wall:.1f}s wall | generation {self.timings['generation']:.1f}s | scoring "
+              f"{self.timings['scoring']:.1f}s | scorer idle {self.timings['waiting_for_generation']:.1f}s | "
+              f"overlap saved ~{max(0.0, sequential - wall):.1f}s")
+        return outputs
+
+
+def parse_models(values):
+    models = {}
+    for value in values:
+        key, _, path = value.partition("=")
+        if not path:
+            raise argparse.ArgumentTypeError(f"--models expects key=path, got {value}")
+        models[key] = path
+    return models
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translate evaluation files and score the translations in one pipelined run.")
+    parser.add_argument("files", nargs="+", help="Evaluation data CSVs (source and reference columns)")
+    parser.add_argument("--models", nargs="+", required=True,
+                        help="key=path of each model; its column is generated_translation_<key>")
+    parser.add_argument("--source_column", default="coptic_text_romanized", help="Column to translate")
+    parser.add_argument("--input_prefix", default=">>fra<< ", help="Prefix added to every source text")
+    parser.add_argument("--references", nargs="+", default=["french_crampon", "french_segond", "french_darby"],
+                        help="Reference columns")
+    parser.add_argument("--keep_reference_prefix", action="store_true",
+                        help="Name score columns with the full reference column (meteor_french_segond_...)")
+    parser.add_argument("--metrics", nargs="+", default=None, help="Metrics to compute (overrides --profile)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="default", help="Named set of metrics")
+    parser.add_argument("--multi_reference", action="store_true",
+                        help="Also write the best score over the references (\"multi\" reference columns)")
+    parser.add_argument("--chunk_size", type=int, default=256, help="Rows translated and scored together")
+    parser.add_argument("--queue_size", type=int, default=4, help="Translated chunks allowed to wait for scoring")
+    parser.add_argument("--batch_size", type=int, default=32, help="Generation batch size")
+    parser.add_argument("--num_beams", type=int, default=6, help="Beam size")
+    parser.add_argument("--repetition_penalty", type=float, default=1.5, help="Generation repetition penalty")
+    parser.add_argument("--length_penalty", type=float, default=2.5, help="Generation length penalty")
+    parser.add_argument("--cache_path", default=str(DEFAULT_CACHE_PATH), help="Persistent per-pair score cache")
+    parser.add_argument("--no_cache", action="store_true", help="Score every pair without the persistent cache")
+    parser.add_argument("--generation_dir", default="generated_translations_per_dataset_all_models",
+                        help="Folder of the generated translation CSVs")
+    parser.add_argument("--output_dir", default="evaluation scores", help="Folder of the scored CSVs")
+    parser.add_argument("--suffix", default="_other_scores", help="Suffix of the scored CSV names")
+    args = parser.parse_args()
+
+    engine = EvaluationEngine(args.metrics or PROFILES[args.profile],
+                              cache_path=None if args.no_cache else args.cache_path,
+                              multi_reference=args.multi_reference)
+    pipeline = GenerationEvaluationPipeline(
+        engine, parse_models(args.models), args.source_column, args.input_prefix, args.chunk_size,
+        args.queue_size, args.batch_size,
+        generate_kwargs={"num_beams": args.num_beams, "repetition_penalty": args.repetition_penalty,
+                         "length_penalty": args.length_penalty},
+    )
+    references = reference_names(args.references, strip_prefix=None if args.keep_reference_prefix else "french_")
+    pipeline.run({Path(f).stem: f for f in args.files}, references, args.generation_dir, args.output_dir,
+                 suffix=args.suffix)
+
+# === Example: experiment 4 models on the clean and noisy evaluation sets, METEOR / BERTScore / COMET
+# python3 -m coptic_nmt.pipeline "evaluation data/evaluation_data"*.csv --models opus_clean=models/opus-finetuned-coptic-fr-clean-data opus_noisy_10=models/opus-finetuned-coptic-fr-noisy-10-data --generation_dir "experiment 4/generated translations" --output_dir "experiment 4/evaluation/evaluation scores"
@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+import sacrebleu
+from transformers import EarlyStoppingCallback, TrainerCallback
+
+from coptic_nmt.generation import translate
+
+
+# === Fast corpus-level lexical scores
+def fast_quality_scores(translations, references):
+    return {
+        "chrf": sacrebleu.corpus_chrf(translations, [references]).score,
+        "bleu": sacrebleu.corpus_bleu(translations, [references]).score,
+    }
+
+
+def held_out_subset(eval_dataset, size=200, seed=42, source_column="coptic_text_romanized",
+                    target_column="french_translation"):
+    subset = eval_dataset.shuffle(seed=seed).select(range(min(size, len(eval_dataset))))
+    return subset[source_column], subset[target_column]
+
+
+# === In-loop translation quality check
+# Runs at every evaluation: greedy-decodes a fixed held-out subset and adds eval_chrf / eval_bleu
+# to the evaluation metrics, so Trainer's best-checkpoint tracking and EarlyStoppingCallback
+# (listed after this callback) can use them. Scores are appended to quality_history.jsonl.
+class TranslationQualityCallback(TrainerCallback):
+    def __init__(self, tokenizer, sources, references, input_prefix="", batch_size=32, max_length=128):
+        self.tokenizer = tokenizer
+        self.sources = list(sources)
+        self.references = list(references)
+        self.input_prefix = input_prefix
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+    def on_evaluate(self, args, state, control, metrics=None, model=None, **kwargs):
+        start = time.perf_counter()
+        translations = translate(model, self.tokenizer, self.sources, self.input_prefix,
+                                 batch_size=self.batch_size, max_length=self.max_length)
+        scores = fast_quality_scores(translations, self.references)
+        for name, value in scores.items():
+            metrics[f"eval_{name}"] = value
+
+        if state.is_world_process_zero:
+            record = {"epoch": state.epoch, "step": state.global_step, **scores,
+                      "seconds": time.perf_counter() - start}
+            with open(os.path.join(args.output_dir, "quality_history.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            print(f"🎯 Epoch {state.epoch:.0f} — chrF: {scores['chrf']:.2f} | BLEU: {scores['bleu']:.2f} "
+                  f"({len(self.sources)} held-out verses, {record['seconds']:.1f}s)")
+
+
+def add_early_stopping_arguments(parser):
+    parser.add_argument("--early_stopping_patience", type=int, default=None,
+                        help="Stop after this many epochs without chrF improvement and keep the best checkpoint")
+    parser.add_argument("--quality_eval_size", type=int, default=200,
+                        help="Held-out verses decoded at each epoch for the chrF/BLEU check")
+
+
+# === TrainingArguments overrides when early stopping is enabled
+def early_stopping_training_arguments(args):
+    if args.early_stopping_patience is None:
+        return {}
+    return {
+        "eval_strategy": "epoch",
+        "load_best_model_at_end": True,
+        "metric_for_best_model": "chrf",
+        "greater_is_better": True,
+    }
+
+
+def early_stopping_callbacks(args, tokenizer, eval_dataset, input_prefix="", batch_size=32):
+    if args.early_stopping_patience is None:
+        return []
+    sources, references = held_out_subset(eval_dataset, size=args.quality_eval_size, seed=args.seed)
+    return [
+        TranslationQualityCallback(tokenizer, sources, references, input_prefix=input_prefix, batch_size=batch_size),
+        EarlyStoppingCallback(early_stopping_patience=args.early_stopping_patience),
+    ]
@@ -0,0 +1,180 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# === Shared by every evaluation script of the repository (ignored by git)
+DEFAULT_RESULTS_PATH = Path(__file__).resolve().parents[1] / "results_store" / "results.sqlite"
+COLUMNS = ["experiment", "dataset", "model", "reference", "metric", "verse_id", "score"]
+
+
+# === Long-format store of every sentence score
+# One row per (experiment, dataset, model, reference, metric, verse_id). The evaluation engine writes
+# the names it scored with, so nothing is parsed back out of the wide CSV column names; summaries are
+# GROUP BY queries on the indexed table instead of rereading every CSV. Writing a (dataset, model,
+# reference, metric) block replaces the rows of the previous run of that block.
+class ResultsStore:
+    def __init__(self, path=DEFAULT_RESULTS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (experiment TEXT, dataset TEXT, model TEXT, reference TEXT, "
+            "metric TEXT, verse_id TEXT, score REAL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_block ON results (experiment, metric, model, dataset, reference)"
+        )
+
+    def write(self, experiment, dataset, model, reference, metric, verse_ids, scores):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM results WHERE experiment = ? AND dataset = ? AND model = ? AND reference = ? AND metric = ?",
+                (experiment, dataset, model, reference, metric),
+            )
+            self.connection.executemany(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(experiment, dataset, model, reference, metric, str(verse_id), float(score))
+                 for verse_id, score in zip(verse_ids, scores)],
+            )
+        return len(scores)
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def size(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+# === Model name of a generated column: generated_translation_opus_clean → opus_clean
+def model_name(column, prefix="generated_translation_"):
+    return column[len(prefix):] if column.startswith(prefix) else column
+
+
+# === WHERE clause of the queries
+# The "multi" reference (best score over the references, evaluation --multi_reference) is derived from
+# the others: it would count every verse twice in the means, so it is only read when asked for
+def _filters(experiment=None, metric=None, reference=None):
+    clauses, params = [], []
+    if experiment:
+        clauses.append("experiment = ?")
+        params.append(experiment)
+    if metric:
+        clauses.append("metric = ?")
+        params.append(metric)
+    if reference:
+        clauses.append("reference = ?")
+        params.append(reference)
+    else:
+        clauses.append("reference != 'multi'")
+    return " WHERE " + " AND ".join(clauses), params
+
+
+# === Mean score per experiment / <by> / metric (by: model, dataset or reference — the test set)
+def summary(store, by="model", experiment=None, metric=None, reference=None):
+    where, params = _filters(experiment, metric, reference)
+    return store.query(
+        f"SELECT experiment, {by}, metric, AVG(score) AS avg_score, COUNT(*) AS scores FROM results{where} "
+        f"GROUP BY experiment, {by}, metric ORDER BY experiment, metric, avg_score DESC",
+        params,
+    )
+
+
+# === Best and worst <over> (dataset or reference) of each model and metric
+def best_worst(store, over="dataset", experiment=None, metric=None, reference=None):
+    where, params = _filters(experiment, metric, reference)
+    means = store.query(
+        f"SELECT experiment, model, metric, {over}, AVG(score) AS avg_score FROM results{where} "
+        f"GROUP BY experiment, model, metric, {over}",
+        params,
+    )
+    rows = []
+    for (exp, model, metric_name), group in means.groupby(["experiment", "model", "metric"]):
+        best, worst = group.loc[group["avg_score"].idxmax()], group.loc[group["avg_score"].idxmin()]
+        # TER counts edits: the lowest rate is the best
+        if metric_name == "ter":
+            best, worst = worst, best
+        rows.append({"experiment": exp, "model": model, "metric": metric_name,
+                     f"best_{over}": best[over], "best_score": best["avg_score"],
+                     f"worst_{over}": worst[over], "worst_score": worst["avg_score"]})
+    return pd.DataFrame(rows)
+
+
+# === Score CSVs written before the store existed: the metric and reference names are given, so
+# "{metric}_{reference}_{column}" columns are matched against them instead of split on "_"
+def ingest_csv(store, path, experiment, dataset, metrics, references):
+    df = pd.read_csv(path)
+    verse_ids = df["verse_id"] if "verse_id" in df.columns else df.index
+    written = 0
+    for column in df.columns:
+        for metric in metrics:
+            for reference in references:
+                prefix = f"{metric}_{reference}_"
+                if column.startswith(prefix):
+                    written += store.write(experiment, dataset, model_name(column[len(prefix):]), reference, metric,
+                                           verse_ids, df[column])
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the long-format evaluation results store.")
+    parser.add_argument("--results_path", default=str(DEFAULT_RESULTS_PATH), help="SQLite file of the store")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    summary_parser = subparsers.add_parser("summary", help="Mean score per model, dataset or test set")
+    summary_parser.add_argument("--by", choices=["model", "dataset", "reference"], default="model",
+                                help="Grouping (reference: per test set)")
+    best_parser = subparsers.add_parser("best_worst", help="Best and worst dataset or test set of each model")
+    best_parser.add_argument("--over", choices=["dataset", "reference"], default="dataset",
+                             help="Compared groups (reference: test sets)")
+    for subparser in (summary_parser, best_parser):
+        subparser.add_argument("--experiment", default=None, help="Only this experiment (e.g. \"experiment 4\")")
+        subparser.add_argument("--metric", default=None, help="Only this metric")
+        subparser.add_argument("--reference", default=None,
+                               help="Only this reference (multi: the best-of-references scores, left out otherwise)")
+        subparser.add_argument("--output", default=None, help="Also save the table to this CSV")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Load existing *_other_scores.csv / *_bleurt.csv files")
+    ingest_parser.add_argument("files", nargs="+", help="Score CSVs")
+    ingest_parser.add_argument("--experiment", required=True, help="Experiment of the files")
+    ingest_parser.add_argument("--metrics", nargs="+",
+                               default=["bleu", "chrf", "ter", "meteor", "bertscore", "comet", "bleurt"],
+                               help="Metric names of the score columns")
+    ingest_parser.add_argument("--references", nargs="+", default=["crampon", "segond", "darby"],
+                               help="Reference names of the score columns (e.g. french_segond in experiment 3)")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.results_path)
+    if args.mode == "ingest":
+        for path in args.files:
+            # The dataset is the file stem without the score suffix
+            dataset = Path(path).stem.replace("_other_scores", "").replace("_bleurt", "")
+            written = ingest_csv(store, path, args.experiment, dataset, args.metrics, args.references)
+            print(f"📥 {path}: {written:,} scores")
+        print(f"📦 {args.results_path}: {store.size():,} scores")
+    else:
+        start = time.perf_counter()
+        if args.mode == "summary":
+            table = summary(store, args.by, args.experiment, args.metric, args.reference)
+            pivot = table.pivot_table(index=["experiment", args.by], columns="metric", values="avg_score").round(4)
+        else:
+            table = best_worst(store, args.over, args.experiment, args.metric, args.reference)
+            pivot = table.round(4)
+        print(pivot.to_string())
+        print(f"\n⏱️ {(time.perf_counter() - start) * 1000:.0f} ms over {store.size():,} scores")
+        if args.output:
+            pivot.to_csv(args.output)
+            print(f"💾 File saved: {args.output}")
+
+# === Example: experiment 4 per model, per noise level, and best / worst noise level of each model
+# python3 -m coptic_nmt.results_store summary --experiment "experiment 4"
+# python3 -m coptic_nmt.results_store summary --experiment "experiment 4" --by dataset
+# python3 -m coptic_nmt.results_store best_worst --experiment "experiment 4" --over dataset
+# python3 -m coptic_nmt.results_store summary --experiment "experiment 4" --reference multi
+
+# === Example: experiment 3 per test set, after loading its existing score files
+# python3 -m coptic_nmt.results_store ingest "experiment 3/evaluation/evaluation scores/"*_other_scores.csv --experiment "experiment 3" --references french_segond french_darby french_crampon
+# python3 -m coptic_nmt.results_store summary --experiment "experiment 3" --by reference
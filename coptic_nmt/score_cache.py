@@ -0,0 +1,99 @@
+import argparse
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+# === Shared by every evaluation script of the repository (ignored by git)
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / "score_cache" / "scores.sqlite"
+
+
+def pair_key(candidate, reference, source=None):
+    text = "\x1f".join([candidate, reference, source if source is not None else ""])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# === Persistent per-pair metric scores
+# Keyed by (metric id, candidate, reference[, source]); the metric id carries the model / checkpoint,
+# so a different COMET model or BLEURT checkpoint never reuses scores. Least recently used entries
+# are evicted above max_entries. hits / misses / evictions are counted for the current session.
+class ScoreCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5_000_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores (metric TEXT, key TEXT, score REAL, last_used REAL, "
+            "PRIMARY KEY (metric, key))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.stats = {"hits": 0, "misses": 0, "inserted": 0, "evicted": 0}
+
+    def lookup(self, metric_id, keys, chunk_size=900):
+        found = {}
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            rows = self.connection.execute(
+                f"SELECT key, score FROM scores WHERE metric = ? AND key IN ({','.join('?' * len(chunk))})",
+                [metric_id, *chunk],
+            ).fetchall()
+            found.update(rows)
+        now = time.time()
+        with self.connection:
+            self.connection.executemany("UPDATE scores SET last_used = ? WHERE metric = ? AND key = ?",
+                                        [(now, metric_id, key) for key in found])
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def store(self, metric_id, keys, scores):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores (metric, key, score, last_used) VALUES (?, ?, ?, ?)",
+                [(metric_id, key, float(score), now) for key, score in zip(keys, scores)],
+            )
+        self.stats["inserted"] += len(keys)
+        self.evict()
+
+    def evict(self):
+        excess = self.size() - self.max_entries
+        if excess <= 0:
+            return
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM scores WHERE rowid IN (SELECT rowid FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+            )
+        self.stats["evicted"] += excess
+
+    def size(self):
+        return self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def summary(self):
+        return self.connection.execute(
+            "SELECT metric, COUNT(*), MIN(last_used), MAX(last_used) FROM scores GROUP BY metric ORDER BY metric"
+        ).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the persistent metric score cache.")
+    parser.add_argument("--cache_path", default=str(DEFAULT_CACHE_PATH), help="SQLite file of the cache")
+    parser.add_argument("--max_entries", type=int, default=None, help="Evict least recently used entries above this")
+    parser.add_argument("--clear_metric", default=None, help="Drop every score of this metric id")
+    args = parser.parse_args()
+
+    cache = ScoreCache(args.cache_path)
+    if args.clear_metric:
+        with cache.connection:
+            deleted = cache.connection.execute("DELETE FROM scores WHERE metric = ?", (args.clear_metric,)).rowcount
+        print(f"🗑️ {deleted:,} scores of {args.clear_metric} removed")
+    if args.max_entries is not None:
+        cache.max_entries = args.max_entries
+        cache.evict()
+        print(f"✂️ {cache.stats['evicted']:,} least recently used scores evicted")
+
+    print(f"📦 {args.cache_path}: {cache.size():,} scores, {Path(args.cache_path).stat().st_size / 1e6:.1f} MB")
+    for metric, count, oldest, newest in cache.summary():
+        print(f"   {metric}: {count:,} scores (last used {time.strftime('%Y-%m-%d', time.localtime(newest))})")
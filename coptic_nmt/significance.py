@@ -0,0 +1,52 @@
+import numpy as np
+
+
+# === Paired significance tests between every pair of systems scored on the same segments
+# table: DataFrame with one column of sentence scores per system (rows = segments, NaN rows dropped).
+# Both tests draw one random matrix shared by all systems / pairs, so everything is a matrix product:
+# - paired bootstrap: an index matrix (n_resamples x segments) resamples the segments with replacement;
+#   the per-system means of all resamples are scores @ counts.T. p = share of resamples where the
+#   system with the higher mean is not ahead (Koehn 2004), with the 95% interval of the difference.
+# - approximate randomization: a sign matrix swaps the two outputs of each segment at random;
+#   p = (1 + permutations with |mean difference| >= observed) / (1 + n_resamples).
+def pairwise_significance(table, n_resamples=1000, seed=42, higher_is_better=True, alpha=0.05):
+    table = table.dropna()
+    systems = list(table.columns)
+    scores = table.to_numpy(dtype=np.float64).T
+    n = scores.shape[1]
+    if len(systems) < 2 or n == 0:
+        return []
+    rng = np.random.default_rng(seed)
+
+    indices = rng.integers(0, n, size=(n_resamples, n))
+    counts = np.bincount((indices + n * np.arange(n_resamples)[:, None]).ravel(), minlength=n_resamples * n)
+    means = scores @ counts.reshape(n_resamples, n).T / n
+    signs = rng.choice([-1.0, 1.0], size=(n_resamples, n))
+
+    a, b = np.triu_indices(len(systems), k=1)
+    differences = scores[a] - scores[b]
+    observed = differences.mean(axis=1)
+    resampled = means[a] - means[b]
+    low, high = np.percentile(resampled, [2.5, 97.5], axis=1)
+    bootstrap_p = np.where(observed >= 0, (resampled <= 0).mean(axis=1), (resampled >= 0).mean(axis=1))
+    permuted = np.abs(differences @ signs.T) / n
+    randomization_p = ((permuted >= np.abs(observed)[:, None] - 1e-12).sum(axis=1) + 1) / (n_resamples + 1)
+
+    rows = []
+    for k, (i, j) in enumerate(zip(a, b)):
+        ahead = i if (observed[k] >= 0) == higher_is_better else j
+        rows.append({
+            "model_a": systems[i],
+            "model_b": systems[j],
+            "segments": n,
+            "mean_a": scores[i].mean(),
+            "mean_b": scores[j].mean(),
+            "difference": observed[k],
+            "ci_low": low[k],
+            "ci_high": high[k],
+            "bootstrap_p": bootstrap_p[k],
+            "randomization_p": randomization_p[k],
+            "better_model": systems[ahead] if observed[k] != 0 else "tie",
+            "significant": bool(bootstrap_p[k] < alpha and randomization_p[k] < alpha),
+        })
+    return rows
@@ -0,0 +1,176 @@
+import argparse
+import glob
+import math
+import os
+import zlib
+from pathlib import Path
+
+from transformers import TrainerCallback
+
+from coptic_nmt.data_cache import make_preprocess_function
+
+COLUMNS = ["verse_id", "coptic_text_romanized", "french_translation"]
+
+
+def add_streaming_arguments(parser):
+    parser.add_argument("--shards", nargs="+", default=None,
+                        help="Parquet shard patterns streamed instead of --data_path, one pattern per source "
+                             "(e.g. \"shards/*segond*.parquet\" \"shards/*noisy*.parquet\")")
+    parser.add_argument("--shard_weights", nargs="+", type=float, default=None,
+                        help="Sampling weight of each --shards source (default: proportional to its rows)")
+    parser.add_argument("--shuffle_buffer", type=int, default=10000, help="Examples held in the streaming shuffle buffer")
+    parser.add_argument("--heldout_fraction", type=float, default=0.02,
+                        help="Share of verse_ids held out of the stream for evaluation")
+    parser.add_argument("--streaming_eval_size", type=int, default=2000,
+                        help="Held-out examples materialized as the evaluation set")
+
+
+# === --data_path and --shards are alternatives; CSV-only options are rejected when streaming
+def check_data_arguments(parser, args, csv_only=()):
+    if not args.shards:
+        if not args.data_path:
+            parser.error("--data_path or --shards is required.")
+        return
+    if args.shard_weights and len(args.shard_weights) != len(args.shards):
+        parser.error("--shard_weights needs one weight per --shards pattern.")
+    if args.max_tokens_per_batch:
+        parser.error("--max_tokens_per_batch needs the lengths of a materialized dataset, not --shards.")
+    for option in csv_only:
+        if getattr(args, option):
+            parser.error(f"--{option} is not available with --shards.")
+
+
+def shard_files(pattern):
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No Parquet shard matches {pattern}")
+    return files
+
+
+# === Row counts come from the Parquet footers, nothing is read
+def count_rows(files):
+    import pyarrow.parquet as pq
+
+    return sum(pq.ParquetFile(f).metadata.num_rows for f in files)
+
+
+# === Stable verse-level split: every version / noisy copy of a held-out verse stays out of training
+def is_heldout(verse_id, fraction, seed=42):
+    return zlib.crc32(f"{seed}-{verse_id}".encode("utf-8")) % 10000 < fraction * 10000
+
+
+# === Weighted interleaving of the sources + shuffle buffer, tokenized on the fly
+# Returns {"train": IterableDataset, "test": Dataset} and the rows of the sources (one "epoch").
+def load_streaming_datasets(args, tokenizer, input_prefix="", max_length=128):
+    from datasets import Dataset, interleave_datasets, load_dataset
+    from datasets.distributed import split_dataset_by_node
+
+    sources = [shard_files(pattern) for pattern in args.shards]
+    rows = [count_rows(files) for files in sources]
+    weights = args.shard_weights or rows
+    probabilities = [w / sum(weights) for w in weights]
+    for pattern, files, n, p in zip(args.shards, sources, rows, probabilities):
+        print(f"🌊 {pattern}: {len(files)} shards, {n:,} rows, sampled with p={p:.3f}")
+
+    streams = [
+        load_dataset("parquet", data_files=files, split="train", streaming=True).select_columns(COLUMNS)
+        for files in sources
+    ]
+    # all_exhausted: an up-weighted source is repeated until every source has been seen once
+    mixture = interleave_datasets(streams, probabilities=probabilities, seed=args.seed,
+                                  stopping_strategy="all_exhausted")
+
+    # One filter per split (chained filters of a stream fail in datasets 3.x)
+    fraction, seed = args.heldout_fraction, args.seed
+
+    def complete(ex):
+        return ex["coptic_text_romanized"] is not None and ex["french_translation"] is not None
+
+    train = mixture.filter(lambda ex: complete(ex) and not is_heldout(ex["verse_id"], fraction, seed))
+    heldout = mixture.filter(lambda ex: complete(ex) and is_heldout(ex["verse_id"], fraction, seed))
+
+    # DDP: each rank reads its own part of the stream (whole shards when they divide evenly). This is
+    # the only split: CopticTrainer keeps accelerate from sharding the stream again
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    if world_size > 1:
+        train = split_dataset_by_node(train, rank=int(os.environ.get("RANK", 0)), world_size=world_size)
+
+    preprocess = make_preprocess_function(tokenizer, input_prefix, max_length)
+    train = train.shuffle(seed=args.seed, buffer_size=args.shuffle_buffer)
+    train = train.map(preprocess, batched=True, remove_columns=COLUMNS)
+
+    # The evaluation set is small and materialized (early stopping needs random access and a length)
+    test = Dataset.from_list(list(heldout.take(args.streaming_eval_size)))
+    test = test.map(preprocess, batched=True)
+    print(f"🧪 {len(test):,} held-out examples ({fraction:.1%} of verse ids) for evaluation")
+    return {"train": train, "test": test}, sum(rows)
+
+
+# === An IterableDataset has no length: an epoch is the rows of all sources (100 in test mode)
+# and the number of epochs becomes max_steps
+def streaming_steps_per_epoch(args, epoch_rows):
+    examples_per_step = args.batch_size * args.gradient_accumulation_steps * int(os.environ.get("WORLD_SIZE", 1))
+    return math.ceil((100 if args.test else epoch_rows) / examples_per_step)
+
+
+def streaming_training_arguments(args, num_epochs, epoch_rows):
+    if not args.shards:
+        return {}
+    steps_per_epoch = streaming_steps_per_epoch(args, epoch_rows)
+    print(f"🧭 Streaming: {num_epochs} epoch(s) of {steps_per_epoch:,} optimizer steps")
+    # Ranks are already fed from their own split of the stream (CopticTrainer does not let accelerate
+    # shard it again), batches are not dispatched from rank 0
+    return {"max_steps": num_epochs * steps_per_epoch, "accelerator_config": {"dispatch_batches": False}}
+
+
+# === Epoch-end checkpoints / evaluations of the streamed run
+# Trainer only sees an epoch end when the stream is exhausted, so saving (and the chrF check
+# of early stopping) is triggered every steps_per_epoch optimizer steps instead.
+class StreamingEpochCallback(TrainerCallback):
+    def __init__(self, steps_per_epoch, evaluate=False):
+        self.steps_per_epoch = steps_per_epoch
+        self.evaluate = evaluate
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if state.global_step % self.steps_per_epoch == 0:
+            control.should_save = True
+            control.should_evaluate = self.evaluate
+        return control
+
+
+def streaming_callbacks(args, epoch_rows):
+    if not args.shards:
+        return []
+    return [StreamingEpochCallback(streaming_steps_per_epoch(args, epoch_rows),
+                                   evaluate=args.early_stopping_patience is not None)]
+
+
+# === Conversion of per-source CSVs (e.g. *_romanized.csv) into Parquet shards, instead of one merged CSV
+def write_parquet_shards(csv_path, output_dir, rows_per_shard=50000):
+    import pandas as pd
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(csv_path).stem
+    written = []
+    for i, chunk in enumerate(pd.read_csv(csv_path, usecols=COLUMNS, chunksize=rows_per_shard)):
+        path = output_dir / f"{stem}-{i:05d}.parquet"
+        chunk.to_parquet(path, index=False)
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write Parquet training shards from corpus CSV files.")
+    parser.add_argument("--csv", nargs="+", required=True, help="Corpus CSV files (one or more sources)")
+    parser.add_argument("--output_dir", required=True, help="Folder of the Parquet shards")
+    parser.add_argument("--rows_per_shard", type=int, default=50000, help="Rows per Parquet file")
+    args = parser.parse_args()
+
+    for csv_path in args.csv:
+        shards = write_parquet_shards(csv_path, args.output_dir, args.rows_per_shard)
+        print(f"✅ {csv_path} → {len(shards)} shard(s) in {args.output_dir}")
+
+# === Example: one shard set per source file, then a 2:1 Segond/Crampon mixture in a finetune script
+# python3 -m coptic_nmt.streaming --csv data/*_romanized.csv --output_dir shards
+# python3 finetune_opus_coptic_fr.py --shards "shards/*segond*.parquet" "shards/*crampon*.parquet" --shard_weights 2 1 --output_dir opus-streamed
@@ -0,0 +1,201 @@
+import argparse
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+RUN_INDEX = "run_index.json"
+
+
+# === Config loading (TOML with the standard library, YAML if PyYAML is installed)
+def load_config(path):
+    path = Path(path)
+    if path.suffix == ".toml":
+        import tomllib
+
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+# === Expansion of the matrix: models x training files x hyperparameter grid
+def expand_runs(config):
+    grid = config.get("hyperparameters", {})
+    names = sorted(grid)
+    values = [v if isinstance(v, list) else [v] for v in (grid[n] for n in names)]
+    extra_args = config["sweep"].get("extra_args", [])
+
+    runs = []
+    for model in config["models"]:
+        for data in config["data"]:
+            for combination in itertools.product(*values):
+                params = dict(zip(names, combination))
+                suffix = "-".join(f"{k}{v}" for k, v in params.items())
+                run_id = "-".join(filter(None, [model["name"], data["name"], suffix]))
+                runs.append({
+                    "run_id": run_id,
+                    "script": model["script"],
+                    "data_path": data["path"],
+                    "params": params,
+                    "extra_args": model.get("extra_args", []) + data.get("extra_args", []) + extra_args,
+                })
+    return runs
+
+
+# === CPU slots: each node is split into disjoint core ranges of `cores_per_run` cores
+def build_slots(config):
+    cores_per_run = config["sweep"]["cores_per_run"]
+    nodes = config["sweep"].get("nodes", [{"host": "localhost", "cores": os.cpu_count()}])
+    slots = []
+    for node in nodes:
+        for first in range(0, node["cores"] - cores_per_run + 1, cores_per_run):
+            slots.append({"host": node["host"], "cores": f"{first}-{first + cores_per_run - 1}"})
+    if not slots:
+        raise ValueError("cores_per_run is larger than the cores of every node.")
+    return slots
+
+
+def run_command(run, output_dir, cores_per_run, python=sys.executable):
+    command = [
+        python,
+        str(REPO_ROOT / run["script"]),
+        "--data_path", run["data_path"],
+        "--output_dir", str(output_dir),
+        "--num_threads", str(cores_per_run),
+    ]
+    for name, value in run["params"].items():
+        command += [f"--{name}", str(value)]
+    return command + [str(a) for a in run["extra_args"]]
+
+
+# === Pinning of a command to a slot (taskset core range, ssh for remote nodes)
+def pin_to_slot(command, slot, cores_per_run):
+    command = ["taskset", "-c", slot["cores"]] + command
+    if slot["host"] == "localhost":
+        return command
+    env_prefix = f"OMP_NUM_THREADS={cores_per_run} MKL_NUM_THREADS={cores_per_run}"
+    return ["ssh", slot["host"], f"cd {shlex.quote(str(REPO_ROOT))} && {env_prefix} {shlex.join(command)}"]
+
+
+def launch(command, cores_per_run, log_path):
+    log_file = open(log_path, "a", encoding="utf-8")
+    env = dict(os.environ, OMP_NUM_THREADS=str(cores_per_run), MKL_NUM_THREADS=str(cores_per_run))
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, env=env, cwd=REPO_ROOT)
+    return process, log_file
+
+
+# === Run index: status, timings and artifacts of every run, rewritten after each change
+class RunIndex:
+    def __init__(self, output_root):
+        self.path = Path(output_root) / RUN_INDEX
+        self.runs = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+
+    def update(self, run_id, **fields):
+        self.runs.setdefault(run_id, {}).update(fields)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.runs, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def collect_artifacts(output_dir):
+    names = ["model.safetensors", "pytorch_model.bin", "adapter_model.safetensors", "telemetry.jsonl",
+             "quality_history.jsonl", "epoch_times.jsonl", "run.log"]
+    artifacts = [str(output_dir / n) for n in names if (output_dir / n).exists()]
+    checkpoints = sorted(p.name for p in output_dir.glob("checkpoint-*"))
+    return {"files": artifacts, "checkpoints": checkpoints}
+
+
+# === Scheduler: one run per free slot, interrupted or failed runs are resumed on the next call
+# (the finetune scripts restart from their last checkpoint-* automatically).
+# Runs start from the repository root, so data paths of the config are relative to it
+# and all runs share the tokenized dataset cache.
+def run_sweep(config, output_root, poll_seconds=10, dry_run=False):
+    output_root = Path(output_root).resolve()
+    output_root.mkdir(parents=True, exist_ok=True)
+    cores_per_run = config["sweep"]["cores_per_run"]
+    index = RunIndex(output_root)
+    slots = build_slots(config)
+
+    pending = [r for r in expand_runs(config) if index.runs.get(r["run_id"], {}).get("status") != "done"]
+    print(f"📋 {len(pending)} runs to schedule on {len(slots)} slots of {cores_per_run} cores "
+          f"({len(index.runs)} runs already indexed)")
+
+    running = {}  # slot position -> (run, process, start time, log file)
+    try:
+        while pending or running:
+            for position, slot in enumerate(slots):
+                if position in running or not pending:
+                    continue
+                run = pending.pop(0)
+                output_dir = output_root / run["run_id"]
+                output_dir.mkdir(parents=True, exist_ok=True)
+                python = config["sweep"].get("python", sys.executable)
+                command = pin_to_slot(run_command(run, output_dir, cores_per_run, python), slot, cores_per_run)
+                resumed = index.runs.get(run["run_id"], {}).get("status") in ("running", "failed", "interrupted")
+                print(f"▶️ {run['run_id']} on {slot['host']} cores {slot['cores']}"
+                      f"{' (resuming)' if resumed else ''}")
+                if dry_run:
+                    print("   " + shlex.join(command))
+                    continue
+
+                process, log_file = launch(command, cores_per_run, output_dir / "run.log")
+                running[position] = (run, process, time.time(), log_file)
+                previous_seconds = index.runs.get(run["run_id"], {}).get("seconds", 0.0)
+                index.update(run["run_id"], status="running", host=slot["host"], cores=slot["cores"],
+                             command=command, output_dir=str(output_dir), params=run["params"],
+                             data_path=run["data_path"], started=time.strftime("%Y-%m-%d %H:%M:%S"),
+                             previous_seconds=previous_seconds)
+
+            for position, (run, process, start, log_file) in list(running.items()):
+                if process.poll() is None:
+                    continue
+                log_file.close()
+                del running[position]
+                entry = index.runs[run["run_id"]]
+                seconds = entry.get("previous_seconds", 0.0) + time.time() - start
+                status = "done" if process.returncode == 0 else "failed"
+                index.update(run["run_id"], status=status, returncode=process.returncode, seconds=seconds,
+                             finished=time.strftime("%Y-%m-%d %H:%M:%S"),
+                             artifacts=collect_artifacts(Path(entry["output_dir"])))
+                print(f"{'✅' if status == 'done' else '❌'} {run['run_id']} {status} after {seconds / 60:.1f} min")
+
+            if running:
+                time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        print("\n⏹️ Interrupted: stopping running jobs, rerun the same command to resume them.")
+        for run, process, start, log_file in running.values():
+            process.terminate()
+            process.wait()
+            log_file.close()
+            entry = index.runs[run["run_id"]]
+            index.update(run["run_id"], status="interrupted",
+                         seconds=entry.get("previous_seconds", 0.0) + time.time() - start)
+        raise
+
+    failed = [run_id for run_id, entry in index.runs.items() if entry.get("status") == "failed"]
+    print(f"\n📒 Run index: {index.path} ({len(failed)} failed runs)")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fine-tuning sweep from a TOML/YAML matrix, with resume.")
+    parser.add_argument("config", help="Sweep configuration (.toml, .yaml or .yml)")
+    parser.add_argument("--output_root", default=None, help="Overrides sweep.output_root of the config")
+    parser.add_argument("--poll_seconds", type=int, default=10, help="Polling interval of running jobs")
+    parser.add_argument("--dry_run", action="store_true", help="Only print the commands")
+    args = parser.parse_args()
+
+    sweep_config = load_config(args.config)
+    run_sweep(sweep_config, args.output_root or sweep_config["sweep"]["output_root"],
+              poll_seconds=args.poll_seconds, dry_run=args.dry_run)
+
+# === Example run (from the repository root)
+# python3 -m coptic_nmt.sweep sweeps/experiment_4_noise.toml
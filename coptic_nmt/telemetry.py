@@ -0,0 +1,121 @@
+import json
+import os
+import resource
+import time
+
+from transformers import TrainerCallback
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# === Training throughput telemetry
+# Per optimizer step: wall time, source/target tokens per second (padding excluded), padding
+# ratio, time spent fetching batches from the train dataloader, peak RSS and learning rate, written to
+# telemetry.jsonl (telemetry_rank<N>.jsonl with several processes). A summary is printed at the end of each
+# epoch. CopticTrainer reports the batch contents (training_step) and times the batch fetches
+# (get_batch_samples), so optimizer steps, logging, evaluation and checkpoint saves are not counted as wait.
+# Evaluation and checkpoint saves run between two steps: their time is kept out of the next step's
+# wall time and shown separately in the epoch summary.
+class TelemetryCallback(TrainerCallback):
+    def __init__(self):
+        self.output_path = None
+        self.reset_step()
+        self.epoch_records = []
+        self.step_start = None
+        self.epoch_pauses = 0.0
+
+    def reset_step(self):
+        self.src_tokens = self.tgt_tokens = 0
+        self.src_padded = self.tgt_padded = 0
+        self.data_wait = 0.0
+
+    # === Hooks called by CopticTrainer
+    def timed_batches(self, iterator):
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                return
+            self.data_wait += time.perf_counter() - start
+            yield batch
+
+    def record_batch(self, inputs):
+        if "attention_mask" in inputs:
+            self.src_tokens += int(inputs["attention_mask"].sum())
+            self.src_padded += inputs["attention_mask"].numel()
+        if "labels" in inputs:
+            labels = inputs["labels"]
+            self.tgt_tokens += int((labels != -100).sum())
+            self.tgt_padded += labels.numel()
+
+    # === Trainer events
+    def on_train_begin(self, args, state, control, **kwargs):
+        os.makedirs(args.output_dir, exist_ok=True)
+        name = "telemetry.jsonl" if args.world_size == 1 else f"telemetry_rank{args.process_index}.jsonl"
+        self.output_path = os.path.join(args.output_dir, name)
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.epoch_records = []
+        self.epoch_pauses = 0.0
+        self.epoch_start = time.perf_counter()
+        self.step_start = self.epoch_start
+        if state.is_world_process_zero:
+            print(f"\n🚀 Starting epoch {int(state.epoch) + 1}")
+
+    def on_step_end(self, args, state, control, lr_scheduler=None, **kwargs):
+        now = time.perf_counter()
+        wall_time = now - self.step_start
+        padded = self.src_padded + self.tgt_padded
+        record = {
+            "step": state.global_step,
+            "epoch": state.epoch,
+            "wall_time": wall_time,
+            "src_tokens": self.src_tokens,
+            "tgt_tokens": self.tgt_tokens,
+            "src_tokens_per_sec": self.src_tokens / wall_time,
+            "tgt_tokens_per_sec": self.tgt_tokens / wall_time,
+            "padding_ratio": 1 - (self.src_tokens + self.tgt_tokens) / padded if padded else 0.0,
+            "data_wait": self.data_wait,
+            "peak_rss_mb": peak_rss_mb(),
+            "learning_rate": lr_scheduler.get_last_lr()[0] if lr_scheduler is not None else None,
+        }
+        self.epoch_records.append(record)
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.reset_step()
+        self.step_start = now
+
+    # Evaluation / checkpoint save just finished: the next step starts now
+    def pause_end(self):
+        if self.step_start is None:  # trainer.evaluate() outside of training
+            return
+        now = time.perf_counter()
+        self.epoch_pauses += now - self.step_start
+        self.step_start = now
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        self.pause_end()
+
+    def on_save(self, args, state, control, **kwargs):
+        self.pause_end()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        if state.is_world_process_zero:
+            print(f"✅ End of epoch {int(state.epoch)} - Step {state.global_step}")
+        records = self.epoch_records
+        if not records:
+            return
+        epoch_time = time.perf_counter() - self.epoch_start
+        wall = sum(r["wall_time"] for r in records)
+        src = sum(r["src_tokens"] for r in records)
+        tgt = sum(r["tgt_tokens"] for r in records)
+        wait = sum(r["data_wait"] for r in records)
+        padding = sum(r["padding_ratio"] for r in records) / len(records)
+        print(f"📈 {len(records)} steps in {epoch_time:.1f}s | {wall / len(records):.2f}s/step | "
+              f"{src / wall:.0f} src + {tgt / wall:.0f} tgt tokens/s | padding {padding:.1%} | "
+              f"data wait {wait / wall:.1%} | evaluation / saving {self.epoch_pauses:.1f}s | "
+              f"peak RSS {records[-1]['peak_rss_mb']:.0f} MB\n")
@@ -0,0 +1,122 @@
+import os
+
+import datasets
+from torch.utils.data import DataLoader
+from transformers import Trainer, TrainerCallback
+from transformers.trainer_utils import get_last_checkpoint
+
+from coptic_nmt.batching import TokenBudgetBatchSampler, example_lengths
+from coptic_nmt.multi_reference import multi_reference_loss
+from coptic_nmt.telemetry import TelemetryCallback
+
+
+# === Trainer shared by the finetune scripts
+# multi_reference: batches come from MultiReferenceCollator and the encoder runs once per source.
+# max_tokens_per_batch: training batches are length-grouped and capped by a padded-token budget
+# instead of per_device_train_batch_size.
+# A streamed training set (datasets.IterableDataset) is already split per rank by
+# load_streaming_datasets, so with several processes it is not passed to accelerator.prepare,
+# which would shard it a second time.
+# A TelemetryCallback among the callbacks receives the content of every batch and the time spent fetching it.
+class CopticTrainer(Trainer):
+    def __init__(self, *args, multi_reference=False, max_tokens_per_batch=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.multi_reference = multi_reference
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.telemetry = next(
+            (cb for cb in self.callback_handler.callbacks if isinstance(cb, TelemetryCallback)), None
+        )
+
+    def get_batch_samples(self, epoch_iterator, *args, **kwargs):
+        if self.telemetry is not None:
+            epoch_iterator = self.telemetry.timed_batches(epoch_iterator)
+        return super().get_batch_samples(epoch_iterator, *args, **kwargs)
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        if self.telemetry is not None:
+            self.telemetry.record_batch(inputs)
+        return super().training_step(model, inputs, *args, **kwargs)
+
+    # The references of a multi-reference example are not forward() arguments but must reach the collator
+    def _set_signature_columns_if_needed(self):
+        super()._set_signature_columns_if_needed()
+        if self.multi_reference and "references" not in self._signature_columns:
+            self._signature_columns.append("references")
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        if self.multi_reference:
+            encoder = self.accelerator.unwrap_model(model).get_encoder()
+            return multi_reference_loss(model, encoder, inputs, return_outputs=return_outputs)
+        return super().compute_loss(model, inputs, return_outputs=return_outputs, **kwargs)
+
+    def get_train_dataloader(self):
+        if isinstance(self.train_dataset, datasets.IterableDataset) and self.args.world_size > 1:
+            return EpochDataLoader(
+                self.train_dataset,
+                batch_size=self._train_batch_size,
+                collate_fn=self.data_collator,
+                num_workers=self.args.dataloader_num_workers,
+                pin_memory=self.args.dataloader_pin_memory,
+            )
+        if self.max_tokens_per_batch is None:
+            return super().get_train_dataloader()
+
+        train_dataset = self.train_dataset
+        batch_sampler = TokenBudgetBatchSampler(
+            example_lengths(train_dataset),
+            self.max_tokens_per_batch,
+            seed=self.args.seed,
+            num_replicas=self.args.world_size,
+            rank=self.args.process_index,
+        )
+        if isinstance(train_dataset, datasets.Dataset):
+            train_dataset = self._remove_unused_columns(train_dataset, description="training")
+
+        # Not passed through accelerator.prepare: the sampler already shards batches per rank, and
+        # the epoch of its shuffle is set by a callback instead of the Trainer
+        self.remove_callback(BatchSamplerEpochCallback)
+        self.add_callback(BatchSamplerEpochCallback(batch_sampler))
+        return DataLoader(
+            train_dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+
+
+# === DataLoader forwarding the Trainer's set_epoch to its dataset (shuffle of a streamed dataset)
+class EpochDataLoader(DataLoader):
+    def set_epoch(self, epoch):
+        self.dataset.set_epoch(epoch)
+
+
+# === Callback setting the shuffle epoch of a TokenBudgetBatchSampler
+# state.epoch is restored from the checkpoint on resume, so the resumed epoch gets its own batch
+# order and the Trainer skips the batches of that order already trained on.
+class BatchSamplerEpochCallback(TrainerCallback):
+    def __init__(self, batch_sampler):
+        self.batch_sampler = batch_sampler
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.batch_sampler.set_epoch(int(state.epoch))
+
+
+# === Hyperparameters exposed on the command line (defaults = values used in the paper)
+def add_hyperparameter_arguments(parser, learning_rate=5e-5, batch_size=32, num_epochs=15,
+                                 gradient_accumulation_steps=1):
+    parser.add_argument("--learning_rate", type=float, default=learning_rate, help="Learning rate")
+    parser.add_argument("--batch_size", type=int, default=batch_size, help="Per-device train/eval batch size")
+    parser.add_argument("--num_epochs", type=int, default=num_epochs, help="Number of training epochs")
+    parser.add_argument("--gradient_accumulation_steps", type=int, default=gradient_accumulation_steps,
+                        help="Batches accumulated per optimizer step")
+
+
+# === Latest checkpoint-* of an output directory, None for a fresh run
+def last_checkpoint(output_dir):
+    if not os.path.isdir(output_dir):
+        return None
+    checkpoint = get_last_checkpoint(output_dir)
+    if checkpoint is not None:
+        print(f"🔁 Resuming from checkpoint: {checkpoint}")
+    return checkpoint
@@ -1,59 +1,83 @@
 import argparse
 import os
+import sys
+from pathlib import Path
 import pandas as pd
-from datasets import Dataset
 from transformers import (
     MarianTokenizer,
     MarianMTModel,
     TrainingArguments,
-    Trainer,
-    TrainerCallback,
-    TrainerState,
-    TrainerControl,
     DataCollatorForSeq2Seq,
 )
 
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.data_cache import load_tokenized_dataset
+from coptic_nmt.device import add_device_arguments, configure_cpu_threads, device_training_arguments
+from coptic_nmt.distributed import add_distributed_arguments, configure_distributed, distributed_training_arguments
+from coptic_nmt.quality import add_early_stopping_arguments, early_stopping_callbacks, early_stopping_training_arguments
+from coptic_nmt.streaming import (
+    add_streaming_arguments,
+    check_data_arguments,
+    load_streaming_datasets,
+    streaming_callbacks,
+    streaming_training_arguments,
+)
+from coptic_nmt.telemetry import TelemetryCallback
+from coptic_nmt.trainer import CopticTrainer, add_hyperparameter_arguments, last_checkpoint
+
 # === Argument parser for test mode
 parser = argparse.ArgumentParser()
+parser.add_argument("--data_path", type=str,
+                    default="/home/chaouin/projects/def-richy/chaouin/data/train_segond_all_data.csv",
+                    help="Path to the training CSV file (ignored with --shards)")
+parser.add_argument("--output_dir", type=str, default=None, help="Output directory (default depends on --test)")
 parser.add_argument("--test", action="store_true", help="Quick test mode (sample + 1 epoch)")
+parser.add_argument("--cache_dir", type=str, default="tokenized_cache", help="Folder of the tokenized dataset cache")
+parser.add_argument("--seed", type=int, default=42, help="Seed of the train/test split")
+parser.add_argument("--max_tokens_per_batch", type=int, default=None,
+                    help="Length-grouped batches capped by this many padded tokens instead of a fixed batch size")
+add_hyperparameter_arguments(parser)
+add_early_stopping_arguments(parser)
+add_device_arguments(parser)
+add_distributed_arguments(parser)
+add_streaming_arguments(parser)
 args = parser.parse_args()
+check_data_arguments(parser, args)
+configure_distributed(args, parser)
+configure_cpu_threads(args)
 
 # === Enable offline mode
 model_path = ""  # path redacted
 os.environ["TRANSFORMERS_OFFLINE"] = "1"
 os.environ["TRANSFORMERS_CACHE"] = model_path
 
-# === Load training data
-df = pd.read_csv("/home/chaouin/projects/def-richy/chaouin/data/train_segond_all_data.csv")
+# === Load training data (Parquet shards are streamed instead with --shards)
+if not args.shards:
+    df = pd.read_csv(args.data_path)
 
 # === Reduce dataset size if test mode is active
 if args.test:
-    df = df.sample(n=100, random_state=42)
-    output_dir = "test-output"
+    if not args.shards:
+        df = df.sample(n=100, random_state=42)
+    output_dir = args.output_dir or "test-output"
     num_epochs = 1
 else:
-    output_dir = "megalaa-finetuned-coptic-fr-segond-all-data"
-    num_epochs = 15
-
-# === Create Hugging Face dataset
-dataset = Dataset.from_pandas(df)
-dataset = dataset.train_test_split(test_size=0.1)
+    output_dir = args.output_dir or "megalaa-finetuned-coptic-fr-segond-all-data"
+    num_epochs = args.num_epochs
 
 # === Load tokenizer and model
 tokenizer = MarianTokenizer.from_pretrained(model_path, local_files_only=True)
 model = MarianMTModel.from_pretrained(model_path, local_files_only=True, use_safetensors=False)
 
-# === Preprocessing function
-def preprocess_function(examples):
-    inputs = examples["coptic_text_romanized"]
-    targets = examples["french_translation"]
-
-    model_inputs = tokenizer(inputs, max_length=128, truncation=True)
-    labels = tokenizer(text_target=targets, max_length=128, truncation=True)
-    model_inputs["labels"] = labels["input_ids"]
-    return model_inputs
-
-tokenized_datasets = dataset.map(preprocess_function, batched=True)
+# === Seeded split + tokenization (reused from the on-disk cache when available), or streamed shards
+if args.shards:
+    tokenized_datasets, epoch_rows = load_streaming_datasets(args, tokenizer, input_prefix="", max_length=128)
+else:
+    tokenized_datasets = load_tokenized_dataset(
+        df, tokenizer, cache_dir=args.cache_dir, input_prefix="", max_length=128, seed=args.seed
+    )
+    epoch_rows = None
 
 # === Data collator
 data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
@@ -61,37 +85,38 @@ data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
 # === Training arguments
 training_args = TrainingArguments(
     output_dir=output_dir,
-    learning_rate=5e-5,
-    per_device_train_batch_size=32,
-    per_device_eval_batch_size=32,
+    learning_rate=args.learning_rate,
+    per_device_train_batch_size=args.batch_size,
+    per_device_eval_batch_size=args.batch_size,
+    gradient_accumulation_steps=args.gradient_accumulation_steps,
     weight_decay=0.01,
     save_total_limit=3,
     num_train_epochs=num_epochs,
     logging_dir="./logs_megalaa",
     save_strategy="epoch",
+    **device_training_arguments(args, model),
+    **distributed_training_arguments(args),
+    **early_stopping_training_arguments(args),
+    **streaming_training_arguments(args, num_epochs, epoch_rows),
 )
 
-# === Custom callback for logging
-class CustomLoggerCallback(TrainerCallback):
-    def on_epoch_begin(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"\n🚀 Starting epoch {int(state.epoch) + 1}")
-
-    def on_epoch_end(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"✅ Finished epoch {int(state.epoch)} - Step {state.global_step}\n")
+# === Early stopping on in-loop chrF (only with --early_stopping_patience)
+quality_callbacks = early_stopping_callbacks(args, tokenizer, tokenized_datasets["test"], batch_size=args.batch_size)
 
 # === Trainer
-trainer = Trainer(
+trainer = CopticTrainer(
     model=model,
     args=training_args,
     train_dataset=tokenized_datasets["train"],
     eval_dataset=tokenized_datasets["test"],
     tokenizer=tokenizer,
     data_collator=data_collator,
-    callbacks=[CustomLoggerCallback()]
+    callbacks=[TelemetryCallback()] + quality_callbacks + streaming_callbacks(args, epoch_rows),
+    max_tokens_per_batch=args.max_tokens_per_batch,
 )
 
 # === Fine-tune the model
-trainer.train()
+trainer.train(resume_from_checkpoint=last_checkpoint(training_args.output_dir))
 
 # === Save the best model
-trainer.save_model(f"./{output_dir}")
+trainer.save_model(output_dir)
@@ -1,13 +1,20 @@
+import sys
 from pathlib import Path
 
 import pandas as pd
 
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.significance import pairwise_significance
+
 # === Parameters
 RESULT_DIR = Path("evaluation scores")
 csv_files = list(RESULT_DIR.glob("*_other_scores.csv")) + list(RESULT_DIR.glob("*_bleurt.csv"))
+N_RESAMPLES = 1000  # Bootstrap resamples / randomization trials of the significance tests
 
 # === Global score storage
 model_scores = {}
+paired_scores = {}
 
 # === Parse each file
 for csv_file in csv_files:
@@ -30,6 +37,10 @@ for csv_file in csv_files:
             # Add mean value
             model_scores[(metric, model)].append(df[col].mean())
 
+            # Sentence scores of the file, for the paired significance tests
+            reference = col.split("_generated")[0][len(metric) + 1:]
+            paired_scores.setdefault((csv_file.stem, metric, reference), {})[model] = df[col]
+
 # === Compute global averages per model/metric
 summary_rows = []
 for (metric, model), values in model_scores.items():
@@ -57,3 +68,17 @@ print(pivot_df)
 output_csv = RESULT_DIR / "summary_best_model_per_metric.csv"
 pivot_df.to_csv(output_csv)
 print(f"\n💾 File saved: {output_csv}")
+
+# === Paired bootstrap and approximate randomization between the models of each file, per metric and reference
+significance_rows = []
+for (file_label, metric, reference), columns in paired_scores.items():
+    for row in pairwise_significance(pd.DataFrame(columns), n_resamples=N_RESAMPLES, higher_is_better=metric != "ter"):
+        significance_rows.append({"file": file_label, "metric": metric, "reference": reference, **row})
+
+if significance_rows:
+    significance_df = pd.DataFrame(significance_rows)
+    significance_csv = RESULT_DIR / "significance_tests.csv"
+    significance_df.to_csv(significance_csv, index=False)
+    print(f"\n🎲 {significance_df['significant'].sum()} of {len(significance_df)} model pairs differ significantly "
+          f"(bootstrap and randomization p < 0.05, {N_RESAMPLES} resamples)")
+    print(f"💾 File saved: {significance_csv}")
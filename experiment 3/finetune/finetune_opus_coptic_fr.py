@@ -1,102 +1,150 @@
 import argparse
 import os
+import sys
+from pathlib import Path
 
 import pandas as pd
-from datasets import Dataset
 from transformers import (
     MarianTokenizer,
     MarianMTModel,
     TrainingArguments,
-    Trainer,
-    TrainerCallback,
-    TrainerState,
-    TrainerControl,
     DataCollatorForSeq2Seq
 )
 
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.data_cache import load_tokenized_dataset
+from coptic_nmt.device import add_device_arguments, configure_cpu_threads, device_training_arguments
+from coptic_nmt.distributed import add_distributed_arguments, configure_distributed, distributed_training_arguments
+from coptic_nmt.multi_reference import EpochTimeCallback, MultiReferenceCollator, MultiReferenceDataset
+from coptic_nmt.quality import add_early_stopping_arguments, early_stopping_callbacks, early_stopping_training_arguments
+from coptic_nmt.streaming import (
+    add_streaming_arguments,
+    check_data_arguments,
+    load_streaming_datasets,
+    streaming_callbacks,
+    streaming_training_arguments,
+)
+from coptic_nmt.telemetry import TelemetryCallback
+from coptic_nmt.trainer import CopticTrainer, add_hyperparameter_arguments, last_checkpoint
+
 # === Argument parser
 parser = argparse.ArgumentParser()
-parser.add_argument("--data_path", type=str, required=True, help="Path to the training CSV file")
+parser.add_argument("--data_path", type=str, default=None, help="Path to the training CSV file (or --shards)")
 parser.add_argument("--output_dir", type=str, required=True, help="Output directory for the fine-tuned model")
 parser.add_argument("--test", action="store_true", help="Quick test mode (sample + 1 epoch)")
+parser.add_argument("--cache_dir", type=str, default="tokenized_cache", help="Folder of the tokenized dataset cache")
+parser.add_argument("--seed", type=int, default=42, help="Seed of the train/test split")
+parser.add_argument("--max_tokens_per_batch", type=int, default=None,
+                    help="Length-grouped batches capped by this many padded tokens instead of a fixed batch size")
+parser.add_argument("--multi_reference", action="store_true",
+                    help="Group the French versions of a verse and encode its Coptic source once per step")
+add_hyperparameter_arguments(parser, num_epochs=45)
+add_early_stopping_arguments(parser)
+add_device_arguments(parser)
+add_distributed_arguments(parser)
+add_streaming_arguments(parser)
 args = parser.parse_args()
+check_data_arguments(parser, args, csv_only=("multi_reference",))
+configure_distributed(args, parser)
+configure_cpu_threads(args)
 
 # === Model path and offline cache
 model_path = ""  # path redacted
 os.environ["TRANSFORMERS_OFFLINE"] = "1"
 os.environ["TRANSFORMERS_CACHE"] = model_path
 
-# === Load training data
-df = pd.read_csv(args.data_path)
-df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
+# === Load training data (Parquet shards are streamed instead with --shards)
+if not args.shards:
+    df = pd.read_csv(args.data_path)
+    df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
 
 # === Reduce dataset for test mode
 if args.test:
-    df = df.sample(n=100, random_state=42)
+    if not args.shards:
+        df = df.sample(n=100, random_state=42)
     num_epochs = 1
     print("⚙️ Test mode enabled: 100 samples, 1 epoch")
 else:
-    num_epochs = 45
-
-# === HuggingFace Dataset
-dataset = Dataset.from_pandas(df).train_test_split(test_size=0.1)
+    num_epochs = args.num_epochs
 
 # === Load tokenizer and model
 tokenizer = MarianTokenizer.from_pretrained(model_path, local_files_only=True)
 model = MarianMTModel.from_pretrained(model_path, local_files_only=True, use_safetensors=False)
 
-# === Preprocessing function
-def preprocess_function(examples):
-    inputs = [">>fra<< " + text for text in examples["coptic_text_romanized"]]
-    targets = examples["french_translation"]
-
-    model_inputs = tokenizer(inputs, max_length=128, truncation=True)
-    labels = tokenizer(text_target=targets, max_length=128, truncation=True)
-
-    model_inputs["labels"] = labels["input_ids"]
-    return model_inputs
-
-# === Tokenization
-tokenized_datasets = dataset.map(preprocess_function, batched=True)
-
-# === Data collator
-data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
+# === Seeded split + tokenization (reused from the on-disk cache when available), or streamed shards
+if args.shards:
+    tokenized_datasets, epoch_rows = load_streaming_datasets(args, tokenizer, input_prefix=">>fra<< ", max_length=128)
+else:
+    tokenized_datasets = load_tokenized_dataset(
+        df, tokenizer, cache_dir=args.cache_dir, input_prefix=">>fra<< ", max_length=128, seed=args.seed
+    )
+    epoch_rows = None
+
+# === Training set and data collator
+if args.multi_reference:
+    train_dataset = MultiReferenceDataset(tokenized_datasets["train"])
+    data_collator = MultiReferenceCollator(tokenizer)
+    # Keep about batch_size (source, reference) pairs per step, as in the row-per-pair setup
+    train_batch_size = max(1, round(args.batch_size / train_dataset.references_per_source))
+    print(f"🔗 Multi-reference mode: {train_dataset.num_pairs} pairs grouped into {len(train_dataset)} sources "
+          f"({train_dataset.references_per_source:.2f} references per source, {train_batch_size} sources per batch)")
+    num_encoder_inputs = len(train_dataset)
+else:
+    train_dataset = tokenized_datasets["train"]
+    data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
+    train_batch_size = args.batch_size
+    # A streamed training set has no length, its epoch is the rows of the shards
+    num_encoder_inputs = epoch_rows if args.shards else len(train_dataset)
 
 # === Training arguments
 training_args = TrainingArguments(
     output_dir=args.output_dir,
-    learning_rate=5e-5,
-    per_device_train_batch_size=32,
-    per_device_eval_batch_size=32,
+    learning_rate=args.learning_rate,
+    per_device_train_batch_size=train_batch_size,
+    per_device_eval_batch_size=args.batch_size,
+    gradient_accumulation_steps=args.gradient_accumulation_steps,
     weight_decay=0.01,
     save_total_limit=3,
     num_train_epochs=num_epochs,
     logging_dir="./logs_opusmt",
     save_strategy="epoch",
-    fp16=True,
+    **device_training_arguments(args, model, fp16=True),
+    **distributed_training_arguments(args),
+    **early_stopping_training_arguments(args),
+    **streaming_training_arguments(args, num_epochs, epoch_rows),
 )
 
-# === Custom logger callback
-class CustomLoggerCallback(TrainerCallback):
-    def on_epoch_begin(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"\n🚀 Starting epoch {int(state.epoch) + 1}")
+# === Epoch timing (compare both modes with python3 -m coptic_nmt.multi_reference)
+os.makedirs(args.output_dir, exist_ok=True)
+epoch_time_callback = EpochTimeCallback(
+    os.path.join(args.output_dir, "epoch_times.jsonl"),
+    mode="multi_reference" if args.multi_reference else "row_per_pair",
+    num_pairs=epoch_rows if args.shards else len(tokenized_datasets["train"]),
+    num_encoder_inputs=num_encoder_inputs,
+)
 
-    def on_epoch_end(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"✅ Finished epoch {int(state.epoch)} - Step {state.global_step}\n")
+# === Early stopping on in-loop chrF (only with --early_stopping_patience)
+quality_callbacks = early_stopping_callbacks(args, tokenizer, tokenized_datasets["test"], input_prefix=">>fra<< ", batch_size=args.batch_size)
 
 # === Trainer
-trainer = Trainer(
+trainer = CopticTrainer(
     model=model,
     args=training_args,
-    train_dataset=tokenized_datasets["train"],
+    train_dataset=train_dataset,
     eval_dataset=tokenized_datasets["test"],
     tokenizer=tokenizer,
     data_collator=data_collator,
-    callbacks=[CustomLoggerCallback()]
+    callbacks=[TelemetryCallback(), epoch_time_callback] + quality_callbacks + streaming_callbacks(args, epoch_rows),
+    multi_reference=args.multi_reference,
+    max_tokens_per_batch=args.max_tokens_per_batch,
 )
 
 # === Fine-tuning
-trainer.train()
+trainer.train(resume_from_checkpoint=last_checkpoint(training_args.output_dir))
 
 # === Save final model
-trainer.save_model(f"./{args.output_dir}")
+trainer.save_model(args.output_dir)
+
+# === Example: multi-version data with a shared encoder pass per verse
+# python3 finetune_opus_coptic_fr.py --data_path train_clean_data.csv --output_dir opus-multi-ref --multi_reference
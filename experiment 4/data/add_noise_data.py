@@ -1,6 +1,13 @@
 import random
+import sys
+from functools import partial
+from pathlib import Path
+
 import pandas as pd
 
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt import noise
+
 # ===== Global Parameters =====
 input_file = "train_clean_data.csv"
 noise_settings = {
@@ -13,51 +20,14 @@ substitution_prob = 0.1  # confusion probability
 deletion_prob = 0.02     # deletion probability
 swap_prob = 0.02         # swap probability
 
-# ===== Confusion dictionary for Coptic text =====
-# confusion_map = {
-#     'ⲁ': ['ⲟ', 'ⲉ'], 'ⲟ': ['ⲁ', 'ⲉ'], 'ⲉ': ['ⲁ', 'ⲟ'],
-#     'ⲓ': ['ⲏ', 'ⲩ'], 'ⲏ': ['ⲓ', 'ⲉ'], 'ⲩ': ['ⲓ', 'ⲛ'],
-#     'ⲥ': ['ⲓ', 'ⲏ'], 'ϣ': ['ϥ', 'ϫ'], 'ϥ': ['ϣ', 'ϫ'],
-#     'ϫ': ['ϣ', 'ϥ'], 'ϯ': ['ⲧ', 'ⲑ'], 'ⲧ': ['ϯ', 'ⲑ'],
-#     'ⲑ': ['ⲧ', 'ϯ'], 'ⲛ': ['ⲩ'], 'ⲙ': ['ⲛ'], 'ⲣ': ['ⲩ', 'ⲙ']
-# }
-
-# ===== Confusion dictionary for romanized Coptic text =====
-confusion_map = {
-    'a': ['o', 'e'], 'o': ['a', 'e'], 'e': ['a', 'o'],
-    'i': ['l', 'j'], 'l': ['i', '1'], 'c': ['e'],
-    'u': ['v'], 'v': ['u'], 'n': ['m'], 'm': ['n'],
-    'r': ['n', 's'], 's': ['r'], 't': ['f'], 'f': ['t']
-}
-
-def add_substitution_noise(text, noise_level=0.1):
-    new_text = ""
-    for char in str(text):
-        if char in confusion_map and random.random() < noise_level:
-            new_text += random.choice(confusion_map[char])
-        else:
-            new_text += char
-    return new_text
-
-def add_typo_noise(text, deletion_prob=0.02, swap_prob=0.02):
-    chars = list(text)
-    i = 0
-    while i < len(chars):
-        if random.random() < deletion_prob:
-            chars[i] = '[]'  # Represents a deletion
-            i += 1
-            continue
-        if i < len(chars) - 1 and random.random() < swap_prob:
-            chars[i], chars[i + 1] = chars[i + 1], chars[i]
-            i += 2
-        else:
-            i += 1
-    return ''.join(chars)
-
-def add_all_noise_to_coptic_text(text):
-    text = add_substitution_noise(text, substitution_prob)
-    text = add_typo_noise(text, deletion_prob, swap_prob)
-    return text
+# ===== Noise functions (romanized confusion map, deletion and swap) =====
+# Shared with the on-the-fly noise of finetune_opus_coptic_fr.py (--noise_rate)
+add_all_noise_to_coptic_text = partial(
+    noise.add_all_noise_to_coptic_text,
+    substitution_prob=substitution_prob,
+    deletion_prob=deletion_prob,
+    swap_prob=swap_prob,
+)
 
 # ===== Load the clean dataset =====
 df_clean = pd.read_csv(input_file)
@@ -1,13 +1,21 @@
+import sys
 from pathlib import Path
+
 import pandas as pd
 
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.significance import pairwise_significance
+
 # === Parameters
 RESULT_DIR = Path("evaluation scores/hiero")
 csv_files = list(RESULT_DIR.glob("*_other_scores.csv")) + list(RESULT_DIR.glob("*_bleurt.csv"))
+N_RESAMPLES = 1000  # Bootstrap resamples / randomization trials of the significance tests
 
 # === Storage
 summary_rows = []
 detailed_rows = []
+paired_scores = {}
 
 # === Loop through evaluation files
 for csv_file in csv_files:
@@ -43,6 +51,10 @@ for csv_file in csv_files:
                 "avg_score": avg_score
             })
 
+            # Sentence scores of the file, for the paired significance tests
+            reference = col.split("_generated")[0][len(metric) + 1:]
+            paired_scores.setdefault((csv_file.stem, metric, reference), {})[model] = df[col]
+
 # === Global summary
 summary_df = pd.DataFrame(summary_rows)
 global_pivot = summary_df.groupby(["model", "metric"]).mean().reset_index()
@@ -92,3 +104,17 @@ best_worst_df.to_csv(RESULT_DIR / "best_worst_dataset_per_model_metric.csv", ind
 print(f"\n💾 Files saved:\n - summary_best_model_per_metric.csv"
       f"\n - detailed_model_performance_per_dataset.csv"
       f"\n - best_worst_dataset_per_model_metric.csv")
+
+# === Paired bootstrap and approximate randomization between the models of each file, per metric and reference
+significance_rows = []
+for (file_label, metric, reference), columns in paired_scores.items():
+    for row in pairwise_significance(pd.DataFrame(columns), n_resamples=N_RESAMPLES, higher_is_better=metric != "ter"):
+        significance_rows.append({"file": file_label, "metric": metric, "reference": reference, **row})
+
+if significance_rows:
+    significance_df = pd.DataFrame(significance_rows)
+    significance_csv = RESULT_DIR / "significance_tests.csv"
+    significance_df.to_csv(significance_csv, index=False)
+    print(f"\n🎲 {significance_df['significant'].sum()} of {len(significance_df)} model pairs differ significantly "
+          f"(bootstrap and randomization p < 0.05, {N_RESAMPLES} resamples)")
+    print(f"💾 File saved: {significance_csv}")
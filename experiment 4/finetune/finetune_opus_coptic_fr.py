@@ -1,63 +1,141 @@
 import argparse
 import os
+import sys
+import time
+from pathlib import Path
 
 import pandas as pd
-from datasets import Dataset
 from transformers import (
     MarianTokenizer,
     MarianMTModel,
     TrainingArguments,
-    Trainer,
-    TrainerCallback,
-    TrainerState,
-    TrainerControl,
     DataCollatorForSeq2Seq
 )
 
+# === Make the shared coptic_nmt helpers importable
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from coptic_nmt.adapters import add_adapter_arguments, wrap_with_lora
+from coptic_nmt.batching import example_lengths
+from coptic_nmt.continual import add_continue_training_arguments, book_chrf, replay_mixture, write_continual_report
+from coptic_nmt.data_cache import load_tokenized_dataset
+from coptic_nmt.device import add_device_arguments, configure_cpu_threads, device_training_arguments
+from coptic_nmt.distributed import RANK, add_distributed_arguments, configure_distributed, distributed_training_arguments
+from coptic_nmt.noisy_dataset import NoisyCopticDataset, NoiseEpochCallback
+from coptic_nmt.quality import add_early_stopping_arguments, early_stopping_callbacks, early_stopping_training_arguments
+from coptic_nmt.streaming import (
+    add_streaming_arguments,
+    check_data_arguments,
+    load_streaming_datasets,
+    streaming_callbacks,
+    streaming_training_arguments,
+)
+from coptic_nmt.telemetry import TelemetryCallback
+from coptic_nmt.trainer import CopticTrainer, add_hyperparameter_arguments, last_checkpoint
+
 # === Argument parser
 parser = argparse.ArgumentParser()
-parser.add_argument("--data_path", type=str, required=True, help="Path to the training CSV file")
+parser.add_argument("--data_path", type=str, default=None, help="Path to the training CSV file (or --shards)")
 parser.add_argument("--output_dir", type=str, required=True, help="Output directory for the fine-tuned model")
 parser.add_argument("--test", action="store_true", help="Quick test mode (sample + 1 epoch)")
+parser.add_argument("--cache_dir", type=str, default="tokenized_cache", help="Folder of the tokenized dataset cache")
+parser.add_argument("--seed", type=int, default=42, help="Seed of the train/test split")
+parser.add_argument("--max_tokens_per_batch", type=int, default=None,
+                    help="Length-grouped batches capped by this many padded tokens instead of a fixed batch size")
+parser.add_argument("--noise_rate", type=float, default=None,
+                    help="Share of training verses noised on the fly at each epoch (e.g. 0.3); disabled by default")
+parser.add_argument("--noise_seed", type=int, default=42, help="Seed of the on-the-fly noise")
+add_adapter_arguments(parser)
+add_continue_training_arguments(parser)
+add_hyperparameter_arguments(parser)
+add_early_stopping_arguments(parser)
+add_device_arguments(parser)
+add_distributed_arguments(parser)
+add_streaming_arguments(parser)
 args = parser.parse_args()
+check_data_arguments(parser, args, csv_only=("noise_rate", "new_data_path"))
+configure_distributed(args, parser)
+configure_cpu_threads(args)
+
+# === Continued training always stops early (patience of 2 epochs unless given)
+if args.init_checkpoint and args.early_stopping_patience is None:
+    args.early_stopping_patience = 2
 
 # === Model path and offline cache settings
 model_path = "" # path redacted
 os.environ["TRANSFORMERS_OFFLINE"] = "1"
 os.environ["TRANSFORMERS_CACHE"] = model_path
 
-# === Load dataset
-df = pd.read_csv(args.data_path)
-df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
+# === Load dataset (Parquet shards are streamed instead with --shards)
+if not args.shards:
+    df = pd.read_csv(args.data_path)
+    df.dropna(subset=["coptic_text_romanized", "french_translation"], inplace=True)
+
+# === Continued training: new verses + replay buffer sampled from the previous training data
+if args.new_data_path:
+    new_df = pd.read_csv(args.new_data_path).dropna(subset=["coptic_text_romanized", "french_translation"])
+    full_data_size = len(df) + len(new_df)
+    df = replay_mixture(new_df, df, replay_ratio=args.replay_ratio, seed=args.seed)
 
 # === Reduce size if in test mode
 if args.test:
-    df = df.sample(n=100, random_state=42)
+    if not args.shards:
+        df = df.sample(n=100, random_state=42)
     num_epochs = 1
     print("⚙️ Test mode enabled: 100 examples, 1 epoch")
 else:
-    num_epochs = 15
-
-# === Convert to Hugging Face Dataset
-dataset = Dataset.from_pandas(df).train_test_split(test_size=0.1)
+    num_epochs = args.num_epochs
 
 # === Tokenizer and model loading
-tokenizer = MarianTokenizer.from_pretrained(model_path, local_files_only=True)
-model = MarianMTModel.from_pretrained(model_path, local_files_only=True, use_safetensors=False)
-
-# === Preprocessing function
-def preprocess_function(examples):
-    inputs = [">>fra<< " + text for text in examples["coptic_text_romanized"]]
-    targets = examples["french_translation"]
-
-    model_inputs = tokenizer(inputs, max_length=128, truncation=True)
-    labels = tokenizer(text_target=targets, max_length=128, truncation=True)
-
-    model_inputs["labels"] = labels["input_ids"]
-    return model_inputs
-
-# === Tokenization
-tokenized_datasets = dataset.map(preprocess_function, batched=True)
+if args.init_checkpoint:
+    tokenizer = MarianTokenizer.from_pretrained(args.init_checkpoint, local_files_only=True)
+    model = MarianMTModel.from_pretrained(args.init_checkpoint, local_files_only=True)
+    print(f"♻️ Continuing from the fine-tuned model {args.init_checkpoint}")
+else:
+    tokenizer = MarianTokenizer.from_pretrained(model_path, local_files_only=True)
+    model = MarianMTModel.from_pretrained(model_path, local_files_only=True, use_safetensors=False)
+
+# === Regression check on the existing evaluation books (scored before and after training), only when the
+# continued training report is written (by the main process)
+write_report = bool(args.new_data_path and args.regression_eval_csv) and RANK == 0
+if write_report:
+    regression_df = pd.read_csv(args.regression_eval_csv)
+    if args.regression_samples:
+        regression_df = regression_df.sample(n=min(args.regression_samples, len(regression_df)), random_state=42)
+    chrf_before = book_chrf(model, tokenizer, regression_df, args.regression_references, input_prefix=">>fra<< ",
+                            batch_size=args.batch_size)
+
+# === Adapter mode: frozen base, only the LoRA matrices are trained and saved
+if args.adapter == "lora":
+    model = wrap_with_lora(model, args)
+
+# === Seeded split + tokenization (reused from the on-disk cache when available), or streamed shards
+if args.shards:
+    tokenized_datasets, epoch_rows = load_streaming_datasets(args, tokenizer, input_prefix=">>fra<< ", max_length=128)
+else:
+    tokenized_datasets = load_tokenized_dataset(
+        df, tokenizer, cache_dir=args.cache_dir, input_prefix=">>fra<< ", max_length=128, seed=args.seed
+    )
+    epoch_rows = None
+
+# === Training set (clean, or noised on the fly from the raw columns of the cached split)
+if args.noise_rate is None:
+    train_dataset = tokenized_datasets["train"]
+    callbacks = []
+else:
+    # Noise is injected per example and per epoch, tokenization happens lazily in the dataset
+    train_dataset = NoisyCopticDataset(
+        tokenized_datasets["train"]["coptic_text_romanized"],
+        tokenized_datasets["train"]["french_translation"],
+        tokenizer,
+        noise_rate=args.noise_rate,
+        input_prefix=">>fra<< ",
+        max_length=128,
+        seed=args.noise_seed,
+        # Clean lengths drive token-budget batching (noise barely changes them)
+        lengths=example_lengths(tokenized_datasets["train"]),
+    )
+    callbacks = [NoiseEpochCallback(train_dataset)]
+    print(f"🎲 On-the-fly noise enabled: {args.noise_rate:.0%} of verses noised at each epoch")
 
 # === Data collator
 data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
@@ -65,38 +143,60 @@ data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
 # === Training arguments
 training_args = TrainingArguments(
     output_dir=args.output_dir,
-    learning_rate=5e-5,
-    per_device_train_batch_size=32,
-    per_device_eval_batch_size=32,
+    learning_rate=args.lora_learning_rate if args.adapter else args.learning_rate,
+    per_device_train_batch_size=args.batch_size,
+    per_device_eval_batch_size=args.batch_size,
+    gradient_accumulation_steps=args.gradient_accumulation_steps,
     weight_decay=0.01,
     save_total_limit=3,
     num_train_epochs=num_epochs,
     logging_dir="./logs_opusmt",
     save_strategy="epoch",
-    fp16=True,
+    **device_training_arguments(args, model, fp16=True),
+    **distributed_training_arguments(args),
+    **early_stopping_training_arguments(args),
+    **streaming_training_arguments(args, num_epochs, epoch_rows),
 )
 
-# === Logging callback
-class CustomLoggerCallback(TrainerCallback):
-    def on_epoch_begin(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"\n🚀 Starting epoch {int(state.epoch) + 1}")
-
-    def on_epoch_end(self, args, state: TrainerState, control: TrainerControl, **kwargs):
-        print(f"✅ End of epoch {int(state.epoch)} - Step {state.global_step}\n")
+# === Early stopping on in-loop chrF (only with --early_stopping_patience)
+quality_callbacks = early_stopping_callbacks(args, tokenizer, tokenized_datasets["test"], input_prefix=">>fra<< ", batch_size=args.batch_size)
 
 # === Trainer
-trainer = Trainer(
+trainer = CopticTrainer(
     model=model,
     args=training_args,
-    train_dataset=tokenized_datasets["train"],
+    train_dataset=train_dataset,
     eval_dataset=tokenized_datasets["test"],
     tokenizer=tokenizer,
     data_collator=data_collator,
-    callbacks=[CustomLoggerCallback()]
+    callbacks=[TelemetryCallback()] + callbacks + quality_callbacks + streaming_callbacks(args, epoch_rows),
+    max_tokens_per_batch=args.max_tokens_per_batch,
 )
 
 # === Fine-tuning
-trainer.train()
+train_start = time.perf_counter()
+trainer.train(resume_from_checkpoint=last_checkpoint(training_args.output_dir))
+train_seconds = time.perf_counter() - train_start
+
+# === Continued training report: compute vs a full retrain, chrF regression per evaluation book
+# Both counts cover the train split only (the held-out share of a full retrain is not trained on either)
+if write_report:
+    chrf_after = book_chrf(trainer.model, tokenizer, regression_df, args.regression_references,
+                           input_prefix=">>fra<< ", batch_size=args.batch_size)
+    train_share = len(train_dataset) / len(df)
+    write_continual_report(args.output_dir, chrf_before, chrf_after,
+                           trained_examples=int(trainer.state.epoch * len(train_dataset)),
+                           full_retrain_examples=int(args.full_retrain_epochs * full_data_size * train_share),
+                           train_seconds=train_seconds)
 
 # === Save final model
-trainer.save_model(f"./{args.output_dir}")
+trainer.save_model(args.output_dir)
+
+# === Example: on-the-fly noise instead of train_noisy_*_data.csv (here 30% of verses per epoch) ===
+# python3 finetune_opus_coptic_fr.py --data_path train_clean_data.csv --output_dir opus-finetuned-coptic-fr-noisy-30-data --noise_rate 0.3
+
+# === Example: LoRA adapters for the noise-level family (one small adapter folder per run)
+# python3 finetune_opus_coptic_fr.py --data_path train_clean_data.csv --output_dir opus-lora-coptic-fr-noisy-30-data --noise_rate 0.3 --adapter lora
+
+# === Example: continue the clean model on a newly extracted book with a 1:1 replay buffer
+# python3 finetune_opus_coptic_fr.py --data_path train_clean_data.csv --new_data_path sirach_corpus.csv --init_checkpoint ../../models/opus-finetuned-coptic-fr-clean-data --output_dir opus-finetuned-coptic-fr-clean-sirach --regression_eval_csv "../../evaluation data/evaluation_data.csv"
@@ -1,5 +1,7 @@
 import os
+import sys
 from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 import pandas as pd
 from tqdm import tqdm
@@ -26,6 +28,19 @@ model_paths = {
     "opus_noisy_100": "../../models/opus-finetuned-coptic-fr-noisy-100-data",
 }
 
+# --- Adapter mode: one base model + LoRA adapters (finetune_opus_coptic_fr.py --adapter lora) ---
+# When enabled, the base is loaded once in this process and the adapters are hot-swapped,
+# instead of loading one full checkpoint per model in parallel processes.
+USE_ADAPTERS = False
+base_model_path = "../../models/opus-mt-tc-bible-big-mul-mul"
+adapter_paths = {
+    "opus_clean": "../../models/opus-lora-coptic-fr-clean-data",
+    "opus_noisy_10": "../../models/opus-lora-coptic-fr-noisy-10-data",
+    "opus_noisy_30": "../../models/opus-lora-coptic-fr-noisy-30-data",
+    "opus_noisy_50": "../../models/opus-lora-coptic-fr-noisy-50-data",
+    "opus_noisy_100": "../../models/opus-lora-coptic-fr-noisy-100-data",
+}
+
 # --- Function to generate translations for a single model and DataFrame ---
 # This function will be executed in parallel processes.
 def generate_translations_for_model(model_key, model_path, df_input, temp_output_path):
@@ -60,6 +75,39 @@ def generate_translations_for_model(model_key, model_path, df_input, temp_output
     print(f"✅ [{os.getpid()}] Translations for {model_key} saved to {temp_output_path}")
     return temp_output_path
 
+# --- Function to generate translations for every adapter with a single base model ---
+def load_adapter_model():
+    from transformers import MarianTokenizer, MarianMTModel
+
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from coptic_nmt.adapters import load_base_with_adapters
+
+    print(f"🚀 Loading base model once: {base_model_path}")
+    tokenizer = MarianTokenizer.from_pretrained(base_model_path, local_files_only=True)
+    base_model = MarianMTModel.from_pretrained(base_model_path, local_files_only=True).to("cpu")
+    model = load_base_with_adapters(base_model, adapter_paths)
+    print(f"🧩 Adapters loaded: {', '.join(adapter_paths)}")
+    return tokenizer, model
+
+
+def generate_translations_with_adapters(tokenizer, model, df_input):
+    import torch
+
+    translations_per_model = {}
+    for model_key in adapter_paths:
+        model.set_adapter(model_key)
+        translations = []
+        for text_to_translate in tqdm(df_input["coptic_text_romanized"], total=len(df_input),
+                                      desc=f"Translating with {model_key}"):
+            text = ">>fra<< " + str(text_to_translate)
+            inputs = tokenizer(text, return_tensors="pt", max_length=128, truncation=True)
+            with torch.no_grad():
+                output = model.generate(**inputs, max_length=128, num_beams=6,
+                                        repetition_penalty=1.5, length_penalty=2.5)
+            translations.append(tokenizer.decode(output[0], skip_special_tokens=True))
+        translations_per_model[f"generated_translation_{model_key}"] = translations
+    return translations_per_model
+
 # --- Main Processing Loop for Each Evaluation Dataset File ---
 if __name__ == "__main__":
 
@@ -67,6 +115,9 @@ if __name__ == "__main__":
     os.makedirs(output_dir, exist_ok=True)
     print(f"\n📁 Output files will be saved in: {output_dir}")
 
+    if USE_ADAPTERS:
+        adapter_tokenizer, adapter_model = load_adapter_model()
+
     for input_eval_file_path in INPUT_EVAL_FILES:
         print(f"\n--- Processing evaluation dataset: {input_eval_file_path} ---")
 
@@ -81,6 +132,14 @@ if __name__ == "__main__":
         if n_samples:
             current_df = current_df.sample(n=n_samples, random_state=42).reset_index(drop=True)
 
+        if USE_ADAPTERS:
+            for column, translations in generate_translations_with_adapters(
+                    adapter_tokenizer, adapter_model, current_df).items():
+                current_df[column] = translations
+            current_df.to_csv(output_file_name, index=False)
+            print(f"✅ Final translations for {base_name} saved to: {output_file_name}")
+            continue
+
         temp_dir_for_dataset = os.path.join(output_dir, f"temp_{base_name}_translations")
         os.makedirs(temp_dir_for_dataset, exist_ok=True)
 
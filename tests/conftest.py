@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# === Make the shared coptic_nmt helpers importable, as the scripts do
+sys.path.append(str(Path(__file__).resolve().parents[1]))
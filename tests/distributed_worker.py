@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import torch
+from datasets import Dataset
+from transformers import BertTokenizer, DataCollatorForSeq2Seq, MarianConfig, MarianMTModel, TrainingArguments
+
+# === Make the shared coptic_nmt helpers importable, as the scripts do
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from coptic_nmt.data_cache import make_preprocess_function
+from coptic_nmt.distributed import RANK, configure_distributed, distributed_training_arguments
+from coptic_nmt.streaming import load_streaming_datasets
+from coptic_nmt.telemetry import TelemetryCallback
+from coptic_nmt.trainer import CopticTrainer
+
+# === Process of the two-rank tests (tests/test_distributed.py), started with coptic_nmt.distributed.launch
+# Tokenizer and Marian model are tiny and random: each verse "v<id>" is one token.
+
+
+def tiny_tokenizer_and_model(vocab_dir, n_verses):
+    vocab_dir = Path(vocab_dir)
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "fr"] + [f"v{i}" for i in range(n_verses)]
+    (vocab_dir / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    tokenizer = BertTokenizer(str(vocab_dir / "vocab.txt"))
+    config = MarianConfig(vocab_size=len(vocab), d_model=16, encoder_layers=1, decoder_layers=1,
+                          encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=32,
+                          decoder_ffn_dim=32, max_position_embeddings=32, pad_token_id=0,
+                          decoder_start_token_id=0, eos_token_id=3)
+    torch.manual_seed(0)
+    return tokenizer, MarianMTModel(config)
+
+
+def training_arguments(output_dir, **overrides):
+    return TrainingArguments(output_dir=output_dir, use_cpu=True, report_to=[], save_strategy="no",
+                             **distributed_training_arguments(argparse.Namespace(device_profile="cpu")), **overrides)
+
+
+# === stream: verses read by this rank in each of two epochs of the streamed training set
+def stream(args):
+    tokenizer, model = tiny_tokenizer_and_model(args.output_dir, args.n_verses)
+    streaming_args = argparse.Namespace(shards=[args.shards], shard_weights=None, shuffle_buffer=16,
+                                        heldout_fraction=args.heldout_fraction, streaming_eval_size=100, seed=42)
+    tokenized_datasets, _ = load_streaming_datasets(streaming_args, tokenizer)
+    trainer = CopticTrainer(
+        model=model,
+        args=training_arguments(args.output_dir, per_device_train_batch_size=4, max_steps=1,
+                                accelerator_config={"dispatch_batches": False}),
+        train_dataset=tokenized_datasets["train"],
+        data_collator=DataCollatorForSeq2Seq(tokenizer, model=model),
+    )
+    dataloader = trainer.get_train_dataloader()
+    epochs = []
+    for epoch in range(2):
+        dataloader.set_epoch(epoch)
+        epochs.append([tokenizer.decode(ids, skip_special_tokens=True)
+                       for batch in dataloader for ids in batch["input_ids"].tolist()])
+    with open(Path(args.output_dir) / f"seen_rank{RANK}.json", "w", encoding="utf-8") as f:
+        json.dump(epochs, f)
+
+
+# === train: one epoch with telemetry, same effective batch whatever the number of processes;
+# the trained parameters of this rank are saved to compare the ranks
+def train(args):
+    tokenizer, model = tiny_tokenizer_and_model(args.output_dir, args.n_verses)
+    verses = {"coptic_text_romanized": [f"v{i}" for i in range(args.n_verses)],
+              "french_translation": [f"fr v{i}" for i in range(args.n_verses)]}
+    train_dataset = Dataset.from_dict(verses).map(make_preprocess_function(tokenizer), batched=True,
+                                                  remove_columns=list(verses))
+    run_args = argparse.Namespace(batch_size=4, effective_batch_size=8, gradient_accumulation_steps=1,
+                                  device_profile="cpu", num_threads=None)
+    configure_distributed(run_args)
+    trainer = CopticTrainer(
+        model=model,
+        args=training_arguments(args.output_dir, per_device_train_batch_size=run_args.batch_size,
+                                gradient_accumulation_steps=run_args.gradient_accumulation_steps,
+                                num_train_epochs=1, learning_rate=1e-2, seed=42),
+        train_dataset=train_dataset,
+        data_collator=DataCollatorForSeq2Seq(tokenizer, model=model),
+        callbacks=[TelemetryCallback()],
+    )
+    trainer.train()
+    parameters = torch.cat([p.detach().flatten() for p in trainer.model.parameters()])
+    torch.save({"parameters": parameters, "global_step": trainer.state.global_step},
+               Path(args.output_dir) / f"parameters_rank{RANK}.pt")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    stream_parser = subparsers.add_parser("stream")
+    stream_parser.add_argument("--shards", required=True)
+    stream_parser.add_argument("--n_verses", type=int, required=True)
+    stream_parser.add_argument("--heldout_fraction", type=float, default=0.1)
+    stream_parser.add_argument("--output_dir", required=True)
+    train_parser = subparsers.add_parser("train")
+    train_parser.add_argument("--n_verses", type=int, required=True)
+    train_parser.add_argument("--output_dir", required=True)
+    args = parser.parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+    {"stream": stream, "train": train}[args.mode](args)
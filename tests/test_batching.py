@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from coptic_nmt.batching import TokenBudgetBatchSampler, padding_stats
+
+rng = random.Random(0)
+LENGTHS = [(rng.randint(3, 60), rng.randint(3, 60)) for _ in range(500)] + [(300, 10)]
+
+
+def test_batches_fit_the_budget_and_cover_every_example():
+    sampler = TokenBudgetBatchSampler(LENGTHS, max_tokens=512, pool_size=128)
+    for batch in sampler.batches:
+        longest = max(max(LENGTHS[i]) for i in batch)
+        # An example longer than the budget gets a batch of its own
+        assert len(batch) * longest <= 512 or len(batch) == 1
+    assert sorted(i for batch in sampler.batches for i in batch) == list(range(len(LENGTHS)))
+
+
+def test_max_batch_size_caps_the_rows():
+    sampler = TokenBudgetBatchSampler(LENGTHS, max_tokens=100_000, max_batch_size=16)
+    assert max(len(batch) for batch in sampler.batches) == 16
+
+
+def test_token_budget_pads_less_than_fixed_batches():
+    sampler = TokenBudgetBatchSampler(LENGTHS, max_tokens=1024)
+    fixed = [list(range(i, min(i + 16, len(LENGTHS)))) for i in range(0, len(LENGTHS), 16)]
+    assert padding_stats(LENGTHS, sampler.batches)["padding_ratio"] < padding_stats(LENGTHS, fixed)["padding_ratio"]
+
+
+def test_order_depends_on_the_epoch_only():
+    sampler = TokenBudgetBatchSampler(LENGTHS, max_tokens=512)
+    first = list(sampler)
+    # Iterating does not advance the epoch: the Trainer sets it
+    assert list(sampler) == first
+    sampler.set_epoch(1.0)
+    second = list(sampler)
+    assert second != first and sorted(map(tuple, second)) == sorted(map(tuple, first))
+    resumed = TokenBudgetBatchSampler(LENGTHS, max_tokens=512)
+    resumed.set_epoch(1)
+    assert list(resumed) == second
+
+
+def test_ranks_take_disjoint_batches_of_the_same_count():
+    ranks = [TokenBudgetBatchSampler(LENGTHS, max_tokens=512, num_replicas=3, rank=r) for r in range(3)]
+    for sampler in ranks:
+        sampler.set_epoch(2)
+    seen = [list(sampler) for sampler in ranks]
+    assert len({len(batches) for batches in seen}) == 1 and len(seen[0]) == len(ranks[0])
+    indices = [i for batches in seen for batch in batches for i in batch]
+    assert len(indices) == len(set(indices))
@@ -0,0 +1,83 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+bert_score = pytest.importorskip("bert_score")
+transformers = pytest.importorskip("transformers")
+
+from coptic_nmt.bertscore import BertScoreEmbeddings, EmbeddingStore
+
+CANDIDATES = [
+    "au commencement dieu créa le ciel et la terre",
+    "",
+    "paul apôtre de jésus christ par la volonté de dieu et le frère sosthène " * 4,
+    "la terre",
+    "dieu dit que la lumière soit",
+]
+REFERENCES = [
+    "au commencement dieu créa les cieux et la terre",
+    "et la terre était informe et vide",
+    "paul appelé à être apôtre de jésus christ par la volonté de dieu et le frère sosthène",
+    "",
+    "dieu dit que la lumière soit et la lumière fut",
+]
+
+
+# === Small random BERT saved locally: bert_score and BertScoreEmbeddings load it by path
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tiny-bert")
+    words = sorted({w for s in CANDIDATES + REFERENCES for w in s.split()})
+    (directory / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words),
+                                         encoding="utf-8")
+    # model_max_length 24: the long candidate is truncated by both implementations
+    tokenizer = transformers.BertTokenizer(str(directory / "vocab.txt"), model_max_length=24)
+    tokenizer.save_pretrained(directory)
+    config = transformers.BertConfig(vocab_size=len(words) + 5, hidden_size=32, num_hidden_layers=3,
+                                     num_attention_heads=2, intermediate_size=64, max_position_embeddings=64)
+    torch.manual_seed(0)
+    transformers.BertModel(config).save_pretrained(directory)
+    return str(directory)
+
+
+def reference_scores(model_dir):
+    return bert_score.score(CANDIDATES, REFERENCES, model_type=model_dir, num_layers=2, batch_size=2)
+
+
+def test_pair_scores_match_bert_score(model_dir):
+    P, R, F = reference_scores(model_dir)
+    embeddings = BertScoreEmbeddings(model_type=model_dir, num_layers=2, batch_size=2, device="cpu")
+    embeddings.load()
+    p, r, f = embeddings.pair_scores(CANDIDATES, REFERENCES, batch_size=3)
+    assert p == pytest.approx(P.numpy(), abs=1e-5)
+    assert r == pytest.approx(R.numpy(), abs=1e-5)
+    assert f == pytest.approx(F.numpy(), abs=1e-5)
+
+
+def test_embedding_store_reuses_embeddings(model_dir, tmp_path):
+    _, _, F = reference_scores(model_dir)
+    first = BertScoreEmbeddings(model_type=model_dir, num_layers=2, device="cpu", cache_dir=tmp_path)
+    first.load()
+    first.pair_scores(CANDIDATES, REFERENCES)
+
+    second = BertScoreEmbeddings(model_type=model_dir, num_layers=2, device="cpu", cache_dir=tmp_path)
+    second.load()
+    _, _, f = second.pair_scores(CANDIDATES, REFERENCES)
+    assert second.stats["embedded"] == 0
+    assert f == pytest.approx(F.numpy(), abs=1e-5)
+    assert len(EmbeddingStore(next(tmp_path.iterdir()))) == len(set(CANDIDATES + REFERENCES))
+
+
+def test_embedding_store_appends_one_chunk_per_flush(model_dir, tmp_path):
+    _, _, F = reference_scores(model_dir)
+    embeddings = BertScoreEmbeddings(model_type=model_dir, num_layers=2, device="cpu", cache_dir=tmp_path)
+    embeddings.load()
+    embeddings.pair_scores(CANDIDATES[:2], REFERENCES[:2])
+    embeddings.pair_scores(CANDIDATES, REFERENCES)
+
+    store_dir = next(tmp_path.iterdir())
+    assert sorted(p.name for p in store_dir.glob("index-*.json")) == ["index-00000.json", "index-00001.json"]
+    reopened = BertScoreEmbeddings(model_type=model_dir, num_layers=2, device="cpu", cache_dir=tmp_path)
+    reopened.load()
+    _, _, f = reopened.pair_scores(CANDIDATES, REFERENCES)
+    assert reopened.stats["embedded"] == 0
+    assert f == pytest.approx(F.numpy(), abs=1e-5)
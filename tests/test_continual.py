@@ -0,0 +1,31 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sacrebleu")
+pytest.importorskip("torch")
+
+from coptic_nmt.continual import replay_mixture
+
+
+def verses(ids, text):
+    return pd.DataFrame({"verse_id": ids, "coptic_text_romanized": [f"{text} {i}" for i in ids],
+                         "french_translation": [f"fr {text} {i}" for i in ids]})
+
+
+def test_replay_mixture_adds_old_verses_at_the_ratio():
+    new_df, old_df = verses(range(10), "new"), verses(range(100, 200), "old")
+    mixture = replay_mixture(new_df, old_df, replay_ratio=2.0, seed=1)
+    assert len(mixture) == 30
+    assert set(new_df["verse_id"]) <= set(mixture["verse_id"])
+    assert mixture["verse_id"].is_unique
+    assert mixture.equals(replay_mixture(new_df, old_df, replay_ratio=2.0, seed=1))
+    # Shuffled, not new verses followed by the replayed ones
+    assert mixture["verse_id"].head(10).tolist() != list(range(10))
+
+
+def test_replay_leaves_out_old_copies_of_new_verses_and_caps_at_old_data():
+    new_df, old_df = verses(range(10), "new"), verses(range(5, 15), "old")
+    mixture = replay_mixture(new_df, old_df, replay_ratio=3.0)
+    # Verses 5-9 are in the new data: only 10-14 can be replayed
+    assert len(mixture) == 15
+    assert not mixture["coptic_text_romanized"].isin([f"old {i}" for i in range(5, 10)]).any()
@@ -0,0 +1,48 @@
+import os
+import shutil
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("datasets")
+transformers = pytest.importorskip("transformers")
+
+from coptic_nmt.data_cache import load_tokenized_dataset
+
+
+@pytest.fixture
+def verses():
+    return pd.DataFrame({"coptic_text_romanized": [f"v{i}" for i in range(20)],
+                         "french_translation": [f"fr v{i}" for i in range(20)]})
+
+
+# A fresh tokenizer per load, as in separate runs
+@pytest.fixture
+def tokenizer(tmp_path):
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "fr"] + [f"v{i}" for i in range(20)]),
+                     encoding="utf-8")
+    return lambda: transformers.BertTokenizer(str(vocab))
+
+
+def test_second_load_is_a_cache_hit(tmp_path, verses, tokenizer, capsys):
+    first = load_tokenized_dataset(verses, tokenizer(), cache_dir=tmp_path / "cache")
+    second = load_tokenized_dataset(verses, tokenizer(), cache_dir=tmp_path / "cache")
+    assert "loaded from cache" in capsys.readouterr().out
+    assert second["train"]["input_ids"] == first["train"]["input_ids"]
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+
+# === Another run saves the same entry between our existence check and our rename
+def test_concurrent_build_loads_the_entry_of_the_other_run(tmp_path, verses, tokenizer, monkeypatch):
+    replace = os.replace
+
+    def racing_replace(src, dst):
+        shutil.copytree(src, dst)
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", racing_replace)
+    dataset = load_tokenized_dataset(verses, tokenizer(), cache_dir=tmp_path / "cache")
+    assert len(dataset["train"]) + len(dataset["test"]) == len(verses)
+    # Only the finished entry is left, not the temporary folder of this run
+    assert [".tmp-" in name for name in os.listdir(tmp_path / "cache")] == [False]
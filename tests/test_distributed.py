@@ -0,0 +1,90 @@
+import argparse
+import json
+import socket
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("datasets")
+pytest.importorskip("transformers")
+
+from coptic_nmt.distributed import configure_distributed, launch, scaling_report
+from coptic_nmt.streaming import is_heldout
+
+WORKER = str(Path(__file__).resolve().parent / "distributed_worker.py")
+
+pytestmark = pytest.mark.skipif(not torch.distributed.is_available() or not torch.distributed.is_gloo_available(),
+                                reason="torch.distributed with the gloo backend is needed")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_ranks(mode, *options, nproc_per_node=2):
+    assert launch([WORKER, mode, *options], nproc_per_node=nproc_per_node, master_port=free_port()) == 0
+
+
+# === Streamed training set over two gloo ranks: each example is read by exactly one rank per epoch
+# 4 shards are split whole between the ranks, 3 shards example by example.
+@pytest.mark.parametrize("n_shards", [4, 3])
+def test_streamed_examples_seen_once_per_epoch(tmp_path, n_shards):
+    n_verses, fraction = 60, 0.1
+    verses = pd.DataFrame({"verse_id": range(n_verses),
+                           "coptic_text_romanized": [f"v{i}" for i in range(n_verses)],
+                           "french_translation": [f"fr v{i}" for i in range(n_verses)]})
+    for i in range(n_shards):
+        verses.iloc[i::n_shards].to_parquet(tmp_path / f"verses-{i:05d}.parquet", index=False)
+    output_dir = tmp_path / "run"
+
+    run_ranks("stream", "--shards", str(tmp_path / "*.parquet"), "--n_verses", str(n_verses),
+              "--heldout_fraction", str(fraction), "--output_dir", str(output_dir))
+
+    expected = sorted(f"v{i}" for i in range(n_verses) if not is_heldout(i, fraction, 42))
+    seen = [json.loads((output_dir / f"seen_rank{rank}.json").read_text(encoding="utf-8")) for rank in range(2)]
+    for epoch in range(2):
+        rank0, rank1 = seen[0][epoch], seen[1][epoch]
+        assert rank0 and rank1
+        assert sorted(rank0 + rank1) == expected
+
+
+# === DDP training over two gloo ranks vs one process, same effective batch of 8
+# Gradients are all-reduced: both ranks end with the same trained parameters. The telemetry of both
+# runs feeds the scaling report.
+def test_two_ranks_sync_gradients_and_report_scaling(tmp_path):
+    single, double = tmp_path / "ddp1", tmp_path / "ddp2"
+    run_ranks("train", "--n_verses", "64", "--output_dir", str(single), nproc_per_node=1)
+    run_ranks("train", "--n_verses", "64", "--output_dir", str(double))
+
+    reference = torch.load(single / "parameters_rank0.pt")
+    ranks = [torch.load(double / f"parameters_rank{rank}.pt") for rank in range(2)]
+    assert torch.equal(ranks[0]["parameters"], ranks[1]["parameters"])
+    # 64 examples / effective batch of 8, with 2 accumulation steps in the single-process run
+    assert reference["global_step"] == ranks[0]["global_step"] == 8
+    assert sorted(p.name for p in double.glob("telemetry*.jsonl")) == ["telemetry_rank0.jsonl",
+                                                                        "telemetry_rank1.jsonl"]
+
+    report = scaling_report([str(double), str(single)], warmup_steps=1)
+    assert [row["processes"] for row in report] == [1, 2]
+    assert report[0]["speedup"] == pytest.approx(1.0) and report[0]["scaling_efficiency"] == pytest.approx(1.0)
+    assert all(row["tokens_per_sec"] > 0 for row in report)
+    assert report[1]["scaling_efficiency"] == pytest.approx(report[1]["speedup"] / 2)
+
+
+# === Effective batch: accumulation steps in this (single) process, non-multiples rejected
+def test_effective_batch_must_be_a_multiple_of_the_step_batch():
+    args = argparse.Namespace(batch_size=4, effective_batch_size=32, gradient_accumulation_steps=1,
+                              device_profile="cpu", num_threads=None)
+    configure_distributed(args)
+    assert args.gradient_accumulation_steps == 8
+
+    for effective_batch_size in (30, 2):
+        args.effective_batch_size = effective_batch_size
+        with pytest.raises(ValueError, match="not a multiple"):
+            configure_distributed(args)
+        with pytest.raises(SystemExit):
+            configure_distributed(args, argparse.ArgumentParser())
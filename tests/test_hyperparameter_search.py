@@ -0,0 +1,20 @@
+import json
+
+from coptic_nmt.hyperparameter_search import rung_budgets, trial_score
+
+
+def test_rung_budgets():
+    assert rung_budgets(1, 9, 3) == [1, 3, 9]
+    assert rung_budgets(1, 10, 3) == [1, 3, 9, 10]
+    assert rung_budgets(2, 20, 2) == [2, 4, 8, 16, 20]
+    assert rung_budgets(5, 5, 3) == [5]
+
+
+def test_trial_score_is_the_best_chrf_of_the_history(tmp_path):
+    assert trial_score(tmp_path) == (None, 0)
+    history = tmp_path / "quality_history.jsonl"
+    history.write_text("", encoding="utf-8")
+    assert trial_score(tmp_path) == (None, 0)
+    records = [{"epoch": 1.0, "chrf": 30.5}, {"epoch": 2.0, "chrf": 41.2}, {"epoch": 3.0, "chrf": 39.0}]
+    history.write_text("\n".join(json.dumps(r) for r in records) + "\n", encoding="utf-8")
+    assert trial_score(tmp_path) == (41.2, 3.0)
@@ -0,0 +1,53 @@
+import pytest
+
+sacrebleu = pytest.importorskip("sacrebleu")
+np = pytest.importorskip("numpy")
+
+from sacrebleu.metrics import BLEU, CHRF, TER
+
+from coptic_nmt import lexical
+
+CANDIDATES = [
+    "Au commencement, Dieu créa le ciel et la terre.",
+    "Paul, apôtre de Jésus Christ par la volonté de Dieu",
+    "",
+    "la terre",
+    "Et Dieu dit : que la lumière soit !",
+    "grâce et paix",
+]
+REFERENCES = [
+    "Au commencement, Dieu créa les cieux et la terre.",
+    "Paul, appelé à être apôtre de Jésus-Christ par la volonté de Dieu,",
+    "et la terre était informe et vide",
+    "",
+    "Dieu dit : Que la lumière soit ! Et la lumière fut.",
+    "Grâce et paix vous soient données",
+]
+
+
+def test_bleu_matches_sacrebleu():
+    stats = lexical.bleu_statistics(CANDIDATES, REFERENCES)
+    sentence = lexical.bleu_scores(stats, effective_order=True)
+    bleu = BLEU(effective_order=True)
+    for score, candidate, reference in zip(sentence, CANDIDATES, REFERENCES):
+        assert score == pytest.approx(bleu.sentence_score(candidate, [reference]).score, abs=1e-9)
+    corpus = lexical.bleu_scores(stats.sum(axis=0))[0]
+    assert corpus == pytest.approx(sacrebleu.corpus_bleu(CANDIDATES, [REFERENCES]).score, abs=1e-9)
+
+
+def test_chrf_matches_sacrebleu():
+    stats = lexical.chrf_statistics(CANDIDATES, REFERENCES)
+    chrf = CHRF(word_order=2)
+    for score, candidate, reference in zip(lexical.chrf_scores(stats), CANDIDATES, REFERENCES):
+        assert score == pytest.approx(chrf.sentence_score(candidate, [reference]).score, abs=1e-9)
+    corpus = lexical.chrf_scores(stats.sum(axis=0))[0]
+    assert corpus == pytest.approx(chrf.corpus_score(CANDIDATES, [REFERENCES]).score, abs=1e-9)
+
+
+def test_ter_matches_sacrebleu():
+    stats = lexical.ter_statistics(CANDIDATES, REFERENCES)
+    ter = TER()
+    for score, candidate, reference in zip(lexical.ter_scores(stats), CANDIDATES, REFERENCES):
+        assert score == pytest.approx(ter.sentence_score(candidate, [reference]).score, abs=1e-9)
+    corpus = lexical.ter_scores(stats.sum(axis=0))[0]
+    assert corpus == pytest.approx(ter.corpus_score(CANDIDATES, [REFERENCES]).score, abs=1e-9)
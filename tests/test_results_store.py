@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from coptic_nmt.results_store import ResultsStore, best_worst, summary
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite")
+    verse_ids = ["v1", "v2"]
+    store.write("experiment 4", "clean", "opus", "segond", "chrf", verse_ids, [40.0, 50.0])
+    store.write("experiment 4", "clean", "opus", "darby", "chrf", verse_ids, [30.0, 20.0])
+    # Best of the two references per verse (evaluation --multi_reference)
+    store.write("experiment 4", "clean", "opus", "multi", "chrf", verse_ids, [40.0, 50.0])
+    return store
+
+
+def test_summary_leaves_out_multi_reference_scores(store):
+    table = summary(store)
+    assert table["scores"].tolist() == [4]
+    assert table["avg_score"].tolist() == [35.0]
+    assert "multi" not in summary(store, by="reference")["reference"].tolist()
+
+
+def test_multi_reference_scores_on_request(store):
+    table = summary(store, by="reference", reference="multi")
+    assert table["reference"].tolist() == ["multi"]
+    assert table["avg_score"].tolist() == [45.0]
+
+
+def test_best_worst_reference_ignores_multi(store):
+    row = best_worst(store, over="reference").iloc[0]
+    assert (row["best_reference"], row["worst_reference"]) == ("segond", "darby")
@@ -0,0 +1,45 @@
+import pytest
+
+from coptic_nmt import score_cache
+from coptic_nmt.score_cache import ScoreCache, pair_key
+
+
+def test_pair_key():
+    assert pair_key("a", "b") == pair_key("a", "b", None)
+    assert pair_key("a", "b") != pair_key("b", "a")
+    assert pair_key("ab", "c") != pair_key("a", "bc")
+    assert pair_key("a", "b", "source") != pair_key("a", "b")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(score_cache.time, "time", tick)
+
+
+def test_lookup_returns_stored_scores_per_metric(tmp_path, clock):
+    cache = ScoreCache(tmp_path / "scores.sqlite")
+    cache.store("chrf", ["k1", "k2"], [10.0, 20.0])
+    assert cache.lookup("chrf", ["k1", "k2", "k3"]) == {"k1": 10.0, "k2": 20.0}
+    assert cache.lookup("bleu", ["k1"]) == {}
+    assert (cache.stats["hits"], cache.stats["misses"]) == (2, 2)
+    # Chunked IN queries
+    cache.store("ter", [f"t{i}" for i in range(25)], range(25))
+    assert len(cache.lookup("ter", [f"t{i}" for i in range(25)], chunk_size=10)) == 25
+
+
+def test_least_recently_used_scores_are_evicted(tmp_path, clock):
+    cache = ScoreCache(tmp_path / "scores.sqlite", max_entries=2)
+    cache.store("chrf", ["k1"], [1.0])
+    cache.store("chrf", ["k2"], [2.0])
+    cache.lookup("chrf", ["k1"])
+    cache.store("chrf", ["k3"], [3.0])
+    assert cache.size() == 2 and cache.stats["evicted"] == 1
+    assert cache.lookup("chrf", ["k1", "k2", "k3"]) == {"k1": 1.0, "k3": 3.0}
+    # Scores persist across sessions
+    assert ScoreCache(tmp_path / "scores.sqlite").lookup("chrf", ["k3"]) == {"k3": 3.0}
@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from coptic_nmt.significance import pairwise_significance
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    base = rng.uniform(20, 60, size=200)
+    return pd.DataFrame({"clean": base + 5 + rng.normal(0, 2, size=200), "noisy": base,
+                         "copy": base.copy()})
+
+
+def rows_by_pair(rows):
+    return {(row["model_a"], row["model_b"]): row for row in rows}
+
+
+def test_clear_difference_is_significant(table):
+    row = rows_by_pair(pairwise_significance(table))[("clean", "noisy")]
+    assert row["segments"] == 200
+    assert row["difference"] == pytest.approx(row["mean_a"] - row["mean_b"])
+    assert row["ci_low"] > 0 and row["ci_high"] > row["difference"] > row["ci_low"]
+    assert row["better_model"] == "clean" and row["significant"]
+    assert row["bootstrap_p"] == 0 and row["randomization_p"] < 0.01
+
+
+def test_identical_systems_tie(table):
+    row = rows_by_pair(pairwise_significance(table))[("noisy", "copy")]
+    assert row["difference"] == 0 and row["better_model"] == "tie" and not row["significant"]
+    assert row["randomization_p"] == 1
+
+
+def test_lower_is_better_flips_the_better_model(table):
+    row = rows_by_pair(pairwise_significance(table, higher_is_better=False))[("clean", "noisy")]
+    assert row["better_model"] == "noisy"
+
+
+def test_nan_rows_dropped_and_seeded(table):
+    table.loc[:9, "clean"] = np.nan
+    rows = pairwise_significance(table, n_resamples=200, seed=1)
+    assert {row["segments"] for row in rows} == {190}
+    assert rows == pairwise_significance(table, n_resamples=200, seed=1)
+    assert pairwise_significance(table[["clean"]]) == []